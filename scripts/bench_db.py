@@ -0,0 +1,72 @@
+"""
+Verification throughput of the verifier under each LMDB map size, sync mode and readahead setting.
+
+The key event logs of fresh identifiers are generated once and then verified by a pool of verification contexts
+against databases opened with every combination of the settings --db-map-size, --db-sync-mode and
+--db-no-readahead of verifier server start change, so the numbers reflect the many small commits of accepting new
+key state.  Usage:
+
+    python scripts/bench_db.py [identifiers] [events per identifier] [contexts]
+"""
+import sys
+import tempfile
+import time
+
+from keri.app import habbing
+
+from verifier.core import pooling, tuning
+
+MapSizes = (tuning.MapSize, 1024 * 1024 * 1024)  # keripy default and a map that never needs to grow
+
+
+def kels(count, events):
+    """ Returns list of the CESR streams of the KELs of count fresh identifiers with events events each """
+    with habbing.openHby(name="bench-issuer", temp=True) as hby:
+        streams = []
+        for idx in range(count):
+            hab = hby.makeHab(name=f"issuer{idx}", transferable=True)
+            for _ in range(events - 1):
+                hab.interact()
+            streams.append(bytes(hab.replay()))
+
+        return streams
+
+
+def bench(settings, streams, contexts):
+    """ Returns verifications per second of streams by contexts verification contexts with settings """
+    tuning.configure(settings)
+    with tempfile.TemporaryDirectory() as head:
+        ks = tuning.Keeper(name="bench", headDirPath=head, temp=False, reopen=True)
+        db = tuning.Baser(name="bench", headDirPath=head, temp=False, reopen=True)
+        hby = habbing.Habery(name="bench", headDirPath=head, ks=ks, db=db, temp=False)
+        reger = tuning.Reger(name="bench", headDirPath=head, temp=False, db=hby.db)
+        pool = pooling.ContextPool(hby=hby, reger=reger, size=contexts)
+
+        start = time.perf_counter()
+        fus = [pool.submit(pooling.VerificationContext.verify, ims) for ims in streams]
+        for fu in fus:
+            fu.result()
+        elapsed = time.perf_counter() - start
+
+        pool.close()
+        reger.close()
+        hby.close()
+        return len(streams) / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    contexts = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    streams = kels(count, events)
+
+    print(f"{'map size':>12}  {'sync mode':<14}{'readahead':<11}{'KELs/s':>10}{'events/s':>12}")
+    for mapSize in MapSizes:
+        for sync in tuning.SyncModes:
+            for readahead in (True, False):
+                rate = bench(tuning.Settings(mapSize=mapSize, readahead=readahead, sync=sync), streams, contexts)
+                print(f"{mapSize:>12}  {sync:<14}{str(readahead):<11}{rate:>10.0f}{rate * events:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
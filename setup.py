@@ -77,6 +77,8 @@ setup(
         # eg:
         #   'rst': ['docutils>=0.11'],
         #   ':python_version=="2.6"': ['argparse'],
+        'asgi': ['uvicorn>=0.23.0'],
+        'fast': ['orjson>=3.9.0'],
     },
     tests_require=[
         'coverage>=5.5',
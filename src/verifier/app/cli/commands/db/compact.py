@@ -0,0 +1,36 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.app.cli.commands.db.compact module
+
+Compact the verifier databases in place
+"""
+import argparse
+
+from verifier.core import snapshotting
+
+parser = argparse.ArgumentParser(description='Rewrite the verifier databases without their free pages. Fails while '
+                                             'the verifier is running')
+parser.set_defaults(handler=lambda args: compact(args))
+parser.add_argument('-n', '--name',
+                    action='store',
+                    default="vdb",
+                    help="Name of controller. Default is vdb.")
+parser.add_argument('--base', '-b', help='additional optional prefix to file location of KERI keystore',
+                    required=False, default="")
+
+
+def compact(args):
+    """ Compact every database of a stopped verifier
+
+    Parameters:
+        args (Namespace): command line namespace object containing the parsed command line arguments
+
+    Returns:
+        list: no doers to run
+
+    """
+    sizes = snapshotting.compact(name=args.name, base=args.base)
+    for key, (before, after) in sizes.items():
+        print(f"Compacted {key} from {before} to {after} bytes")
+    return []
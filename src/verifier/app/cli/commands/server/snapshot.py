@@ -0,0 +1,39 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.app.cli.commands.server.snapshot module
+
+Export a compacted snapshot of the verifier databases
+"""
+import argparse
+
+from verifier.core import snapshotting
+
+parser = argparse.ArgumentParser(description='Export a compacted snapshot of the verifier databases to warm start '
+                                             'new instances with verifier server start --snapshot')
+parser.set_defaults(handler=lambda args: snapshot(args))
+parser.add_argument('-n', '--name',
+                    action='store',
+                    default="vdb",
+                    help="Name of controller. Default is vdb.")
+parser.add_argument('--base', '-b', help='additional optional prefix to file location of KERI keystore',
+                    required=False, default="")
+parser.add_argument('--output', '-o',
+                    action='store',
+                    required=True,
+                    help="new directory to write the snapshot to")
+
+
+def snapshot(args):
+    """ Export the databases of a verifier, which may be running, to a snapshot directory
+
+    Parameters:
+        args (Namespace): command line namespace object containing the parsed command line arguments
+
+    Returns:
+        list: no doers to run
+
+    """
+    envs = snapshotting.export(args.output, name=args.name, base=args.base)
+    print(f"Snapshot of {', '.join(envs)} written to {args.output}")
+    return []
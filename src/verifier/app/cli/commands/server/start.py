@@ -8,13 +8,12 @@ Verification service main command line handler.  Starts service using the provid
 import argparse
 
 import falcon
+import falcon.asgi
 from hio.core import http
-from keri import help
-from keri.app import keeping, configing, habbing, oobiing
-from keri.app.cli.common import existing
-from keri.vdr import viring
-import logging
-from verifier.core import verifying, basing
+from keri.app import configing, habbing, oobiing, directing
+from verifier.app import forking, serving
+from verifier.core import admitting, asyncing, bundling, escrowing, verifying, basing, ingesting, ogling, resolving, snapshotting, \
+    tuning
 
 parser = argparse.ArgumentParser(description='Launch CESR Verification Service')
 parser.set_defaults(handler=lambda args: launch(args),
@@ -42,29 +41,284 @@ parser.add_argument('--config-file',
                     action='store',
                     default="dkr",
                     help="configuration filename override")
+parser.add_argument('--cache-size',
+                    dest="cacheSize",
+                    action='store',
+                    default=1024,
+                    type=int,
+                    help="maximum number of cached verification responses, 0 disables the cache. Default is 1024.")
+parser.add_argument('--cache-bytes',
+                    dest="cacheBytes",
+                    action='store',
+                    default=64 * 1024 * 1024,
+                    type=int,
+                    help="maximum size in bytes of cached verification responses. Default is 64MiB.")
+parser.add_argument('--contexts',
+                    action='store',
+                    default=4,
+                    type=int,
+                    help="number of verification contexts that may process requests concurrently, reading bodies and "
+                         "serializing responses at once while parsing one at a time. Default is 4.")
+parser.add_argument('--stream-threshold',
+                    dest="streamThreshold",
+                    action='store',
+                    default=ingesting.StreamThreshold,
+                    type=int,
+                    help="Content-Length in bytes above which request bodies are parsed in chunks, as they arrive "
+                         "with --mode asgi, from the body buffered whole by the hio server otherwise. Chunked "
+                         "bodies are always streamed. Default is 1MiB.")
+parser.add_argument('--chunk-size',
+                    dest="chunkSize",
+                    action='store',
+                    default=ingesting.ChunkSize,
+                    type=int,
+                    help="bytes read from streamed request bodies per chunk. Default is 64KiB.")
+parser.add_argument('--max-buffered',
+                    dest="maxBuffered",
+                    action='store',
+                    default=ingesting.MaxBuffered,
+                    type=int,
+                    help="maximum bytes of a streamed request body buffered ahead of the parser. Default is 4MiB.")
+parser.add_argument('--max-queued',
+                    dest="maxQueued",
+                    action='store',
+                    default=admitting.MaxQueued,
+                    type=int,
+                    help="verification requests per worker waiting for a free verification context, or waiting "
+                         "in the hio server, more are shed with 503 and Retry-After, -1 for no limit. Default is 16.")
+parser.add_argument('--max-inflight-bytes',
+                    dest="maxBytes",
+                    action='store',
+                    default=admitting.MaxBytes,
+                    type=int,
+                    help="request body bytes of the verification requests processed at once, more are shed with "
+                         "503 and Retry-After, 0 for no limit. Default is 256MiB.")
+parser.add_argument('--max-body-size',
+                    dest="maxBody",
+                    action='store',
+                    default=admitting.MaxBody,
+                    type=int,
+                    help="largest Content-Length of a verification request, larger are refused with 413, 0 for no "
+                         "limit. Default is 64MiB.")
+parser.add_argument('--workers',
+                    action='store',
+                    default=1,
+                    type=int,
+                    help="number of worker processes sharing the listen port and databases. Default is 1.")
+parser.add_argument('--mode',
+                    action='store',
+                    default="hio",
+                    choices=["hio", "asgi"],
+                    help="serve with the hio HTTP server or with an ASGI server (uvicorn) and async endpoints. "
+                         "Default is hio.")
+parser.add_argument('--chain-cache-size',
+                    dest="chainSize",
+                    action='store',
+                    default=4096,
+                    type=int,
+                    help="maximum number of cached credential validation results, 0 disables. Default is 4096.")
+parser.add_argument('--signers',
+                    action='store',
+                    default=0,
+                    type=int,
+                    help="number of threads verifying the signatures of a request in a batch ahead of parsing, "
+                         "0 disables batching. Default is 0.")
+parser.add_argument('--no-prefilter',
+                    dest="prefilter",
+                    action='store_false',
+                    help="parse every KEL and TEL event even if it has already been accepted.")
+parser.add_argument('--json-backend',
+                    dest="encoder",
+                    action='store',
+                    default="auto",
+                    choices=["auto", "json", "orjson"],
+                    help="JSON encoder of responses, auto uses orjson when installed. Default is auto.")
+parser.add_argument('--fragment-cache-size',
+                    dest="fragments",
+                    action='store',
+                    default=4096,
+                    type=int,
+                    help="maximum number of cached serialized credentials, 0 disables. Default is 4096.")
+parser.add_argument('--revocation-batch',
+                    dest="revocations",
+                    action='store',
+                    default=256,
+                    type=int,
+                    help="maximum revocations processed per second in the background. "
+                         "Default is 256.")
+parser.add_argument('--retention',
+                    action='store',
+                    default=0.0,
+                    type=float,
+                    help="seconds a presentation is kept after the credential was last presented, 0 keeps "
+                         "presentations forever. Default is 0.")
+parser.add_argument('--report-retention',
+                    dest="reportRetention",
+                    action='store',
+                    default=0.0,
+                    type=float,
+                    help="seconds an uploaded report is kept, 0 keeps reports forever. Default is 0.")
+parser.add_argument('--max-report-size',
+                    dest="reportSize",
+                    action='store',
+                    default=512 * 1024 * 1024,
+                    type=int,
+                    help="largest report accepted for upload in bytes. Default is 512MiB.")
+parser.add_argument('--report-workers',
+                    dest="reportWorkers",
+                    action='store',
+                    default=None,
+                    type=int,
+                    help="worker processes verifying the signatures of uploaded reports, 0 verifies them in the "
+                         "serving process. Only the first worker verifies reports. Default is one per core.")
+parser.add_argument('--escrow-budget',
+                    dest="escrowBudget",
+                    action='store',
+                    default=escrowing.Budget,
+                    type=float,
+                    help="seconds per second spent processing the KEL, TEL and credential escrows in the "
+                         "background, 0 disables it. Only the first worker processes escrows. Default is 0.05.")
+parser.add_argument('--db-map-size',
+                    dest="mapSize",
+                    action='store',
+                    default=None,
+                    type=int,
+                    help="initial size in bytes of the memory map of each database. Default is 100MiB.")
+parser.add_argument('--db-no-readahead',
+                    dest="readahead",
+                    action='store_false',
+                    help="disable OS readahead on the databases, for databases larger than memory.")
+parser.add_argument('--db-sync-mode',
+                    dest="syncMode",
+                    action='store',
+                    default="sync",
+                    choices=tuning.SyncModes,
+                    help="flush every commit to disk (sync), all but the meta page (no-meta-sync), or leave it to "
+                         "the OS (async) trading durability of the last commits for write throughput. "
+                         "Default is sync.")
+parser.add_argument('--db-max-readers', '--max-readers',
+                    dest="maxReaders",
+                    action='store',
+                    default=tuning.MaxReaders,
+                    type=int,
+                    help="threads of all workers and report verification processes reading a database at once, "
+                         "raise it above the default with many --workers or --contexts. Default is 126.")
+parser.add_argument('--db-no-grow',
+                    dest="grow",
+                    action='store_false',
+                    help="do not grow the memory maps of the databases before they fill up. Maps are never grown "
+                         "with more than one worker, size them with --db-map-size instead.")
+parser.add_argument('--schema-bundle',
+                    dest="schemaBundle",
+                    action='store',
+                    default=None,
+                    help="directory or file of SAIDified schema documents loaded at startup, only schemas missing "
+                         "from the bundle are resolved from their OOBIs")
+parser.add_argument('--snapshot',
+                    action='store',
+                    default=None,
+                    help="snapshot written by verifier server snapshot to start from when there are no databases yet")
+parser.add_argument('--loglevel',
+                    action='store',
+                    default="INFO",
+                    choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                    help="level of log messages written. Default is INFO.")
+parser.add_argument('--log-levels',
+                    dest="logLevels",
+                    action='store',
+                    default="",
+                    help="per module levels overriding --loglevel, such as keri.core=WARNING,verifier.core.pooling=DEBUG")
+parser.add_argument('--log-format',
+                    dest="logFormat",
+                    action='store',
+                    default="text",
+                    choices=["text", "json"],
+                    help="write log messages as text or as JSON lines. Default is text.")
+parser.add_argument('--log-sample',
+                    dest="logSample",
+                    action='store',
+                    default=0.01,
+                    type=float,
+                    help="fraction of high volume per cue debug messages written. Default is 0.01.")
 
 
 def launch(args):
     """ Launch the verification service.
 
+    With more than one worker the databases are created once in this process, which then forks and
+    supervises the workers.  Each worker opens its own handles on the shared LMDB environments and
+    listens on the same port with SO_REUSEPORT.
+
     Parameters:
         args (Namespace): command line namespace object containing the parsed command line arguments
 
     Returns:
+        list: doers to run
+
+    """
+    tuning.configure(tuning.Settings(mapSize=args.mapSize, readahead=args.readahead, sync=args.syncMode,
+                                     maxReaders=args.maxReaders))
+    if args.snapshot:
+        snapshotting.restore(args.snapshot, name=args.name, base=args.base)
+
+    if args.workers <= 1:
+        return serve(args)
+
+    prime(args)
+
+    def work():
+        try:
+            directing.runController(doers=serve(args, shared=True), expire=0.0)
+        finally:
+            ogling.shutdown()  # workers exit without running atexit handlers
+
+    print(f"CESR Verification Service starting {args.workers} workers on: {args.http}")
+    return [forking.Supervisor(workers=args.workers, run=work)]
+
+
+def prime(args):
+    """ Create the keystore and databases so concurrently started workers only ever open existing ones
+
+    Parameters:
+        args (Namespace): command line namespace object containing the parsed command line arguments
+
+    """
+    hby = openHby(args)
+    reger = tuning.Reger(name=hby.name, temp=hby.temp, db=hby.db)
+    vdb = basing.VerifierBaser(name=hby.name)
+
+    vdb.close()
+    reger.close()
+    hby.close()
+
+
+def openHby(args):
+    """ Open the Habery for the verifier creating it and its keystore when they do not exist yet
+
+    The keystore and key event database are opened with the LMDB settings of tuning.configure.
+
+    Parameters:
+        args (Namespace): command line namespace object containing the parsed command line arguments
+
+    Returns:
+        Habery: opened environment for exposed KERI AIDs
 
     """
     name = args.name
     base = args.base
     bran = args.bran
-    httpPort = args.http
 
     configFile = args.configFile
     configDir = args.configDir
 
-    ks = keeping.Keeper(name=name,
-                        base=base,
-                        temp=False,
-                        reopen=True)
+    ks = tuning.Keeper(name=name,
+                       base=base,
+                       temp=False,
+                       reopen=True)
+    db = tuning.Baser(name=name,
+                      base=base,
+                      temp=False,
+                      reopen=True)
 
     aeid = ks.gbls.get('aeid')
 
@@ -74,32 +328,98 @@ def launch(args):
                             temp=False,
                             reopen=True,
                             clear=False)
-    
-    help.ogler.level = logging.DEBUG
 
     if aeid is None:
-        hby = habbing.Habery(name=name, base=base, bran=bran, cf=cf)
+        hby = habbing.Habery(name=name, base=base, bran=bran, ks=ks, db=db, cf=cf)
     else:
-        hby = existing.setupHby(name=name, base=base, bran=bran)
+        bran = bran.replace("-", "") if bran else bran
+        hby = habbing.Habery(name=name, base=base, bran=bran, ks=ks, db=db, free=True)
+
+    return hby
+
+
+def setupArgs(args, shared=False):
+    """ Returns keyword arguments of verifying.setup from the command line arguments
+
+    Parameters:
+        args (Namespace): command line namespace object containing the parsed command line arguments
+        shared (bool): True means other worker processes share the listen port and databases
+
+    Returns:
+        dict: keyword arguments of verifying.setup other than the app, databases and endpoint module
+
+    """
+    first = forking.worker in (None, 0)  # only the first worker verifies reports and processes escrows
+    return dict(cacheSize=args.cacheSize, cacheBytes=args.cacheBytes, contexts=args.contexts,
+                streamThreshold=args.streamThreshold, chunkSize=args.chunkSize, maxBuffered=args.maxBuffered,
+                shared=shared, prefilter=args.prefilter, chainSize=args.chainSize, signers=args.signers,
+                encoder=args.encoder, fragments=args.fragments, revocations=args.revocations,
+                retention=args.retention, reportRetention=args.reportRetention, grow=args.grow and not shared,
+                reportSize=args.reportSize, reportWorkers=args.reportWorkers, verifyReports=first,
+                maxQueued=args.maxQueued, maxBytes=args.maxBytes, maxBody=args.maxBody,
+                escrowBudget=args.escrowBudget, processEscrows=first)
+
+
+def serve(args, shared=False):
+    """ Set up the verification service in this process
+
+    Parameters:
+        args (Namespace): command line namespace object containing the parsed command line arguments
+        shared (bool): True means other worker processes share the listen port and databases
+
+    Returns:
+        list: doers to run, empty in ASGI mode where the service runs on an asyncio event loop until
+              interrupted before this returns
+
+    """
+    httpPort = args.http
+
+    ogling.configure(level=args.loglevel, levels=ogling.parse(args.logLevels), fmt=args.logFormat,
+                     sample=args.logSample)
+
+    hby = openHby(args)
+    if args.schemaBundle:
+        bundling.preload(hby, args.schemaBundle)
 
     hbyDoer = habbing.HaberyDoer(habery=hby)  # setup doer
-    obl = oobiing.Oobiery(hby=hby)
+    obl = oobiing.Oobiery(hby=hby)  # resolves the schema OOBIs in the background, see /ready
+    retrier = resolving.Retrier(hby=hby)
 
-    reger = viring.Reger(name=hby.name, temp=hby.temp)
+    reger = tuning.Reger(name=hby.name, temp=hby.temp, db=hby.db)
     vdb = basing.VerifierBaser(name=hby.name)
 
-    app = falcon.App(
-        middleware=falcon.CORSMiddleware(
-            allow_origins='*',
-            allow_credentials='*',
-            expose_headers=['cesr-attachment', 'cesr-date', 'content-type']))
+    middleware = falcon.CORSMiddleware(
+        allow_origins='*',
+        allow_credentials='*',
+        expose_headers=['cesr-attachment', 'cesr-date', 'content-type', 'x-request-id'])
+
+    if args.mode == "asgi":
+        app = falcon.asgi.App(middleware=middleware)
+        pool = verifying.setup(app, hby=hby, vdb=vdb, reger=reger, ends=asyncing, **setupArgs(args, shared=shared))
 
-    server = http.Server(port=httpPort, app=app)
+        print(f"CESR Verification Service running ASGI and listening on: {httpPort}")
+        serving.run(app, doers=obl.doers + [hbyDoer, retrier] + pool.doers, port=httpPort, shared=shared)
+        return []
+
+    app = falcon.App(middleware=middleware)
+
+    # refuse oversized bodies before the hio server buffers them whole
+    limits = {(method, route): args.maxBody for route, methods in admitting.Routes.items() for method in methods}
+    limits[("POST", "/v1/cesr-verifier/reports/{aid}/{dig}")] = args.reportSize
+    if shared:
+        servant = forking.ReusePortServer(ha=("", httpPort), tymeout=http.Server.Tymeout)
+        server = admitting.Server(port=httpPort, app=app, servant=servant, limits=limits)
+    else:
+        server = admitting.Server(port=httpPort, app=app, limits=limits)
     httpServerDoer = http.ServerDoer(server=server)
 
-    verifying.setup(app, hby=hby, vdb=vdb, reger=reger)
+    pool = verifying.setup(app, hby=hby, vdb=vdb, reger=reger, backlog=server.backlog,
+                           **setupArgs(args, shared=shared))
+    pool.meter.counter("verifier_refused_requests_total",
+                       "Requests refused with 413 by the hio server before their body was buffered",
+                       lambda: server.oversized)
 
-    doers = obl.doers + [hbyDoer, httpServerDoer]
+    doers = obl.doers + [hbyDoer, retrier, httpServerDoer] + pool.doers
 
 
     print(f"CESR Verification Service running and listening on: {httpPort}")
@@ -6,10 +6,8 @@ Command line runner for app
 
 """
 import multicommand
-import logging
 from keri import help
 
-help.ogler.level = logging.DEBUG
 help.ogler.reopen(name="verifer", temp=True, clear=True)
 
 from keri.app import directing
@@ -0,0 +1,198 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.app.forking module
+
+Pre-fork worker processes that share one listen port
+"""
+import os
+import signal
+import socket
+import sys
+import time
+
+from hio.base import doing
+from hio.core import tcp
+from keri import help
+
+logger = help.ogler.getLogger()
+
+worker = None  # index of this worker process, None when not running as a worker of a Supervisor
+
+
+class ReusePortServer(tcp.Server):
+    """ Nonblocking TCP server whose listen socket sets SO_REUSEPORT
+
+    Several worker processes can each open one of these on the same port and the kernel load balances
+    incoming connections between them.
+
+    """
+
+    def open(self):
+        """ Opens, binds and listens on socket in non blocking mode with SO_REUSEADDR and SO_REUSEPORT set """
+        self.ss = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        # Linux TCP allocates twice the requested size
+        bs = 2 * self.bs if sys.platform.startswith('linux') else self.bs
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) < bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.bs)
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.bs)
+
+        self.ss.setblocking(0)
+
+        try:
+            self.ss.bind(self.ha)
+            self.ss.listen(self.bl)
+        except OSError as ex:
+            self.close()
+            logger.error("Error binding server listen socket.\n%s\n", ex)
+            return False
+
+        self.ha = self.ss.getsockname()
+        self.opened = True
+        return True
+
+
+class Supervisor(doing.Doer):
+    """ Doer that forks worker processes and keeps them running
+
+    Each worker calls run() in a freshly forked child and exits when it returns.  Workers that die are
+    restarted after .backoff seconds, doubled for each restart within .MinUptime of the previous start.
+    On SIGTERM or when the doer is stopped all workers are sent SIGTERM and reaped, and any that have
+    not exited after .grace seconds are killed.
+
+    Attributes:
+        workers (int): number of worker processes to keep running
+        pids (dict): worker index keyed by pid of running workers
+        restarts (int): number of times a worker has been restarted
+
+    """
+
+    MinUptime = 10.0  # seconds a worker must stay up for its restart delay to reset
+
+    def __init__(self, workers, run, backoff=1.0, grace=10.0, **kwa):
+        """ Create worker supervisor
+
+        Parameters:
+            workers (int): number of worker processes to keep running
+            run (Callable): called with no arguments in each worker process to run the service
+            backoff (float): seconds to wait before restarting a worker that died
+            grace (float): seconds to wait for workers to exit on shutdown before killing them
+
+        """
+        self.workers = workers
+        self.run = run
+        self.backoff = backoff
+        self.grace = grace
+        self.pids = dict()
+        self.starts = dict()  # worker index to (time of last start, current restart delay)
+        self.pending = dict()  # worker index to time at which to restart it
+        self.restarts = 0
+        self.stopping = False
+        super(Supervisor, self).__init__(**kwa)
+
+    def enter(self, *, temp=None):
+        signal.signal(signal.SIGTERM, self.terminate)
+        for idx in range(self.workers):
+            self.spawn(idx)
+
+    def recur(self, tyme):
+        if self.stopping:
+            return True
+
+        self.reap()
+
+        now = time.monotonic()
+        for idx, when in list(self.pending.items()):
+            if now >= when:
+                del self.pending[idx]
+                self.spawn(idx)
+                self.restarts += 1
+
+        return False
+
+    def exit(self):
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.grace
+        while self.pids and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+
+        for pid in list(self.pids):
+            logger.error("Worker %s did not exit after %s seconds, killing", pid, self.grace)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            del self.pids[pid]
+
+    def terminate(self, signum, frame):
+        """ SIGTERM handler that stops the supervisor on its next recur """
+        self.stopping = True
+
+    def spawn(self, idx):
+        """ Fork worker process with index idx """
+        _, delay = self.starts.get(idx, (None, self.backoff))
+        self.starts[idx] = (time.monotonic(), delay)
+
+        pid = os.fork()
+        if pid == 0:  # worker
+            global worker
+            worker = idx
+            signal.signal(signal.SIGTERM, interrupt)
+            code = 0
+            try:
+                self.run()
+            except KeyboardInterrupt:
+                pass
+            except Exception as ex:
+                logger.exception("Worker %s failed: %s", idx, ex)
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+
+        self.pids[pid] = idx
+        print(f"Started verification worker {idx} with pid {pid}")
+
+    def reap(self):
+        """ Collect exited workers and schedule restarts for them unless stopping """
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.pids.clear()
+                return
+
+            if pid == 0:
+                return
+
+            idx = self.pids.pop(pid, None)
+            if idx is None or self.stopping:
+                continue
+
+            now = time.monotonic()
+            last, delay = self.starts[idx]
+            if now - last >= self.MinUptime:
+                delay = self.backoff
+
+            logger.error("Worker %s with pid %s exited with status %s, restarting in %s seconds",
+                         idx, pid, os.waitstatus_to_exitcode(status), delay)
+            self.pending[idx] = now + delay
+            self.starts[idx] = (last, delay * 2)
+
+
+def interrupt(signum, frame):
+    """ SIGTERM handler for workers that unwinds the running doers like Ctrl-C """
+    raise KeyboardInterrupt
@@ -0,0 +1,87 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.app.serving module
+
+ASGI serving of the verifier app on an asyncio event loop with the hio doers running alongside
+"""
+import asyncio
+import socket
+
+from hio.base import doing
+
+Tock = 0.03125  # seconds between runs of the hio doers, same as keri.app.directing.runController
+
+
+def run(app, doers, port, shared=False, tock=Tock):
+    """ Serve falcon.asgi app with uvicorn on port until interrupted while running doers alongside
+
+    Requires the optional uvicorn dependency, installed with the asgi extra.
+
+    Parameters:
+        app (falcon.asgi.App): ASGI app to serve
+        doers (list): hio doers, such as OOBI resolution, to run on the same event loop
+        port (int): TCP port to listen on
+        shared (bool): True means other worker processes listen on the same port with SO_REUSEPORT
+        tock (float): seconds between runs of the doers
+
+    """
+    try:
+        import uvicorn
+    except ImportError as ex:
+        raise ValueError("ASGI mode requires uvicorn, install with pip install 'cesr-verifier[asgi]'") from ex
+
+    config = uvicorn.Config(app, host="0.0.0.0", port=port, lifespan="off")
+    server = uvicorn.Server(config)
+    sockets = [listen(port)] if shared else None
+
+    asyncio.run(serve(server, doers, sockets=sockets, tock=tock))
+
+
+async def serve(server, doers, sockets=None, tock=Tock):
+    """ Run uvicorn server until it exits while driving doers from the same event loop
+
+    Parameters:
+        server (uvicorn.Server): configured ASGI server
+        doers (list): hio doers to run alongside the server
+        sockets (list): optional already listening sockets for the server to accept on
+        tock (float): seconds between runs of the doers
+
+    """
+    doist = doing.Doist(tock=tock, real=False, doers=doers)
+    ticker = asyncio.create_task(drive(doist))
+    try:
+        await server.serve(sockets=sockets)
+    finally:
+        ticker.cancel()
+        try:
+            await ticker
+        except asyncio.CancelledError:
+            pass
+
+
+async def drive(doist):
+    """ Run doist one recur every doist.tock seconds until all its doers are done or it is cancelled
+
+    hio clients and servers use nonblocking sockets, so each recur only does the I/O that is ready and
+    the event loop stays free for requests in between.
+
+    """
+    doist.enter()
+    try:
+        while doist.deeds:
+            doist.recur()
+            await asyncio.sleep(doist.tock)
+    finally:
+        doist.exit()
+
+
+def listen(port):
+    """ Returns nonblocking TCP socket listening on port with SO_REUSEADDR and SO_REUSEPORT set """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("", port))
+    sock.listen(socket.SOMAXCONN)
+    sock.setblocking(False)
+    return sock
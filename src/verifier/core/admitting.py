@@ -0,0 +1,260 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.admitting module
+
+Admission control of verification requests so overload is shed early instead of queued
+"""
+import json
+import re
+import threading
+
+import falcon
+from hio.core import http
+
+MaxQueued = 16  # verification requests waiting for a free verification context
+MaxBytes = 256 * 1024 * 1024  # request body bytes of the verification requests processed at once
+MaxBody = 64 * 1024 * 1024  # largest Content-Length of a verification request
+RetryAfter = 1  # seconds clients are asked to wait before retrying a request shed with 503
+
+# endpoints admission applies to, by route template, and the methods that verify a request body
+Routes = {
+    "/v1/cesr-verifier/verifier": ("POST",),
+    "/v1/cesr-verifier/verifier/batch": ("POST",),
+    "/v1/cesr-verifier/presentations/{said}": ("PUT",),
+}
+
+
+class BodySizeError(ValueError):
+    """ Raised when a request body read turns out larger than the largest body accepted """
+
+
+class Admitter:
+    """ Bounds the verifications in flight and request body bytes processed at once
+
+    Verifications wait for a free context of the pool, so the load is the larger of the verification
+    requests admitted and not yet answered and the verifications .load reports in flight in the pool,
+    running or waiting for a context.  Once .limit verifications are in flight, the contexts of the pool
+    plus a bounded queue, a new request is shed instead of waiting behind the others, so the requests
+    admitted keep the latency of an unloaded service.  Every verification request also holds its
+    Content-Length in bytes from admission until its response, bodies of unknown length, sent with chunked
+    transfer encoding, hold .unknown bytes, the most of them buffered ahead of the parser.  A single
+    request is always admitted when nothing else is in flight, so no request within .maxBody can be shed
+    forever.
+
+    The limits apply per process, each worker started with --workers admits requests on its own.  Only
+    the ASGI server verifies requests concurrently, the hio server answers one request at a time and the
+    requests it has received and not yet answered wait in the server instead, so there .load reports the
+    backlog of the Server and .limit bounds it.
+
+    Attributes:
+        active (int): verification requests admitted and not yet answered
+        bytes (int): request body bytes held by the requests admitted
+        rejected (int): requests shed because the limits were reached
+        oversized (int): requests refused because their Content-Length exceeded .maxBody
+
+    """
+
+    def __init__(self, limit=0, maxBytes=MaxBytes, maxBody=MaxBody, unknown=0, load=None):
+        """ Create admitter
+
+        Parameters:
+            limit (int): verifications in flight before more requests are shed, 0 for no limit
+            maxBytes (int): request body bytes of the requests processed at once, 0 for no limit
+            maxBody (int): largest Content-Length accepted, 0 for no limit
+            unknown (int): bytes held by a body of unknown length
+            load (Callable): returns the verifications in flight in the pool or waiting in the server, None to
+                             count admitted requests only
+
+        """
+        self.limit = limit
+        self.maxBytes = maxBytes
+        self.maxBody = maxBody
+        self.unknown = unknown
+        self.load = load
+        self.active = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.oversized = 0
+        self.lock = threading.Lock()
+
+    def oversize(self, length):
+        """ Returns True if Content-Length length is above .maxBody """
+        if self.maxBody > 0 and length is not None and length > self.maxBody:
+            self.oversized += 1
+            return True
+
+        return False
+
+    def inflight(self):
+        """ Returns number of verifications in flight, admitted requests or verifications in the pool """
+        return max(self.active, self.load()) if self.load is not None else self.active
+
+    def admit(self, length):
+        """ Admit a request with Content-Length length, None when unknown
+
+        Returns:
+            int: bytes held by the request to pass to .release, None if it was not admitted
+
+        """
+        size = length if length is not None else self.unknown
+        with self.lock:
+            inflight = self.inflight()
+            if inflight > 0:
+                if 0 < self.limit <= inflight or 0 < self.maxBytes < self.bytes + size:
+                    self.rejected += 1
+                    return None
+
+            self.active += 1
+            self.bytes += size
+            return size
+
+    def release(self, size):
+        """ Release the slot and the size bytes held by an admitted request """
+        with self.lock:
+            self.active -= 1
+            self.bytes -= size
+
+
+class AdmissionMiddleware:
+    """ Falcon middleware admitting verification requests through an Admitter before they are processed
+
+    Only requests to the verification endpoints in .routes are subject to admission.  Requests whose
+    Content-Length is above the maximum are refused with 413 and requests that do not fit within the limits
+    are shed with 503 and a Retry-After header, both before any of their body is read.  Works with both
+    falcon.App and falcon.asgi.App.
+
+    """
+
+    def __init__(self, admitter, routes=None, retryAfter=RetryAfter):
+        """ Create admission middleware
+
+        Parameters:
+            admitter (Admitter): limits requests are admitted within
+            routes (dict): methods subject to admission keyed by route template, Routes when None
+            retryAfter (int): seconds sent in the Retry-After header of requests shed
+
+        """
+        self.admitter = admitter
+        self.routes = routes if routes is not None else Routes
+        self.retryAfter = retryAfter
+
+    def process_resource(self, req, rep, resource, params):
+        if req.method not in self.routes.get(req.uri_template, ()):
+            return
+
+        length = req.content_length
+        if self.admitter.oversize(length):
+            rep.status = falcon.HTTP_413
+            rep.content_type = "application/json"
+            rep.data = json.dumps(dict(msg=f"request body of {length} bytes is larger than the maximum of "
+                                           f"{self.admitter.maxBody} bytes")).encode("utf-8")
+            rep.complete = True
+            return
+
+        size = self.admitter.admit(length)
+        if size is None:
+            rep.status = falcon.HTTP_503
+            rep.content_type = "application/json"
+            rep.set_header("Retry-After", str(self.retryAfter))
+            rep.data = json.dumps(dict(msg="too many verifications in progress, retry later")).encode("utf-8")
+            rep.complete = True
+            return
+
+        req.context.admitted = size
+
+    def process_response(self, req, rep, resource, req_succeeded):
+        size = req.context.get("admitted")
+        if size is not None:
+            req.context.admitted = None
+            self.admitter.release(size)
+
+    async def process_resource_async(self, req, rep, resource, params):
+        self.process_resource(req, rep, resource, params)
+
+    async def process_response_async(self, req, rep, resource, req_succeeded):
+        self.process_response(req, rep, resource, req_succeeded)
+
+
+class Server(http.Server):
+    """ hio HTTP WSGI server that refuses oversized request bodies before buffering them
+
+    The hio server receives and dechunks every request body whole before the app sees the request, so a
+    request to a route in .limits whose Content-Length, or whose body received so far, is larger than the
+    limit of the route is answered with 413 and its connection closed as soon as its head is parsed,
+    instead of being buffered first.  Requests whose body arrives along with their head are left to the app.
+
+    The server parses the requests of all its connections as they arrive and answers them one at a time,
+    so under load requests wait in the server rather than in the pool of verification contexts.  .backlog
+    counts them for the .load of an Admitter.
+
+    Attributes:
+        oversized (int): requests refused because their body was larger than the limit of their route
+
+    """
+
+    def __init__(self, limits=None, **kwa):
+        """ Create server, see http.Server for the other parameters
+
+        Parameters:
+            limits (dict): largest request body in bytes, 0 for no limit, keyed by (method, route template)
+
+        """
+        super(Server, self).__init__(**kwa)
+        self.limits = [(method, re.compile(re.sub(r"\{[^/}]+\}", "[^/]+", route) + "$"), size)
+                       for (method, route), size in (limits or {}).items()]
+        self.refused = set()  # connection addresses of refused requests waiting for their 413 to be sent
+        self.oversized = 0
+
+    def limit(self, method, path):
+        """ Returns largest request body of method on path in bytes, 0 for no limit """
+        for meth, route, size in self.limits:
+            if meth == method and route.match(path):
+                return size
+
+        return 0
+
+    def serviceReqs(self):
+        """ Service pending requestants and refuse the ones whose body is larger than the limit of their route """
+        for ca in list(self.refused):
+            ix = self.servant.ixes.get(ca)
+            if ix is None or not ix.txbs:
+                self.refused.discard(ca)
+                if ix is not None:
+                    self.closeConnection(ca)
+
+        super(Server, self).serviceReqs()
+
+        for ca, requestant in list(self.reqs.items()):
+            if ca in self.refused or not requestant.headed or requestant.ended:
+                continue
+
+            size = self.limit(requestant.method, requestant.path)
+            if 0 < size < max(requestant.length or 0, len(requestant.body) + len(requestant.msg)):
+                self.refuse(ca, requestant, size)
+
+    def refuse(self, ca, requestant, size):
+        """ Stop parsing the request of connection ca and answer it with 413, the connection is closed once sent """
+        requestant.parser.close()
+        requestant.parser = None
+        body = json.dumps(dict(msg=f"request body larger than the maximum of {size} bytes")).encode("utf-8")
+        head = (f"HTTP/1.1 {falcon.HTTP_413}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n")
+        requestant.remoter.tx(head.encode("ascii") + body)
+        self.refused.add(ca)
+        self.oversized += 1
+
+    def backlog(self):
+        """ Returns the requests received, or being received, and not yet answered other than the one being
+        answered, called from the app while it answers a request
+        """
+        waiting = 0
+        for ca, requestant in self.reqs.items():
+            if not requestant.headed or ca in self.refused:
+                continue
+
+            responder = self.reps.get(ca)
+            if not requestant.ended or responder is None or not responder.ended:
+                waiting += 1
+
+        return max(waiting - 1, 0)
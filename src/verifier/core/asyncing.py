@@ -0,0 +1,296 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.asyncing module
+
+Async versions of the verifying endpoints for falcon.asgi apps
+
+Request bodies are read without blocking the event loop and every parse runs on the executor of the
+context pool, so a slow verification never holds up other requests such as /health.  Pass this module
+as ends to verifying.setup or verifying.loadEnds to register these endpoints.
+"""
+import asyncio
+import contextvars
+import json
+
+import falcon
+
+from verifier.core import admitting, caching, ingesting, pooling, reporting, tuning, verifying
+
+
+async def chunks(req, reader):
+    """ Async generator yielding the body of request req in chunks of at most reader.chunkSize bytes """
+    while True:
+        chunk = await req.stream.read(reader.chunkSize)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def read(req):
+    """ Async version of ingesting.BodyReader.read reading the body into one bytearray of its Content-Length """
+    buf = bytearray(req.content_length or 0)
+    pos = 0
+    async for chunk in req.stream:
+        buf[pos:pos + len(chunk)] = chunk  # grows buf past the Content-Length for chunked bodies
+        pos += len(chunk)
+    del buf[pos:]
+    return buf
+
+
+async def verify(pool, ims):
+    """ Verify CESR stream ims on the executor of pool
+
+    Returns:
+        tuple: (creders, revoked) as returned by VerificationContext.verify
+
+    """
+    return await asyncio.wrap_future(pool.submit(pooling.VerificationContext.verify, ims))
+
+
+async def ingest(pool, chunks, limit=ingesting.MaxBuffered):
+    """ Verify CESR stream incrementally as its chunks arrive from async iterable chunks
+
+    A context is checked out of pool for the whole stream while each chunk is parsed on the executor of
+    the pool, so the event loop only ever waits for bytes or results.
+
+    Returns:
+        tuple: (creders, revoked) as returned by VerificationContext.verify
+
+    Raises:
+        BufferLimitError: if more than limit bytes are buffered ahead of the parser
+
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # run_in_executor does not carry the request correlation ID over
+    ctx = await loop.run_in_executor(None, pool.checkout)  # not on pool.executor, its threads feed holders
+    try:
+        ingester = await loop.run_in_executor(pool.executor, context.run, ctx.ingester, limit)
+        async for chunk in chunks:
+            await loop.run_in_executor(pool.executor, context.run, ctx.feed, ingester, chunk)
+
+        return await loop.run_in_executor(pool.executor, context.run, ctx.finish, ingester)
+    finally:
+        pool.checkin(ctx)
+
+
+class VerifierResourceEndpoint(verifying.VerifierResourceEndpoint):
+    """ Async CESR verifier resource endpoint class """
+
+    async def on_post(self, req, rep):
+        """  CESR verifier resource POST Method, see verifying.VerifierResourceEndpoint.on_post """
+        rep.content_type = "application/json"
+
+        try:
+            if req.content_type not in ("application/json+cesr",):
+                rep.status = falcon.HTTP_BAD_REQUEST
+                rep.data = json.dumps(dict(msg=f"Invalid request content-type={req.content_type}")).encode(
+                    "utf-8")
+                return
+
+            dig = None
+            if self.reader.streamed(req):  # large bodies are parsed as they arrive and bypass the cache
+                creders, revoked = await ingest(self.pool, chunks(req, self.reader), limit=self.reader.limit)
+            else:
+                with self.pool.meter.timer("read"):
+                    ims = await read(req)
+
+                if self.cache is not None:
+                    dig = self.cache.digest(ims)
+                    data = self.cache.get(dig)
+                    if data is not None:
+                        rep.status = falcon.HTTP_200
+                        rep.data = data
+                        return
+
+                creders, revoked = await verify(self.pool, ims)
+
+            self.respond(rep, creders, revoked, dig=dig)
+
+        except ingesting.BufferLimitError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"CESR verification failed: {ex}")).encode("utf-8")
+
+        except Exception as ex:
+            rep.status = falcon.HTTP_BAD_REQUEST
+            rep.data = json.dumps(dict(msg=f"CESR verification failed: {ex}")).encode("utf-8")
+
+
+class BatchResourceEndpoint(verifying.BatchResourceEndpoint):
+    """ Async CESR batch verifier resource endpoint class """
+
+    async def items(self, req):
+        """ Async version of verifying.BatchResourceEndpoint.items """
+        items = []
+        if req.content_type.startswith("multipart/"):
+            idx = size = 0
+            async for part in await req.get_media():
+                data = await part.get_data()
+                size = self.bound(size + len(data))
+                items.append((part.name if part.name else idx, data))
+                idx += 1
+            return items
+
+        data = await req.stream.read(self.maxBody + 1) if self.maxBody > 0 else await req.stream.read()
+        self.bound(len(data))
+        return verifying.BatchResourceEndpoint.lines(data)
+
+    async def on_post(self, req, rep):
+        """  CESR batch verifier resource POST Method, see verifying.BatchResourceEndpoint.on_post """
+        rep.content_type = "application/json"
+
+        if not self.accepts(req, rep):
+            return
+
+        try:
+            with self.pool.meter.timer("read"):
+                items = await self.items(req)
+        except admitting.BodySizeError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"CESR batch verification failed: {ex}")).encode("utf-8")
+            return
+        except Exception as ex:
+            rep.status = falcon.HTTP_BAD_REQUEST
+            rep.data = json.dumps(dict(msg=f"CESR batch verification failed: {ex}")).encode("utf-8")
+            return
+
+        if not self.admits(items, rep):
+            return
+
+        streams = [ims for _, ims in items if not isinstance(ims, Exception)]
+        verified, revoked = await asyncio.wrap_future(self.pool.submit(pooling.VerificationContext.batch, streams))
+        self.respond(rep, items, verified, revoked)
+
+
+class PresentationResourceEndpoint(verifying.PresentationResourceEndpoint):
+    """ Async credential presentation resource endpoint class """
+
+    async def on_get(self, req, rep, said):
+        super(PresentationResourceEndpoint, self).on_get(req, rep, said)
+
+    async def on_put(self, req, rep, said):
+        """  Credential Presentation Resource PUT Method, see verifying.PresentationResourceEndpoint.on_put """
+        rep.content_type = "application/json"
+
+        if not self.accepts(req, rep):
+            return
+
+        if self.unchanged(req, rep, said):
+            return
+
+        dig = None
+        try:
+            if self.reader.streamed(req):
+                creders, revoked = await ingest(self.pool, chunks(req, self.reader), limit=self.reader.limit)
+            else:
+                with self.pool.meter.timer("read"):
+                    ims = await read(req)
+
+                dig = caching.ResultCache.digest(ims) if ims else None
+                if dig is not None and self.known(rep, said, dig):
+                    return
+
+                creders, revoked = await verify(self.pool, ims)
+
+        except ingesting.BufferLimitError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"credential {said} presentation failed: {ex}")).encode("utf-8")
+            return
+
+        self.present(rep, said, creders, revoked, dig=dig)
+
+
+class ReportResourceEndpoint(verifying.ReportResourceEndpoint):
+    """ Async report resource endpoint class """
+
+    async def on_get(self, req, rep, aid, dig):
+        super(ReportResourceEndpoint, self).on_get(req, rep, aid, dig)
+
+    async def on_post(self, req, rep, aid, dig):
+        """  Report Resource POST Method, see verifying.ReportResourceEndpoint.on_post """
+        rep.content_type = "application/json"
+        if self.known(rep, dig) or self.oversized(req, rep, dig):
+            return
+
+        try:
+            if req.content_type is not None and req.content_type.startswith("multipart/"):
+                async for part in await req.get_media():
+                    if part.filename is not None:
+                        stats = await self.store(aid, dig, part.stream, part.filename, part.content_type)
+                        break
+                else:
+                    raise ValueError("no file part in multipart form")
+            else:
+                stats = await self.store(aid, dig, req.stream, req.get_param("filename"), req.content_type)
+
+        except reporting.ReportSizeError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"report {dig} upload failed: {ex}")).encode("utf-8")
+            return
+
+        except (ValueError, falcon.MediaMalformedError) as ex:
+            rep.status = falcon.HTTP_BAD_REQUEST
+            rep.data = json.dumps(dict(msg=f"report {dig} upload failed: {ex}")).encode("utf-8")
+            return
+
+        self.accepted(rep, dig, stats)
+
+    async def store(self, aid, dig, stream, filename, contentType):
+        """ Async version of verifying.ReportResourceEndpoint.store, digesting and writing to the database on
+        the default executor through tuning.gate so the event loop keeps serving other requests
+        """
+        loop = asyncio.get_running_loop()
+        upload = self.filer.upload(aid, dig, filename=filename, contentType=contentType)
+        try:
+            while True:
+                chunk = await stream.read(self.filer.chunkSize)
+                if not chunk:
+                    break
+                await loop.run_in_executor(None, tuning.gate.run, upload.write, chunk)
+        except Exception:
+            upload.abort()
+            raise
+
+        return await loop.run_in_executor(None, tuning.gate.run, upload.finish)
+
+
+class ReportsResourceEndpoint(verifying.ReportsResourceEndpoint):
+    """ Async reports collection resource endpoint class """
+
+    async def on_get(self, req, rep, aid):
+        super(ReportsResourceEndpoint, self).on_get(req, rep, aid)
+
+
+class CacheResourceEndpoint(verifying.CacheResourceEndpoint):
+    """ Async verification result cache resource endpoint class """
+
+    async def on_get(self, req, rep):
+        super(CacheResourceEndpoint, self).on_get(req, rep)
+
+
+class PrefilterResourceEndpoint(verifying.PrefilterResourceEndpoint):
+    """ Async prefilter counters resource endpoint class """
+
+    async def on_get(self, req, rep):
+        super(PrefilterResourceEndpoint, self).on_get(req, rep)
+
+
+class MetricsEndpoint(verifying.MetricsEndpoint):
+    """ Async metrics resource endpoint class """
+
+    async def on_get(self, req, rep):
+        super(MetricsEndpoint, self).on_get(req, rep)
+
+
+class ReadyEndpoint(verifying.ReadyEndpoint):
+    """ Async readiness resource endpoint class """
+
+    async def on_get(self, req, rep):
+        super(ReadyEndpoint, self).on_get(req, rep)
+
+
+class HealthEndpoint(verifying.HealthEndpoint):
+    """ Async health endpoint class """
+
+    async def on_get(self, req, rep):
+        super(HealthEndpoint, self).on_get(req, rep)
@@ -8,9 +8,11 @@ Database support
 from dataclasses import dataclass
 
 from keri.core import coring
-from keri.db import dbing, subing, koming
+from keri.db import subing, koming
 from keri.db.subing import CesrIoSetSuber
 
+from verifier.core import tuning
+
 
 @dataclass
 class ReportStats:
@@ -22,9 +24,22 @@ class ReportStats:
     contentType: str = None
     size: int = 0
     message: str = ""
+    date: str = None
+    files: list = None
+
+
+@dataclass
+class PresentationRecord:
+    """ Credential presentation status dataclass, everything a status lookup answers with in one read """
 
+    issuer: str = None
+    registry: str = None
+    schema: str = None
+    date: str = None
+    revoked: str = None
 
-class VerifierBaser(dbing.LMDBer):
+
+class VerifierBaser(tuning.Tuned):
     """
     VerifierBaser stores credential presentations, successful verifications and revocations alongside holder AIDs
 
@@ -48,6 +63,12 @@ class VerifierBaser(dbing.LMDBer):
 
         self.accts = None
 
+        # Digest of the request body of the last accepted presentation of each credential
+        self.digs = None
+
+        # Komer instance of PresentationRecord data class, keyed by credential SAID
+        self.pres = None
+
         # Report database linking AID of uploader to SAID of uploaded report
         self.rpts = None
 
@@ -83,6 +104,14 @@ class VerifierBaser(dbing.LMDBer):
         # presentations with resolved credentials are granted access
         self.accts = subing.CesrSuber(db=self, subkey='accts', klas=coring.Saider)
 
+        # request body digest of the last accepted presentation of each credential, keyed by credential SAID
+        self.digs = subing.CesrSuber(db=self, subkey='digs.', klas=coring.Diger)
+
+        # issuer, presentation and revocation status of each presented credential, keyed by credential SAID
+        self.pres = koming.Komer(db=self,
+                                 subkey='pres.',
+                                 schema=PresentationRecord)
+
         # Report database linking AID of uploader to DIG of uploaded report
         self.rpts = CesrIoSetSuber(db=self, subkey='rpts.', klas=coring.Diger)
 
@@ -98,3 +127,26 @@ class VerifierBaser(dbing.LMDBer):
                                   schema=ReportStats)
 
         return self.env
+
+    def getKeysAfter(self, db, key=b"", limit=256):
+        """ Returns list of up to limit keys of db in order, starting after key or at the first key when empty
+
+        Lets background doers walk a sub-db a bounded batch at a time, resuming after the last key they saw.
+
+        Parameters:
+            db (lmdb._Database): named sub db to read the keys of
+            key (bytes): key to start after, empty to start at the beginning
+            limit (int): maximum number of keys returned
+
+        """
+        keys = []
+        with self.env.begin(db=db) as txn:
+            cursor = txn.cursor()
+            found = cursor.set_range(key) if key else cursor.first()
+            if found and key and cursor.key() == key:
+                found = cursor.next()
+            while found and len(keys) < limit:
+                keys.append(bytes(cursor.key()))
+                found = cursor.next()
+
+        return keys
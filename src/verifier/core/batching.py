@@ -0,0 +1,237 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.batching module
+
+Verification of the Ed25519 signatures of a CESR stream in one concurrent batch ahead of parsing
+"""
+import json
+import threading
+from concurrent import futures
+from contextlib import contextmanager
+
+from keri import kering
+from keri.core import coring, serdering
+
+from verifier.core import filtering
+
+Ed25519 = coring.Verfer._ed25519  # single signature verification of keri, used for the batch
+_local = threading.local()  # .memo is the batch results of the stream parsed by this thread
+
+
+class Verfer(coring.Verfer):
+    """ Verfer that answers Ed25519 verifications from the batch results of this thread when it can """
+
+    def verify(self, sig, ser):
+        memo = getattr(_local, "memo", None)
+        if memo is not None:
+            hit = memo.get((bytes(sig), bytes(self.raw)))
+            if hit is not None and hit[0] == ser:
+                return hit[1]
+
+        return super(Verfer, self).verify(sig, ser)
+
+
+class SerderKERI(serdering.SerderKERI):
+    """ KERI event whose keys are Verfers answering from the batch results of this thread """
+
+    @property
+    def verfers(self):
+        keys = self._sad.get("k")
+        return [Verfer(qb64=key) for key in keys] if keys is not None else None
+
+
+def batched(verfers):
+    """ Returns list of verfers as Verfers answering from the batch results of this thread """
+    return [verfer if isinstance(verfer, Verfer) else Verfer(qb64b=verfer.qb64b) for verfer in verfers]
+
+
+class BatchVerifier:
+    """ Verifies the Ed25519 signatures of a stream together before the stream is parsed
+
+    libsodium has no batch verification, so the batch is verified by a thread pool instead.  The
+    signatures are checked one by one, which also pins every failure on its signature, but concurrently,
+    since libsodium runs without the GIL.  The results are memoized for the thread that parses the
+    stream, so the Kevery it is attached to, see .attach, finds each signature already verified on the
+    second pass and only accepts events.  Nothing outside the Keverys attached is changed, other Verfers
+    keep verifying one signature at a time.
+
+    Only signatures whose key can be found ahead of parsing and whose Verfer the attached Kevery is handed
+    are collected: controller indexed signatures on KEL events, using the keys of the establishment events
+    earlier in the stream or else the accepted key state, and non-transferable receipt couples on KEL
+    events.  Everything else, such as witness indexed signatures whose Verfers keripy creates while
+    validating, is verified while parsing as before.
+
+    Attributes:
+        signatures (int): number of signatures verified in batches
+        failures (int): number of those signatures that did not verify
+        batches (int): number of batches verified
+
+    """
+
+    def __init__(self, db, workers=4):
+        """ Create batch signature verifier
+
+        Parameters:
+            db (Baser): database of accepted key state
+            workers (int): number of threads verifying signatures concurrently
+
+        """
+        self.db = db
+        self.executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="signer")
+        self.signatures = 0
+        self.failures = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def attach(self, kvy):
+        """ Make the KEL events and receipt couples processed by Kevery kvy verify from the batch results
+
+        The controller signatures of an event are verified with the keys of the event itself for
+        establishment events and with the keys of the key state otherwise, and receipt couples with the
+        Verfers they carry, so those are replaced by Verfers answering from the batch results before
+        kvy processes them.
+
+        """
+        processEvent = kvy.processEvent
+        processReceiptCouples = kvy.processReceiptCouples
+
+        def process(serder, sigers, **kwa):
+            if type(serder) is serdering.SerderKERI:
+                serder.__class__ = SerderKERI
+            kever = kvy.kevers.get(serder.pre)
+            if kever is not None:
+                kever.verfers = batched(kever.verfers)
+            return processEvent(serder, sigers, **kwa)
+
+        def receipts(serder, cigars, **kwa):
+            for cigar in cigars:
+                cigar.verfer = batched([cigar.verfer])[0]
+            return processReceiptCouples(serder, cigars, **kwa)
+
+        kvy.processEvent = process
+        kvy.processReceiptCouples = receipts
+
+    def collect(self, frames):
+        """ Returns list of (sig, ser, key) of the Ed25519 signatures of frames whose key is known
+
+        Parameters:
+            frames (Iterable): Frame of each message in stream order
+
+        """
+        states = dict()  # prefix to keys as of the last establishment event seen
+        sigs = []
+        for frame in frames:
+            if frame.proto != "KERI" or not frame.size:
+                continue
+
+            ser = frame.raw[:frame.size]
+            try:
+                ked = json.loads(ser)
+                ilk, pre = ked["t"], ked["i"]
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            if ilk not in filtering.KelIlks:
+                continue
+
+            if pre not in states:
+                kever = self.db.kevers.get(pre)
+                states[pre] = [verfer.qb64 for verfer in kever.verfers] if kever is not None else None
+
+            if ilk in (coring.Ilks.icp, coring.Ilks.dip, coring.Ilks.rot, coring.Ilks.drt):
+                states[pre] = ked.get("k", [])
+
+            try:
+                sigs.extend(self.attached(frame.raw[frame.size:], ser, states[pre]))
+            except (kering.ShortageError, kering.ValidationError, ValueError, IndexError):
+                continue  # leave whatever could not be extracted to the parser
+
+        return sigs
+
+    @staticmethod
+    def attached(atc, ser, keys):
+        """ Generator of (sig, ser, key) from the signature groups of attachments atc
+
+        Parameters:
+            atc (bytes): attachments of the message in the text domain
+            ser (bytes): message the signatures are on
+            keys (list): qb64 keys that controller indexed signatures index into, None if not known
+
+        """
+        ims = bytearray(atc)
+        while ims:
+            ctr = coring.Counter(qb64b=ims, strip=True)
+            if ctr.code == coring.CtrDex.AttachedMaterialQuadlets:
+                continue  # groups follow inside
+
+            if ctr.code in (coring.CtrDex.ControllerIdxSigs, coring.CtrDex.WitnessIdxSigs):
+                signers = keys if ctr.code == coring.CtrDex.ControllerIdxSigs else None
+                for _ in range(ctr.count):
+                    siger = coring.Siger(qb64b=ims, strip=True)
+                    if signers is not None and siger.index < len(signers):
+                        verfer = coring.Verfer(qb64=signers[siger.index])
+                        if verfer.code in (coring.MtrDex.Ed25519, coring.MtrDex.Ed25519N):
+                            yield siger.raw, ser, verfer.raw
+
+            elif ctr.code == coring.CtrDex.NonTransReceiptCouples:
+                for _ in range(ctr.count):
+                    verfer = coring.Verfer(qb64b=ims, strip=True)
+                    cigar = coring.Cigar(qb64b=ims, strip=True)
+                    if verfer.code in (coring.MtrDex.Ed25519, coring.MtrDex.Ed25519N):
+                        yield cigar.raw, ser, verfer.raw
+
+            else:  # stop at the first group that carries no signatures to collect
+                return
+
+    def verify(self, sigs):
+        """ Verify signatures sigs concurrently
+
+        Parameters:
+            sigs (list): (sig, ser, key) of each signature
+
+        Returns:
+            dict: (sig, key) to (ser, result) for each signature, result is True if it verified
+
+        """
+        if not sigs:
+            return dict()
+
+        results = self.executor.map(lambda sig: Ed25519(*sig), sigs)
+        memo = dict()
+        failures = 0
+        for (sig, ser, key), result in zip(sigs, results):
+            memo[(bytes(sig), bytes(key))] = (ser, result)
+            if not result:
+                failures += 1
+
+        with self.lock:
+            self.signatures += len(sigs)
+            self.failures += failures
+            self.batches += 1
+        return memo
+
+    @contextmanager
+    def verified(self, frames):
+        """ Context manager that batch verifies the signatures of frames for parsing in this thread
+
+        Parameters:
+            frames (list): Frame of each message to be parsed in stream order
+
+        """
+        _local.memo = self.verify(self.collect(frames))
+        try:
+            yield
+        finally:
+            _local.memo = None
+
+    def stats(self):
+        """ Returns dict of batch counters suitable for serialization """
+        with self.lock:
+            return dict(signatures=self.signatures,
+                        failures=self.failures,
+                        batches=self.batches)
+
+    def close(self):
+        """ Shut down the signature verification threads """
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,114 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.bundling module
+
+Offline schema bundles preloaded into the schema database at startup
+"""
+import json
+import os
+
+from keri import help, kering
+from keri.app import oobiing
+from keri.core import scheming
+from keri.db import basing
+
+from verifier.core import resolving
+
+logger = help.ogler.getLogger()
+
+
+def documents(path):
+    """ Generator of (source, schema dict) of every schema document in the bundle at path
+
+    A bundle is either a directory of .json files or a single .json file, and each file holds either one
+    SAIDified schema document or a JSON array of them.
+
+    Raises:
+        ValueError: if path does not exist or a file is not valid JSON
+
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".json")]
+    elif os.path.isfile(path):
+        files = [path]
+    else:
+        raise ValueError(f"schema bundle {path} not found")
+
+    for file in files:
+        with open(file, "rb") as f:
+            try:
+                docs = json.load(f)
+            except ValueError as ex:
+                raise ValueError(f"schema bundle file {file} is not valid JSON: {ex}") from ex
+
+        for idx, doc in enumerate(docs if isinstance(docs, list) else [docs]):
+            yield f"{file}[{idx}]", doc
+
+
+def read(path):
+    """ Returns list of the Schemers of every schema in the bundle at path, each verified against its SAID
+
+    Raises:
+        ValueError: if the bundle cannot be read or any schema is not a valid SAIDified schema
+
+    """
+    schemers = []
+    for source, doc in documents(path):
+        raw = json.dumps(doc, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        try:
+            schemers.append(scheming.Schemer(raw=raw))
+        except (kering.KeriError, ValueError) as ex:
+            raise ValueError(f"invalid schema {source} in bundle: {ex}") from ex
+
+    return schemers
+
+
+def load(hby, schemers):
+    """ Store schemers in hby.db.schema and drop the pending schema OOBIs they make unnecessary
+
+    Everything is written in one LMDB transaction.  OOBIs of bundled schemas still queued, being requested
+    or waiting to be retried are removed and recorded as resolved, so only schemas missing from the
+    bundle are resolved remotely.
+
+    Parameters:
+        hby (Habery): database environment to store the schemas in
+        schemers (list): verified Schemer of each schema
+
+    Returns:
+        list: urls of the pending schema OOBIs dropped
+
+    """
+    db = hby.db
+    saids = {schemer.said for schemer in schemers}
+
+    pending = []  # (Komer, url) read before the write transaction, LMDB allows one per thread
+    for table in (db.oobis, db.coobi, db.eoobi):
+        for (url,), _ in table.getItemIter():
+            if resolving.said(url) in saids:
+                pending.append((table, url))
+
+    with db.env.begin(write=True) as txn:
+        for schemer in schemers:
+            txn.put(db.schema._tokey((schemer.said,)), schemer.raw, db=db.schema.sdb)
+
+        for table, url in pending:
+            txn.delete(table._tokey((url,)), db=table.sdb)
+            obr = basing.OobiRecord(said=resolving.said(url), date=help.nowIso8601(), state=oobiing.Result.resolved)
+            txn.put(db.roobi._tokey((url,)), db.roobi.serializer(obr), db=db.roobi.sdb)
+
+    return sorted({url for _, url in pending})
+
+
+def preload(hby, path):
+    """ Verify and load the schema bundle at path into hby, see read and load
+
+    Returns:
+        int: number of schemas loaded
+
+    """
+    schemers = read(path)
+    dropped = load(hby, schemers)
+    logger.info("Loaded %s schemas from bundle %s, %s schema OOBIs no longer resolved remotely",
+                len(schemers), path, len(dropped))
+    return len(schemers)
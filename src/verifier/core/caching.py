@@ -0,0 +1,297 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.caching module
+
+In memory caches for verification results
+"""
+import threading
+from collections import OrderedDict
+
+from keri.core import coring
+
+
+class LRUCache:
+    """ Thread safe bounded least recently used cache
+
+    Entries are evicted oldest first once either the number of entries exceeds .maxsize or the
+    accumulated size of the entries exceeds .maxbytes, so the memory held by the cache stays bounded
+    no matter how many distinct keys are seen.  Every operation holds ._lock, which is reentrant so
+    subclasses may hold it across several operations.
+
+    Attributes:
+        maxsize (int): maximum number of entries
+        maxbytes (int): maximum accumulated size in bytes of all entries
+        size (int): current accumulated size in bytes of all entries
+        hits (int): number of lookups that found an entry
+        misses (int): number of lookups that did not find an entry
+        evictions (int): number of entries removed to stay within bounds
+
+    """
+
+    def __init__(self, maxsize=1024, maxbytes=64 * 1024 * 1024):
+        """ Create bounded LRU cache
+
+        Parameters:
+            maxsize (int): maximum number of entries
+            maxbytes (int): maximum accumulated size in bytes of all entries
+
+        """
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """ Return value at key and mark it most recently used, default if not found """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, val, size=0):
+        """ Add or replace value at key then evict least recently used entries until within bounds
+
+        Parameters:
+            key (Hashable): cache key
+            val (Any): value to cache
+            size (int): size in bytes accounted against .maxbytes for this entry
+
+        Returns:
+            bool: True if val was cached, False if it is larger than .maxbytes on its own
+
+        """
+        if size > self.maxbytes:
+            return False
+
+        with self._lock:
+            self.pop(key)
+            self._entries[key] = (val, size)
+            self.size += size
+
+            while len(self._entries) > self.maxsize or self.size > self.maxbytes:
+                old, entry = self._entries.popitem(last=False)
+                self.size -= entry[1]
+                self.evictions += 1
+                self.evicted(old)
+
+        return True
+
+    def pop(self, key, default=None):
+        """ Remove entry at key and return its value, default if not found """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+
+            self.size -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        """ Remove all entries, counters are left intact """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def evicted(self, key):
+        """ Hook called with the key of each entry removed to stay within bounds """
+        pass
+
+    def stats(self):
+        """ Returns dict of cache counters suitable for serialization """
+        with self._lock:
+            return dict(entries=len(self._entries),
+                        bytes=self.size,
+                        hits=self.hits,
+                        misses=self.misses,
+                        evictions=self.evictions)
+
+
+class ResultCache(LRUCache):
+    """ Content addressed cache of verification responses
+
+    Keys are the digest of the request body so byte identical CESR streams map to the same response.
+    Each entry also records the SAIDs of the credentials in the response so that entries can be
+    invalidated when a TEL event (revocation) for any of those credentials is processed.
+
+    Invalidation only reaches the cache of the process that processed the revocation, so with .stamp
+    each entry also records the state of its credentials when it was cached and is only served while
+    that state is unchanged, whichever process changed it.
+
+    """
+
+    def __init__(self, maxsize=1024, maxbytes=64 * 1024 * 1024, stamp=None):
+        """ Create verification result cache
+
+        Parameters:
+            maxsize (int): maximum number of cached responses
+            maxbytes (int): maximum accumulated size in bytes of cached responses
+            stamp (Callable): returns the current state of the credentials with SAIDs saids, None when
+                              they must not be cached, see chaining.stamp.  None serves entries until invalidated
+
+        """
+        super(ResultCache, self).__init__(maxsize=maxsize, maxbytes=maxbytes)
+        self.stamp = stamp
+        self.saids = dict()  # credential SAID to set of digests of responses that include it
+        self._digs = dict()  # digest to SAIDs of the credentials in the response
+        self._stamps = dict()  # digest to state of the credentials in the response when it was cached
+
+    @staticmethod
+    def digest(ims):
+        """ Returns qb64 digest of request body ims used as the cache key """
+        return coring.Diger(ser=ims).qb64
+
+    def add(self, dig, data, saids):
+        """ Cache response data for request body digest dig
+
+        Parameters:
+            dig (str): qb64 digest of the request body
+            data (bytes): serialized response body
+            saids (Iterable): qb64 SAIDs of the credentials contained in the response
+
+        """
+        saids = set(saids)
+        stamp = None
+        if self.stamp is not None:
+            stamp = self.stamp(saids)
+            if stamp is None:
+                return
+
+        with self._lock:
+            if not self.put(dig, data, size=len(dig) + len(data)):
+                return
+
+            self._digs[dig] = saids
+            self._stamps[dig] = stamp
+            for said in saids:
+                self.saids.setdefault(said, set()).add(dig)
+
+    def get(self, key, default=None):
+        """ Return response at key if the state of its credentials is unchanged, default otherwise """
+        if self.stamp is not None:
+            with self._lock:
+                saids = self._digs.get(key)
+                stamp = self._stamps.get(key)
+
+            if saids is not None and self.stamp(saids) != stamp:
+                with self._lock:  # unless the entry was replaced meanwhile, the SAIDs are a new set per entry
+                    if self._digs.get(key) is saids:
+                        self.pop(key)  # stale, counted as a miss below
+
+        return super(ResultCache, self).get(key, default)
+
+    def invalidate(self, said):
+        """ Remove all cached responses that include the credential with SAID said
+
+        Returns:
+            int: number of responses removed
+
+        """
+        with self._lock:
+            digs = self.saids.pop(said, set())
+            for dig in digs:
+                self.pop(dig)
+
+        return len(digs)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            self._stamps.pop(key, None)
+            for said in self._digs.pop(key, ()):
+                digs = self.saids.get(said)
+                if digs is not None:
+                    digs.discard(key)
+                    if not digs:
+                        del self.saids[said]
+
+            return super(ResultCache, self).pop(key, default)
+
+    def evicted(self, key):
+        self.pop(key)
+
+    def clear(self):
+        with self._lock:
+            super(ResultCache, self).clear()
+            self.saids.clear()
+            self._digs.clear()
+            self._stamps.clear()
+
+
+class ChainCache(LRUCache):
+    """ Cache of credential chain validation results
+
+    Keys are credential SAIDs and values are the stamp of the state the credential was validated
+    against, see ChainVerifier.stamp.  A credential is only known valid while the current stamp of its
+    state equals the cached one, so any change to the issuer key state, the registry or credential TEL
+    state, or the TEL state of an edge credential forces it to be validated again.
+
+    """
+
+    def __init__(self, maxsize=4096):
+        """ Create credential chain validation cache
+
+        Parameters:
+            maxsize (int): maximum number of cached validation results
+
+        """
+        super(ChainCache, self).__init__(maxsize=maxsize)
+
+    def valid(self, said, stamp):
+        """ Returns True if credential said was validated against state stamp, counted as hit or miss """
+        with self._lock:
+            entry = self._entries.get(said)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return False
+
+            self._entries.move_to_end(said)
+            self.hits += 1
+            return True
+
+    def add(self, said, stamp):
+        """ Record that credential said was validated against state stamp """
+        self.put(said, stamp)
+
+    def discard(self, said):
+        """ Forget the validation result of credential said """
+        self.pop(said)
+
+
+class FragmentCache(LRUCache):
+    """ Cache of the serialized bytes of credentials keyed by SAID
+
+    A SAID is the digest of the content of a credential, so an entry never goes stale and is only ever
+    evicted to stay within bounds.
+
+    """
+
+    MaxSize = 4096  # default maximum number of cached credentials
+
+    def __init__(self, maxsize=MaxSize, maxbytes=64 * 1024 * 1024):
+        """ Create serialized credential cache
+
+        Parameters:
+            maxsize (int): maximum number of cached credentials
+            maxbytes (int): maximum accumulated size in bytes of cached credentials
+
+        """
+        super(FragmentCache, self).__init__(maxsize=maxsize, maxbytes=maxbytes)
+
+    def add(self, said, data):
+        """ Cache serialized bytes data of credential said """
+        self.put(said, data, size=len(data))
@@ -0,0 +1,164 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.chaining module
+
+Credential verification that skips re-validating credential chains whose state has not changed
+"""
+from keri import kering
+from keri.core import serdering
+from keri.db import dbing
+from keri.vdr import verifying
+
+
+def latest(reger, said):
+    """ Returns digest of the latest TEL event of credential said in reger as bytes, None if it has none """
+    dig = None
+    for _, dig in reger.getTelItemPreIter(pre=said.encode("utf-8")):
+        pass
+
+    return bytes(dig) if dig is not None else None
+
+
+def edges(creder):
+    """ Returns list of the SAIDs of the credentials at the end of the edges of creder, None if malformed """
+    prov = creder.edge if creder.edge is not None else {}
+    blocks = prov if isinstance(prov, list) else [prov]
+    nodes = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            return None
+        for label, node in block.items():
+            if label in ('d', 'o'):  # SAID or Operator of this edge block
+                continue
+            if not isinstance(node, dict) or "n" not in node:
+                return None
+            nodes.append(node["n"])
+
+    return nodes
+
+
+def state(reger, said):
+    """ Returns the TEL state of credential said and of every credential it chains to, directly or not
+
+    Returns:
+        list: (said, dig, ilk) of the latest TEL event of each credential in the chain starting with said,
+              with dig and ilk None for a credential that has no TEL state or is not stored
+
+    """
+    chain = []
+    seen = set()
+    todo = [said]
+    while todo:
+        said = todo.pop(0)
+        if said in seen:
+            continue
+        seen.add(said)
+
+        dig = latest(reger, said)
+        ilk = None
+        if dig is not None:
+            raw = reger.getTvt(dbing.dgKey(said, dig))
+            ilk = serdering.SerderKERI(raw=bytes(raw)).ilk if raw is not None else None
+        chain.append((said, dig, ilk))
+
+        creder = reger.creds.get(keys=(said,))
+        if creder is not None:
+            todo.extend(edges(creder) or [])
+
+    return chain
+
+
+def stamp(reger, saids):
+    """ Returns the TEL state of the credentials with SAIDs saids and of every credential they chain to
+
+    Returns:
+        tuple: digests of the latest TEL events of the credentials in the chains, None if any of them is revoked
+
+    """
+    digs = []
+    for said in sorted(saids):
+        for _, dig, ilk in state(reger, said):
+            if ilk in (kering.Ilks.rev, kering.Ilks.brv):
+                return None
+            digs.append(dig)
+
+    return tuple(digs)
+
+
+class ChainVerifier(verifying.Verifier):
+    """ Credential verifier that memoizes validation results per credential SAID
+
+    vLEI presentations chain through credentials such as QVI, LEI and ECR Auth credentials that are the
+    same for thousands of holders.  Once a credential has been validated and saved, its SAID is cached
+    with the stamp of the state it was validated against.  When the same credential appears again and
+    its state is unchanged, the registry, schema and edge checks are skipped and it is reported as saved
+    right away, so verifying a new presentation only costs the credentials not seen before.
+
+    """
+
+    def __init__(self, hby, reger=None, chains=None, **kwa):
+        """ Create memoizing credential verifier
+
+        Parameters:
+            hby (Habery): Database environment for exposed KERI AIDs
+            reger (Reger): Database environment for credential registries
+            chains (ChainCache): optional cache of validation results, None validates every credential
+
+        """
+        super(ChainVerifier, self).__init__(hby=hby, reger=reger, **kwa)
+        self.chains = chains
+
+    def processCredential(self, creder, prefixer, seqner, saider):
+        if self.chains is None:
+            return super(ChainVerifier, self).processCredential(creder, prefixer, seqner, saider)
+
+        stamp = self.stamp(creder)
+        if (stamp is not None and self.chains.valid(creder.said, stamp)
+                and self.reger.saved.get(keys=creder.said) is not None):
+            self.cues.append(dict(kin="saved", creder=creder))
+            return
+
+        super(ChainVerifier, self).processCredential(creder, prefixer, seqner, saider)
+
+        if stamp is not None:
+            self.chains.add(creder.said, stamp)
+
+    def stamp(self, creder):
+        """ Returns the state credential creder is validated against, None if any of it is missing
+
+        The stamp holds the digests of the latest issuer key event, the latest registry event, the
+        latest TEL event of the credential and the latest TEL event of each credential at the end of
+        one of its edges.  The credential SAID already commits to its schema and edges.
+
+        """
+        kever = self.hby.db.kevers.get(creder.issuer)
+        if kever is None or creder.regi not in self.tevers:
+            return None
+
+        tever = self.tevers[creder.regi]
+        vcdig = self.latest(creder.said)
+        if vcdig is None:
+            return None
+
+        nodes = edges(creder)
+        if nodes is None:
+            return None
+
+        return kever.serder.said, tever.serder.said, vcdig, tuple(self.latest(node) for node in nodes)
+
+    def latest(self, said):
+        """ Returns digest of the latest TEL event of credential said as bytes, None if it has none """
+        return latest(self.reger, said)
+
+    def processEscrowMissingChain(self):
+        """ Process the credentials escrowed for a missing credential at the end of one of their edges """
+        self._processEscrow(self.reger.mce, self.TimeoutMRI, kering.MissingChainError)
+
+    def processEscrowMissingSchema(self):
+        """ Process the credentials escrowed for a missing schema """
+        self._processEscrow(self.reger.mse, self.TimeoutMRI, kering.MissingSchemaError)
+
+    def processEscrowMissingRegistry(self):
+        """ Process the credentials escrowed for a missing registry or TEL event """
+        self._processEscrow(self.reger.mre, self.TimeoutMRE, kering.MissingRegistryError)
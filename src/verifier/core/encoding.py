@@ -0,0 +1,115 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.encoding module
+
+Pluggable JSON encoding of responses built from cached serialized credentials
+"""
+import json
+
+from keri import kering
+
+from verifier.core import caching
+
+try:
+    import orjson
+except ImportError:  # optional, install with the fast extra
+    orjson = None
+
+
+def stdlib(obj):
+    """ Returns obj serialized as compact JSON bytes with the standard library """
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def fast(obj):
+    """ Returns obj serialized as compact JSON bytes with orjson """
+    return orjson.dumps(obj)
+
+
+Backends = ("auto", "json", "orjson")
+
+
+def backend(name="auto"):
+    """ Returns JSON serializing function of backend name
+
+    Parameters:
+        name (str): json for the standard library, orjson for orjson, auto for orjson when installed
+
+    Raises:
+        ValueError: if name is not a known backend or orjson is asked for but not installed
+
+    """
+    if name not in Backends:
+        raise ValueError(f"unknown JSON backend {name}, expected one of {', '.join(Backends)}")
+
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON backend orjson is not installed, install with pip install 'cesr-verifier[fast]'")
+
+    if name == "json" or orjson is None:
+        return stdlib
+
+    return fast
+
+
+class Encoder:
+    """ Encodes verification responses by concatenating cached serialized credentials
+
+    A SAID fixes the content of a credential, so the JSON of each credential is kept in a FragmentCache
+    keyed by its SAID and responses are assembled from those fragments instead of serializing the
+    credentials again for every request.  Credentials serialized as JSON already carry their JSON as
+    .raw, which is taken as is, others are serialized once with the backend.
+
+    Attributes:
+        dumps (Callable): serializes any JSON compatible value to bytes
+        fragments (FragmentCache): SAID to JSON bytes of the credential, None when disabled
+
+    """
+
+    def __init__(self, name="auto", fragments=caching.FragmentCache.MaxSize):
+        """ Create response encoder
+
+        Parameters:
+            name (str): JSON backend, see backend
+            fragments (int): maximum number of cached serialized credentials, 0 disables the cache
+
+        """
+        self.dumps = backend(name)
+        self.fragments = caching.FragmentCache(maxsize=fragments) if fragments > 0 else None
+
+    def fragment(self, creder):
+        """ Returns JSON bytes of credential creder """
+        if self.fragments is not None:
+            data = self.fragments.get(creder.said)
+            if data is not None:
+                return data
+
+        data = bytes(creder.raw) if creder.kind == kering.Serials.json else self.dumps(creder.sad)
+        if self.fragments is not None:
+            self.fragments.add(creder.said, data)
+
+        return data
+
+    def array(self, creders):
+        """ Returns JSON array bytes of credentials creders """
+        return b"[" + b",".join([self.fragment(creder) for creder in creders]) + b"]"
+
+    def creds(self, creders):
+        """ Returns verification response body bytes listing credentials creders """
+        return b'{"creds":' + self.array(creders) + b"}"
+
+    def results(self, results):
+        """ Returns batch verification response body bytes
+
+        Parameters:
+            results (list): (id, list of Creder or failure message str) of each item in the batch
+
+        """
+        items = []
+        for ident, res in results:
+            if isinstance(res, str):
+                items.append(self.dumps(dict(id=ident, msg=res)))
+            else:
+                items.append(b'{"id":' + self.dumps(ident) + b',"creds":' + self.array(res) + b"}")
+
+        return b'{"results":[' + b",".join(items) + b"]}"
@@ -0,0 +1,233 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.escrowing module
+
+Background processing of the KEL, TEL and credential escrows within a time budget per run
+"""
+import queue
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from hio.base import doing
+from keri import help
+from keri.core import eventing as keventing
+from keri.db import dbing
+from keri.help import helping
+from keri.vdr import verifying
+
+from verifier.core import presenting
+
+logger = help.ogler.getLogger()
+
+Budget = 0.05  # seconds of escrow processing per run
+
+
+@dataclass
+class Escrow:
+    """ One escrow of events or credentials waiting for something they depend on """
+
+    name: str  # name of the escrow database table
+    proc: str  # processor of the verification context that processes it, kvy, tvy or vry
+    method: str  # method of the processor that processes every entry of the escrow once
+    table: Callable  # returns (LMDBer, named sub db) of the escrow from (hby, reger)
+    stamps: Callable = None  # returns iterator of the datetimes the entries were escrowed, None when unknown
+    timeout: float = None  # seconds after which the processor drops an entry, None when it never does
+
+
+def events(table):
+    """ Returns stamps of a KEL escrow whose entries are the digests of events keyed by prefix """
+    def stamps(hby, reger):
+        db, sub = table(hby, reger)
+        for key, val in db.getTopItemIter(sub):
+            pre, _ = dbing.splitKey(key)
+            dts = db.getDts(dbing.dgKey(pre, bytes(val)[dbing.ProemSize + 1:]))
+            if dts is not None:
+                yield helping.fromIso8601(bytes(dts).decode("utf-8"))
+
+    return stamps
+
+
+def credentials(name):
+    """ Returns stamps of a credential escrow whose entries are the datetimes credentials were escrowed """
+    def stamps(hby, reger):
+        for _, dater in getattr(reger, name).getItemIter():
+            yield dater.datetime
+
+    return stamps
+
+
+def kel(name):
+    """ Returns table of KEL escrow name """
+    return lambda hby, reger: (hby.db, getattr(hby.db, name))
+
+
+def tel(name):
+    """ Returns table of TEL escrow name """
+    return lambda hby, reger: (reger, getattr(reger, name))
+
+
+def cred(name):
+    """ Returns table of credential escrow name """
+    return lambda hby, reger: (reger, getattr(reger, name).sdb)
+
+
+# in the order keripy processes them
+Escrows = (
+    Escrow("ooes", "kvy", "processEscrowOutOfOrders", kel("ooes"), events(kel("ooes")), keventing.Kevery.TimeoutOOE),
+    Escrow("uwes", "kvy", "processEscrowUnverWitness", kel("uwes"), timeout=keventing.Kevery.TimeoutUWE),
+    Escrow("ures", "kvy", "processEscrowUnverNonTrans", kel("ures"), timeout=keventing.Kevery.TimeoutURE),
+    Escrow("vres", "kvy", "processEscrowUnverTrans", kel("vres"), timeout=keventing.Kevery.TimeoutVRE),
+    Escrow("pwes", "kvy", "processEscrowPartialWigs", kel("pwes"), events(kel("pwes")), keventing.Kevery.TimeoutPWE),
+    Escrow("pses", "kvy", "processEscrowPartialSigs", kel("pses"), events(kel("pses")), keventing.Kevery.TimeoutPSE),
+    Escrow("ldes", "kvy", "processEscrowDuplicitous", kel("ldes"), events(kel("ldes")), keventing.Kevery.TimeoutLDE),
+    Escrow("taes", "tvy", "processEscrowAnchorless", tel("taes")),
+    Escrow("oots", "tvy", "processEscrowOutOfOrders", tel("oots")),
+    Escrow("mce", "vry", "processEscrowMissingChain", cred("mce"), credentials("mce"), verifying.Verifier.TimeoutMRI),
+    Escrow("mse", "vry", "processEscrowMissingSchema", cred("mse"), credentials("mse"),
+           verifying.Verifier.TimeoutMRI),
+    Escrow("mre", "vry", "processEscrowMissingRegistry", cred("mre"), credentials("mre"),
+           verifying.Verifier.TimeoutMRE),
+)
+
+
+class Escrower(doing.Doer):
+    """ Processes the KEL, TEL and credential escrows a few at a time without starving requests
+
+    Events and credentials that arrive before what they depend on, such as an event before its prior event
+    or a credential before its registry, are escrowed by the processors and only accepted once the escrow
+    is processed again.  Every run processes escrows in turn, each one entirely since keripy processes an
+    escrow in one pass, until .budget seconds have passed, and the next run continues with the escrow after
+    the last one processed.  Runs use a verification context checked out of the pool so escrow processing
+    never sees the cues of a request, and are skipped while every context is busy.  They always hold the guard
+    the contexts of the pool hold while parsing, since escrow processing updates the same Kevers and Tevers.  Revocations resolved
+    from the TEL escrows are collected from the cues of the context before it is checked back in, and
+    mark their presentations revoked and drop the cached responses including them, as they do when they
+    arrive in a request.
+
+    Before an escrow is processed its entries are counted, and for escrows whose entries carry the time they
+    were escrowed the age of the oldest entry and how many entries are past the timeout of the escrow.  The
+    entries that leave the escrow are counted as timed out up to that number and as resolved otherwise.
+
+    Attributes:
+        sizes (dict): entries in each escrow when it was last processed, keyed by escrow name
+        ages (dict): seconds the oldest entry of each escrow had waited when it was last processed
+        resolved (dict): entries of each escrow resolved so far
+        timedout (dict): entries of each escrow dropped after its timeout so far
+        revoked (int): revocations resolved from the escrows so far
+
+    """
+
+    def __init__(self, hby, reger, pool, vdb=None, cache=None, budget=Budget, escrows=Escrows, tock=1.0, **kwa):
+        """ Create escrow processor
+
+        Parameters:
+            hby (Habery): database environment holding the KEL escrows
+            reger (Reger): database environment holding the TEL and credential escrows
+            pool (ContextPool): pool of verification contexts to process the escrows with
+            vdb (VerifierBaser): optional verifier database whose presentations are marked revoked
+            cache (ResultCache): optional cache of verification responses to drop revoked credentials from
+            budget (float): seconds of escrow processing per run
+            escrows (tuple): Escrow of each escrow processed in turn
+            tock (float): seconds between runs
+
+        """
+        self.hby = hby
+        self.reger = reger
+        self.pool = pool
+        self.presenter = presenting.Presenter(vdb=vdb, reger=reger) if vdb is not None else None
+        self.cache = cache
+        self.budget = budget
+        self.escrows = escrows
+        self.cursor = 0  # index in .escrows of the next escrow to process
+        self.sizes = {escrow.name: 0 for escrow in escrows}
+        self.ages = {escrow.name: 0.0 for escrow in escrows}
+        self.resolved = {escrow.name: 0 for escrow in escrows}
+        self.timedout = {escrow.name: 0 for escrow in escrows}
+        self.revoked = 0
+        super(Escrower, self).__init__(tock=tock, **kwa)
+
+    def recur(self, tyme):
+        self.run()
+        return False
+
+    def run(self):
+        """ Process escrows in turn until .budget seconds have passed, at least one and each at most once
+
+        Returns:
+            int: number of escrows processed, 0 if every verification context was busy
+
+        """
+        try:
+            ctx = self.pool.contexts.get_nowait()
+        except queue.Empty:
+            return 0
+
+        done = 0
+        try:
+            with ctx.guard:  # shared by every context of the pool, so requests never parse meanwhile
+                if ctx.shared:
+                    ctx.refresh()
+
+                start = time.monotonic()
+                while done < len(self.escrows):
+                    self.process(ctx, self.escrows[self.cursor])
+                    self.cursor = (self.cursor + 1) % len(self.escrows)
+                    done += 1
+                    if time.monotonic() - start >= self.budget:
+                        break
+
+            _, revoked = ctx.collect()
+        finally:
+            self.pool.checkin(ctx)
+
+        self.invalidate(revoked)
+        return done
+
+    def invalidate(self, revoked):
+        """ Mark the presentations of the credentials with SAIDs revoked revoked and drop their cached responses """
+        if not revoked:
+            return
+
+        self.revoked += len(revoked)
+        if self.presenter is not None:
+            self.presenter.revoke(revoked)
+
+        if self.cache is not None:
+            for said in revoked:
+                self.cache.invalidate(said)
+
+    def process(self, ctx, escrow):
+        """ Process every entry of escrow once with the processors of verification context ctx """
+        db, sub = escrow.table(self.hby, self.reger)
+        before = entries(db, sub)
+        if before == 0:
+            self.sizes[escrow.name] = 0
+            self.ages[escrow.name] = 0.0
+            return
+
+        expired = 0
+        if escrow.stamps is not None:
+            now = helping.nowUTC()
+            ages = [(now - stamp).total_seconds() for stamp in escrow.stamps(self.hby, self.reger)]
+            self.ages[escrow.name] = max(ages, default=0.0)
+            if escrow.timeout is not None:
+                expired = sum(1 for age in ages if age > escrow.timeout)
+
+        try:
+            getattr(getattr(ctx, escrow.proc), escrow.method)()
+        except Exception as ex:
+            logger.error("Processing escrow %s failed: %s", escrow.name, ex)
+
+        after = entries(db, sub)
+        removed = max(before - after, 0)
+        self.timedout[escrow.name] += min(expired, removed)
+        self.resolved[escrow.name] += removed - min(expired, removed)
+        self.sizes[escrow.name] = after
+
+
+def entries(db, sub):
+    """ Returns number of entries in named sub db sub of LMDBer db without iterating them """
+    with db.env.begin(db=sub, write=False) as txn:
+        return txn.stat(sub)["entries"]
@@ -0,0 +1,101 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.filtering module
+
+Pre-parse filter that drops KEL and TEL events the verifier has already accepted
+"""
+import json
+
+from keri.core.coring import Ilks
+from keri.db import dbing
+
+from verifier.core import framing
+
+KelIlks = (Ilks.icp, Ilks.rot, Ilks.ixn, Ilks.dip, Ilks.drt)
+TelIlks = (Ilks.vcp, Ilks.vrt, Ilks.iss, Ilks.rev, Ilks.bis, Ilks.brv)
+
+
+class Prefilter:
+    """ Drops frames of KEL and TEL events that are byte identical to events already accepted
+
+    Presentations carry the full issuer KEL and registry TEL every time, so in steady state most of
+    their events have already been accepted and parsing them again only repeats signature and receipt
+    verification.  The key event logs in .db and the transaction event logs in .reger already index the
+    accepted event digest by (prefix, sn), so a frame is known when the digest at its (prefix, sn) is the
+    digest it claims and the stored event is byte identical to its message.  Known frames are dropped
+    together with their attachments, which therefore can not add receipts or signatures to an event
+    that was already accepted.  Everything else, including ACDC messages and frames that can not be
+    split, is passed through unchanged.
+
+    Attributes:
+        frames (int): number of frames checked
+        skipped (int): number of frames dropped as already accepted
+        bytes (int): number of bytes checked
+        skippedBytes (int): number of bytes dropped as already accepted
+
+    """
+
+    def __init__(self, db, reger):
+        """ Create prefilter of accepted events
+
+        Parameters:
+            db (Baser): database of accepted KEL events
+            reger (Reger): database of accepted TEL events
+
+        """
+        self.db = db
+        self.reger = reger
+        self.frames = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.skippedBytes = 0
+
+    def known(self, frame):
+        """ Returns True if frame holds a KEL or TEL event that has already been accepted """
+        if frame.proto != "KERI" or not frame.size:
+            return False
+
+        raw = frame.raw[:frame.size]
+        try:
+            ked = json.loads(raw)
+            ilk, pre, sn, dig = ked["t"], ked["i"], int(ked["s"], 16), ked["d"]
+        except (ValueError, KeyError, TypeError):
+            return False
+
+        if ilk in KelIlks:
+            accepted = self.db.getKeLast(dbing.snKey(pre, sn))
+            if accepted is None or bytes(accepted) != dig.encode("utf-8"):
+                return False
+            evt = self.db.getEvt(dbing.dgKey(pre, dig))
+        elif ilk in TelIlks:
+            accepted = self.reger.getTel(dbing.snKey(pre, sn))
+            if accepted is None or bytes(accepted) != dig.encode("utf-8"):
+                return False
+            evt = self.reger.getTvt(dbing.dgKey(pre, dig))
+        else:
+            return False
+
+        return evt is not None and bytes(evt) == raw
+
+    def check(self, frame):
+        """ Count frame and return True if it should be passed on to the parser """
+        self.frames += 1
+        self.bytes += len(frame.raw)
+        if self.known(frame):
+            self.skipped += 1
+            self.skippedBytes += len(frame.raw)
+            return False
+
+        return True
+
+    def filter(self, ims):
+        """ Returns CESR stream ims without the frames of already accepted events as bytes """
+        return b"".join(frame.raw for frame in framing.split(ims) if self.check(frame))
+
+    def stats(self):
+        """ Returns dict of prefilter counters suitable for serialization """
+        return dict(frames=self.frames,
+                    skipped=self.skipped,
+                    bytes=self.bytes,
+                    skippedBytes=self.skippedBytes)
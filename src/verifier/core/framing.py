@@ -0,0 +1,109 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.framing module
+
+Splitting of text domain CESR streams into frames of one message plus its attachments
+"""
+from collections import namedtuple
+
+from keri import kering
+from keri.core import coring
+
+# raw (bytes): message plus attachments
+# size (int): size of the message without attachments, 0 when raw could not be split
+# proto (str): protocol of the message, KERI or ACDC, None when raw could not be split
+Frame = namedtuple("Frame", "raw size proto")
+
+
+def reap(ims, start=0, final=True):
+    """ Extract the frame starting at offset start of CESR stream ims
+
+    Only JSON messages in the text domain are split.  Their size comes from the version string and
+    their attachments run up to the next '{', which never occurs in text domain attachments.  Anything
+    that can not be split this way, such as CBOR or MGPK messages or binary domain attachments, is
+    returned as one frame holding the rest of ims with size 0.
+
+    Parameters:
+        ims (bytes | bytearray): CESR stream
+        start (int): offset in ims of the frame
+        final (bool): True means ims holds the end of the stream, False means more bytes may follow
+
+    Returns:
+        Frame: frame at start or None when more bytes are needed to tell where the frame ends
+
+    """
+    if ims[start:start + 1] != b'{':
+        return Frame(raw=copy(ims, start), size=0, proto=None)
+
+    try:
+        proto, kind, _, size = coring.sniff(bytes(ims[start:start + coring.MINSNIFFSIZE + 12]))
+    except kering.ShortageError:
+        if not final:
+            return None
+        proto, kind, size = None, None, 0
+    except (kering.VersionError, kering.DeserializeError, ValueError):
+        proto, kind, size = None, None, 0
+
+    if kind != coring.Serials.json:
+        return Frame(raw=copy(ims, start), size=0, proto=None)
+
+    if start + size > len(ims):
+        return None if not final else Frame(raw=copy(ims, start), size=0, proto=None)
+
+    end = ims.find(b'{', start + size)
+    if end < 0:
+        if not final:
+            return None
+        end = len(ims)
+
+    return Frame(raw=copy(ims, start, end), size=size, proto=proto)
+
+
+def copy(ims, start, end=None):
+    """ Returns bytes of ims from start to end copied once, where slicing a bytearray would copy twice """
+    with memoryview(ims) as view:
+        return bytes(view[start:end])
+
+
+def join(frames, buf=None):
+    """ Returns bytearray of the raw bytes of frames in order
+
+    Parameters:
+        frames (list): Frame of each message to join
+        buf (bytes | bytearray): stream the frames were split from, overwritten with the result when it is a
+                                 bytearray so no new buffer is allocated for it
+
+    """
+    if not isinstance(buf, bytearray):
+        return bytearray().join(frame.raw for frame in frames)
+
+    pos = 0
+    for frame in frames:  # frames are in stream order so each lands at or before where it was split from
+        buf[pos:pos + len(frame.raw)] = frame.raw
+        pos += len(frame.raw)
+    del buf[pos:]
+    return buf
+
+
+def split(ims):
+    """ Split CESR stream into frames of one message plus its attachments
+
+    Parameters:
+        ims (bytes | bytearray | memoryview): CESR stream
+
+    Returns:
+        list: Frame for each message in ims, see reap for what can not be split
+
+    """
+    if not isinstance(ims, (bytes, bytearray)):
+        ims = bytes(ims)
+
+    frames = []
+    start = 0
+    while start < len(ims):
+        frame = reap(ims, start)
+        frames.append(frame)
+        start += len(frame.raw)
+
+    return frames
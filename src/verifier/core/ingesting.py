@@ -0,0 +1,243 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.ingesting module
+
+Incremental, bounded memory ingestion of CESR request bodies
+"""
+import threading
+
+from keri.core import parsing
+
+from verifier.core import framing
+
+ChunkSize = 64 * 1024  # bytes read from the request body per chunk
+StreamThreshold = 1024 * 1024  # bodies larger than this are streamed into the parser
+MaxBuffered = 4 * 1024 * 1024  # maximum bytes buffered ahead of the parser
+
+
+class BufferLimitError(ValueError):
+    """ Raised when the bytes buffered ahead of the parser exceed the configured limit """
+
+
+class BodyReader:
+    """ Reads falcon request bodies either whole or as a sequence of chunks
+
+    Bodies with a Content-Length up to .threshold are read whole so they can be digested and cached.
+    Larger bodies and bodies sent with chunked transfer encoding are read .chunkSize bytes at a time
+    and fed to the parser as they are read.  They only arrive as they are read under a server that
+    streams request bodies, such as an ASGI server.  The hio server receives and dechunks the whole body
+    before the app runs, so there chunks are read from memory, parsing never overlaps the transfer and
+    the whole body is held until the request is answered.
+
+    Bodies are read without building intermediate copies.  A whole body is read into one bytearray of its
+    Content-Length that the parser consumes in place, where it would copy a bytes body into a new bytearray
+    first.  Chunks are read into one .chunkSize buffer per thread that is reused for every chunk of every
+    request, so streaming a body allocates nothing per chunk.
+
+    """
+
+    def __init__(self, threshold=StreamThreshold, chunkSize=ChunkSize, limit=MaxBuffered):
+        """ Create request body reader
+
+        Parameters:
+            threshold (int): Content-Length above which bodies are streamed, negative streams every body
+            chunkSize (int): bytes read from the request body per chunk
+            limit (int): maximum bytes buffered ahead of the parser when streaming
+
+        """
+        self.threshold = threshold
+        self.chunkSize = chunkSize
+        self.limit = limit
+        self.local = threading.local()
+
+    @staticmethod
+    def chunked(req):
+        """ Returns True if request body uses chunked transfer encoding """
+        te = req.get_header("Transfer-Encoding")
+        return te is not None and "chunked" in te.lower()
+
+    def streamed(self, req):
+        """ Returns True if the body of request req should be streamed into the parser """
+        if req.content_length is None:
+            return self.chunked(req)
+
+        return req.content_length > self.threshold
+
+    def buffer(self):
+        """ Returns memoryview of the .chunkSize buffer of this thread, allocated on first use """
+        view = getattr(self.local, "view", None)
+        if view is None:
+            view = self.local.view = memoryview(bytearray(self.chunkSize))
+        return view
+
+    def read(self, req):
+        """ Returns whole body of request req as bytearray """
+        if req.content_length is None:
+            buf = bytearray()
+            if self.chunked(req):
+                for chunk in self.chunks(req):
+                    buf.extend(chunk)
+            return buf
+
+        buf = bytearray(req.content_length)
+        readinto = getattr(req.stream, "readinto", None)
+        pos = 0
+        with memoryview(buf) as view:
+            if readinto is not None:  # straight from the request stream into buf
+                while pos < len(view):
+                    n = readinto(view[pos:])
+                    if not n:
+                        break
+                    pos += n
+            else:
+                for chunk in self.chunks(req):
+                    view[pos:pos + len(chunk)] = chunk
+                    pos += len(chunk)
+        del buf[pos:]  # body shorter than its Content-Length
+        return buf
+
+    def chunks(self, req):
+        """ Generator yielding the body of request req in chunks of at most .chunkSize bytes
+
+        When the request stream supports readinto each chunk is a memoryview of the buffer of this thread,
+        which the next chunk overwrites, so every chunk must be consumed before the next one is requested.
+
+        """
+        remaining = req.content_length  # None reads a chunked body to its end
+        readinto = getattr(req.stream, "readinto", None)
+        if readinto is None:
+            stream = req.stream if remaining is None else req.bounded_stream
+            while True:
+                chunk = stream.read(self.chunkSize)
+                if not chunk:
+                    return
+                yield chunk
+
+        view = self.buffer()
+        while remaining is None or remaining > 0:
+            size = self.chunkSize if remaining is None else min(self.chunkSize, remaining)
+            n = readinto(view[:size])
+            if not n:
+                return
+            if remaining is not None:
+                remaining -= n
+            yield view[:n]
+
+
+class Ingester:
+    """ Feeds a CESR stream to the parser chunk by chunk as bytes arrive
+
+    The parser runs in framed mode, which treats the end of its buffer as the end of the current
+    message's attachments.  To keep a chunk boundary from truncating attachments, received bytes are
+    only released to the parser one whole frame, a message plus its attachments, at a time.  Bytes
+    after the last message start are held back until the next message starts or the stream ends.  When
+    a prefilter is given, frames of events that have already been accepted are dropped instead of
+    released.  Only the unconsumed tail of the stream is ever buffered here, so the memory the ingester
+    takes stays flat regardless of body size, though a server may hold the whole body besides.
+
+    Attributes:
+        ims (bytearray): bytes released to the parser and not yet consumed by it
+        pending (bytearray): bytes received but not yet released to the parser
+        size (int): total bytes received
+        limit (int): maximum bytes buffered in .ims and .pending together
+        prefilter (Prefilter): optional filter of frames of already accepted events
+
+    """
+
+    def __init__(self, kvy, tvy, vry, limit=MaxBuffered, prefilter=None):
+        """ Create incremental CESR ingester
+
+        Parameters:
+            kvy (Kevery): KEL event processor
+            tvy (Tevery): TEL event processor
+            vry (Verifier): credential verification processor
+            limit (int): maximum bytes buffered ahead of the parser
+            prefilter (Prefilter): optional filter of frames of already accepted events
+
+        """
+        self.parser = parsing.Parser(kvy=kvy, tvy=tvy, vry=vry)
+        self.limit = limit
+        self.prefilter = prefilter
+        self.ims = bytearray()
+        self.pending = bytearray()
+        self.parsator = None
+        self.size = 0
+
+    def feed(self, chunk):
+        """ Add chunk of the stream and parse every message it completes
+
+        Raises:
+            BufferLimitError: if more than .limit bytes are buffered ahead of the parser
+
+        """
+        self.size += len(chunk)
+        self.pending.extend(chunk)
+        self.release()
+        self.drain()
+
+        if len(self.ims) + len(self.pending) > self.limit:
+            raise BufferLimitError(f"more than {self.limit} bytes buffered ahead of the parser")
+
+    def release(self, final=False):
+        """ Move every complete frame in .pending to .ims, dropping those the prefilter knows
+
+        Parameters:
+            final (bool): True means no more bytes follow so the rest of .pending is released
+
+        """
+        start = 0
+        while start < len(self.pending):
+            frame = framing.reap(self.pending, start, final=final)
+            if frame is None:  # frame continues past the bytes received so far
+                break
+
+            if frame.size == 0 and not final:
+                # not a text domain JSON message, release up to the last message start since '{' never
+                # occurs in text domain attachments
+                idx = self.pending.rfind(b'{', start + 1)
+                if idx < 0:
+                    break
+                self.ims.extend(self.pending[start:idx])
+                start = idx
+                continue
+
+            if self.prefilter is None or self.prefilter.check(frame):
+                self.ims.extend(frame.raw)
+            start += len(frame.raw)
+
+        del self.pending[:start]
+
+    def drain(self):
+        """ Run the parser until it has consumed .ims or needs more bytes to make progress """
+        while self.ims:
+            if self.parsator is None:
+                self.parsator = self.parser.allParsator(ims=self.ims)
+
+            before = len(self.ims)
+            try:
+                next(self.parsator)
+            except StopIteration:
+                self.parsator = None
+                continue
+
+            if len(self.ims) == before:  # starved, wait for more bytes
+                break
+
+    def close(self):
+        """ Parse the rest of the stream after the last chunk
+
+        Returns:
+            int: number of trailing bytes that did not form a complete message
+
+        """
+        self.release(final=True)
+        self.drain()
+
+        if self.parsator is not None:
+            self.parsator.close()
+            self.parsator = None
+
+        left = len(self.ims)
+        self.ims.clear()
+        return left
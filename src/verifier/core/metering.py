@@ -0,0 +1,196 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.metering module
+
+Request metrics exported in the Prometheus text format
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+import falcon
+
+# upper bounds in seconds of the latency histogram buckets
+Buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# request processing stages with a latency histogram each
+Stages = ("read", "parse", "kel", "tel", "acdc", "write", "serialize")
+
+
+class Histogram:
+    """ Latency histogram with preallocated buckets
+
+    Observations only increment preallocated counters, so recording is cheap and takes no lock.  An
+    observation racing another on the same bucket may rarely be lost, which is fine for metrics.
+
+    """
+
+    def __init__(self, buckets=Buckets):
+        """ Create histogram
+
+        Parameters:
+            buckets (tuple): sorted upper bounds of the buckets, an implicit +Inf bucket follows
+
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """ Record one observation of value """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """ Returns list of (upper bound label, cumulative count) of every bucket including +Inf """
+        total = 0
+        buckets = []
+        for le, count in zip([str(bucket) for bucket in self.buckets] + ["+Inf"], self.counts):
+            total += count
+            buckets.append((le, total))
+
+        return buckets
+
+
+class Meter:
+    """ Registry of the verifier's metrics
+
+    Stage latencies are recorded in one preallocated Histogram per stage.  Request counters are keyed by
+    (endpoint, method, status).  Counters and gauges are callables evaluated only when the metrics are
+    rendered, counters return totals that only ever grow and gauges current values.
+
+    """
+
+    def __init__(self, stages=Stages, buckets=Buckets):
+        """ Create metrics registry
+
+        Parameters:
+            stages (tuple): names of the stages to record latencies of
+            buckets (tuple): upper bounds in seconds of the latency histogram buckets
+
+        """
+        self.stages = {stage: Histogram(buckets=buckets) for stage in stages}
+        self.requests = dict()  # (endpoint, method, status) to number of requests
+        self.received = dict()  # endpoint to request body bytes
+        self.sent = dict()  # endpoint to response body bytes
+        self.counters = dict()  # name to (help, callable returning the total so far, label)
+        self.gauges = dict()  # name to (help, callable returning the current value, label)
+
+    def observe(self, stage, seconds):
+        """ Record that stage took seconds """
+        self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """ Context manager recording the time spent in its block as one observation of stage """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage].observe(time.perf_counter() - start)
+
+    def timed(self, stage, fn):
+        """ Returns wrapper of fn that records the time spent in each call as one observation of stage """
+        histogram = self.stages[stage]
+
+        @wraps(fn)
+        def wrapper(*pa, **kwa):
+            start = time.perf_counter()
+            try:
+                return fn(*pa, **kwa)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    def count(self, endpoint, method, status, received=0, sent=0):
+        """ Count one request to endpoint and the bytes of its request and response bodies """
+        key = (endpoint, method, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.received[endpoint] = self.received.get(endpoint, 0) + received
+        self.sent[endpoint] = self.sent.get(endpoint, 0) + sent
+
+    def gauge(self, name, help, fn, label=None):
+        """ Register gauge name whose value is returned by calling fn when the metrics are rendered
+
+        With label fn returns dict of values keyed by the value of label, one series each.
+
+        """
+        self.gauges[name] = (help, fn, label)
+
+    def counter(self, name, help, fn, label=None):
+        """ Register counter name whose total so far is returned by calling fn when the metrics are rendered
+
+        Names of counters end in _total.  With label fn returns dict of totals keyed by the value of label,
+        one series each.
+
+        """
+        self.counters[name] = (help, fn, label)
+
+    def render(self):
+        """ Returns the metrics in the Prometheus text exposition format as str """
+        lines = ["# HELP verifier_stage_seconds Time spent in each request processing stage",
+                 "# TYPE verifier_stage_seconds histogram"]
+        for stage, histogram in self.stages.items():
+            for le, count in histogram.cumulative():
+                lines.append(f'verifier_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'verifier_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'verifier_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines.extend(["# HELP verifier_requests_total Requests handled by endpoint, method and status",
+                      "# TYPE verifier_requests_total counter"])
+        for (endpoint, method, status), count in list(self.requests.items()):
+            lines.append(f'verifier_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} '
+                         f'{count}')
+
+        for name, help, totals in (("verifier_request_bytes_total", "Request body bytes by endpoint", self.received),
+                                   ("verifier_response_bytes_total", "Response body bytes by endpoint", self.sent)):
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} counter"])
+            for endpoint, total in list(totals.items()):
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {total}')
+
+        for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+            for name, (help, fn, label) in list(metrics.items()):
+                lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}"])
+                if label is None:
+                    lines.append(f"{name} {fn()}")
+                else:
+                    lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in list(fn().items()))
+
+        return "\n".join(lines) + "\n"
+
+
+class MeterMiddleware:
+    """ Falcon middleware counting the requests and body bytes of every endpoint
+
+    Works with both falcon.App and falcon.asgi.App.
+
+    """
+
+    def __init__(self, meter):
+        """ Create metering middleware
+
+        Parameters:
+            meter (Meter): registry to count requests in
+
+        """
+        self.meter = meter
+
+    def process_response(self, req, rep, resource, req_succeeded):
+        endpoint = req.uri_template if req.uri_template is not None else "unmatched"
+        if rep.data is not None:
+            sent = len(rep.data)
+        elif rep.text is not None:
+            sent = len(rep.text.encode("utf-8"))
+        else:
+            sent = 0
+
+        self.meter.count(endpoint, req.method, falcon.http_status_to_code(rep.status),
+                         received=req.content_length or 0, sent=sent)
+
+    async def process_response_async(self, req, rep, resource, req_succeeded):
+        self.process_response(req, rep, resource, req_succeeded)
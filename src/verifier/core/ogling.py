@@ -0,0 +1,220 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.ogling module
+
+Non blocking, structured and sampled logging with per request correlation IDs
+"""
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import uuid
+from logging import handlers
+
+from keri import help
+
+# correlation ID of the request being handled, copied into the executor threads that verify it
+rid = contextvars.ContextVar("rid", default="-")
+
+
+class ContextFilter(logging.Filter):
+    """ Tags records with the request correlation ID and applies per module levels
+
+    keri modules all log through the same logger, so levels are matched against the module path of the
+    record rather than the logger name.  The level of each path is resolved once and cached.
+
+    """
+
+    def __init__(self, level=logging.INFO, levels=None):
+        """ Create context filter
+
+        Parameters:
+            level (int): level of modules without a level of their own
+            levels (dict): dotted module or package name, such as keri.core.eventing, to level
+
+        """
+        super(ContextFilter, self).__init__()
+        self.level = level
+        self.levels = sorted(((name.replace(".", "/"), lvl) for name, lvl in (levels or {}).items()),
+                             key=lambda item: len(item[0]), reverse=True)
+        self.thresholds = dict()  # record pathname to level
+
+    def threshold(self, pathname):
+        """ Returns level of the module at pathname, most specific configured name wins """
+        level = self.thresholds.get(pathname)
+        if level is None:
+            path = pathname.replace("\\", "/")
+            level = next((lvl for name, lvl in self.levels if f"/{name}/" in path or f"/{name}.py" in path),
+                         self.level)
+            self.thresholds[pathname] = level
+
+        return level
+
+    def filter(self, record):
+        record.rid = rid.get()
+        return record.levelno >= self.threshold(record.pathname)
+
+
+class DeferredQueueHandler(handlers.QueueHandler):
+    """ Queue handler that leaves all formatting to the listener thread
+
+    The stock QueueHandler formats each record before queueing it so it can be pickled.  Records here
+    never leave the process, so the caller only pays for creating the record and putting it on the queue.
+
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """ Formats records as one JSON object per line """
+
+    def format(self, record):
+        entry = dict(t=self.formatTime(record),
+                     level=record.levelname,
+                     module=record.module,
+                     rid=getattr(record, "rid", "-"),
+                     msg=record.getMessage())
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry)
+
+
+class Sampler:
+    """ Lets through one in every 1/rate events so high volume events can be logged cheaply
+
+    Attributes:
+        rate (float): fraction of events let through, 0 lets none through and 1 lets all through
+
+    """
+
+    def __init__(self, rate=0.01):
+        self.rate = rate
+        self.every = round(1 / rate) if rate > 0 else 0
+        self.count = 0
+
+    def sample(self):
+        """ Returns True if this event should be logged """
+        if not self.every:
+            return False
+
+        self.count += 1
+        return self.count % self.every == 0
+
+
+sampler = Sampler()  # sampler of per cue events
+_listener = None
+_handlers = None  # handlers of help.ogler before logging was routed through the queue
+
+
+def configure(level=logging.INFO, levels=None, fmt="text", sample=0.01):
+    """ Route every logger handed out by help.ogler through a queue drained by a background thread
+
+    The console and file handlers of help.ogler are moved behind a QueueListener, and help.ogler hands
+    out the queue handler from now on, so loggers created later are routed through the queue too.
+
+    Parameters:
+        level (int | str): level of modules without a level of their own
+        levels (dict): dotted module or package name to level
+        fmt (str): text for the keri text format with the correlation ID, json for JSON lines
+        sample (float): fraction of high volume per cue events that are logged
+
+    """
+    global _listener, _handlers, sampler
+
+    ogler = help.ogler
+    level = logging.getLevelName(level) if isinstance(level, str) else level
+    levels = {name: logging.getLevelName(lvl) if isinstance(lvl, str) else lvl
+              for name, lvl in (levels or {}).items()}
+
+    shutdown()
+    if _handlers is None:
+        _handlers = [ogler.baseConsoleHandler]
+        if ogler.filed and ogler.opened:
+            _handlers.append(ogler.baseFileHandler)
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(f"{ogler.prefix}: [%(rid)s] %(message)s")
+    for handler in _handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(ContextFilter(level=level, levels=levels))
+    _listener = handlers.QueueListener(records, *_handlers)
+    _listener.start()
+
+    lowest = min([level] + list(levels.values()))
+    for logger in list(logging.root.manager.loggerDict.values()):
+        if not isinstance(logger, logging.Logger):
+            continue
+        routed = [h for h in logger.handlers
+                  if h in _handlers or isinstance(h, DeferredQueueHandler) or h is ogler.baseSysLogHandler]
+        if routed:
+            for h in routed:
+                logger.removeHandler(h)
+            logger.addHandler(handler)
+            logger.setLevel(lowest)
+
+    ogler.baseConsoleHandler = handler
+    ogler.filed = False
+    ogler.syslogged = False
+    ogler.level = lowest
+
+    sampler = Sampler(rate=sample)
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """ Stop the background thread after it has written every queued record """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def parse(spec):
+    """ Returns dict of module name to level name from spec of the form name=LEVEL,name=LEVEL """
+    levels = dict()
+    for item in (spec or "").split(","):
+        if item.strip():
+            name, _, level = item.partition("=")
+            levels[name.strip()] = level.strip().upper()
+
+    return levels
+
+
+class RequestIdMiddleware:
+    """ Falcon middleware giving each request a correlation ID for its log records
+
+    The ID is taken from the X-Request-ID request header when present, else generated, and is echoed in
+    the X-Request-ID response header.  It is cleared again once the response is processed, so records
+    logged between requests by the same thread are not attributed to the last request.  Works with both
+    falcon.App and falcon.asgi.App.
+
+    """
+
+    Header = "X-Request-ID"
+
+    def process_request(self, req, rep):
+        ident = req.get_header(self.Header)
+        req.context.rid = rid.set(ident[:64] if ident else uuid.uuid4().hex[:16])
+
+    def process_response(self, req, rep, resource, req_succeeded):
+        token = req.context.get("rid")
+        if token is not None:
+            rep.set_header(self.Header, rid.get())
+            rid.reset(token)
+
+    async def process_request_async(self, req, rep):
+        self.process_request(req, rep)
+
+    async def process_response_async(self, req, rep, resource, req_succeeded):
+        self.process_response(req, rep, resource, req_succeeded)
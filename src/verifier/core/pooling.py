@@ -0,0 +1,442 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.pooling module
+
+Pool of reusable verification contexts so concurrent requests do not share cue sinks
+"""
+import contextvars
+import logging
+import queue
+import threading
+from concurrent import futures
+from contextlib import contextmanager, nullcontext
+
+import lmdb
+from keri import help
+from keri.core import eventing as keventing, parsing
+from keri.vdr import eventing
+
+from verifier.core import batching, caching, chaining, filtering, framing, ingesting, metering, ogling
+
+logger = help.ogler.getLogger()
+
+
+class VerificationContext:
+    """ Set of KEL, TEL and ACDC processors with private cue sinks
+
+    Each context processes one CESR stream at a time.  The processors share the KEL and TEL state
+    held in the Habery and Reger databases with every other context, but their cues are private so
+    the results of one request can never be drained by another.
+
+    The key and registry state held in memory, the Kevers, Tevers and escrows, is shared by the contexts
+    of a process and keripy does not guard it, so parsing holds .guard, shared by those contexts, and
+    the contexts of a process never parse at the same time.  Reading request bodies, digesting them and
+    serializing responses stay concurrent.  When other processes write to the same databases every
+    stream first drops that state, see .refresh, holding .guard as well.
+
+    """
+
+    def __init__(self, hby, reger, local=False, shared=False, prefilter=None, chains=None, batcher=None,
+                 meter=None, guard=None):
+        """ Create verification context
+
+        Parameters:
+            hby (Habery): Database environment for exposed KERI AIDs
+            reger (Reger): Database environment for credential registries
+            local (bool): True means only process TEL events for local registries
+            shared (bool): True means other processes write to the same databases
+            prefilter (Prefilter): optional filter dropping already accepted events before parsing
+            chains (ChainCache): optional cache of credential validation results shared by contexts
+            batcher (BatchVerifier): optional verifier of signatures in a batch ahead of parsing
+            meter (Meter): optional registry to record the latency of each processing stage in
+            guard (Lock): lock shared by the contexts of the process held while refreshing and parsing, a new
+                          one when None
+
+        """
+        self.hby = hby
+        self.reger = reger
+        self.shared = shared
+        self.guard = guard if guard is not None else threading.Lock()
+        self.prefilter = prefilter
+        self.batcher = batcher
+        self.kvy = keventing.Kevery(db=hby.db, lax=False, local=True, rvy=hby.rvy)
+        self.tvy = eventing.Tevery(reger=reger, db=hby.db, local=local)
+        self.vry = chaining.ChainVerifier(hby=hby, reger=reger, chains=chains)
+        self.meter = meter
+
+        if meter is not None:  # the parser and the processors look these up on the instances
+            self.kvy.processEvent = meter.timed("kel", self.kvy.processEvent)
+            self.tvy.processEvent = meter.timed("tel", self.tvy.processEvent)
+            self.vry.processCredential = meter.timed("acdc", self.vry.processCredential)
+            self.vry.saveCredential = meter.timed("write", self.vry.saveCredential)
+
+        if batcher is not None:  # answers the signatures it verified ahead of parsing
+            batcher.attach(self.kvy)
+
+    def verify(self, ims):
+        """ Parse CESR stream and collect the results from this context's cues
+
+        Parameters:
+            ims (bytes | bytearray): CESR stream of KEL, TEL and ACDC messages, a bytearray is consumed
+                                     in place by the parser instead of being copied
+
+        Returns:
+            tuple: (creders, revoked) where creders is list of Creder of the credentials saved while
+                   parsing ims and revoked is list of qb64 SAIDs of credentials revoked by TEL events in ims
+
+        """
+        self.reset()
+        with self.guarded():
+            if self.shared:
+                self.refresh()
+
+            frames = framing.split(ims) if self.prefilter is not None or self.batcher is not None else []
+            if self.prefilter is not None:
+                kept = [frame for frame in frames if self.prefilter.check(frame)]
+                if len(kept) < len(frames):
+                    ims = framing.join(kept, buf=ims)
+                frames = kept
+
+            with self.presigned(frames), self.timer("parse"):
+                parsing.Parser().parse(ims=ims,
+                                       kvy=self.kvy,
+                                       tvy=self.tvy,
+                                       vry=self.vry)
+
+        return self.collect()
+
+    def ingest(self, chunks, limit=ingesting.MaxBuffered):
+        """ Parse CESR stream incrementally as its chunks arrive and collect the results
+
+        Parameters:
+            chunks (Iterable): chunks of the CESR stream as bytes
+            limit (int): maximum bytes buffered ahead of the parser
+
+        Returns:
+            tuple: (creders, revoked) as returned by .verify
+
+        Raises:
+            BufferLimitError: if more than limit bytes are buffered ahead of the parser
+
+        """
+        ingester = self.ingester(limit=limit)
+        for chunk in chunks:
+            self.feed(ingester, chunk)
+
+        return self.finish(ingester)
+
+    def ingester(self, limit=ingesting.MaxBuffered):
+        """ Returns Ingester feeding this context's processors for a stream whose chunks arrive later
+
+        Parameters:
+            limit (int): maximum bytes buffered ahead of the parser
+
+        """
+        self.reset()
+        if self.shared:
+            with self.guarded():
+                self.refresh()
+
+        return ingesting.Ingester(kvy=self.kvy, tvy=self.tvy, vry=self.vry, limit=limit,
+                                  prefilter=self.prefilter)
+
+    def feed(self, ingester, chunk):
+        """ Parse the messages completed by the next chunk of the stream fed to ingester """
+        with self.guarded(), self.timer("parse"):
+            ingester.feed(chunk)
+
+    def finish(self, ingester):
+        """ Parse the rest of the stream fed to ingester and collect the results
+
+        Returns:
+            tuple: (creders, revoked) as returned by .verify
+
+        """
+        with self.guarded(), self.timer("parse"):
+            ingester.close()
+
+        return self.collect()
+
+    def batch(self, items):
+        """ Verify many independent CESR streams together
+
+        The streams are split into frames and each distinct frame is parsed once for the whole batch, so
+        issuer KEL and TEL events shared by several items are processed only once.  The credentials
+        saved from a frame are credited to every item that contains that frame.  Frames of events that
+        have already been accepted are not parsed at all.  A frame that neither saved a credential nor
+        was accepted, such as a credential escrowed for want of its issuer KEL, is parsed again in every
+        later item containing it, so it is credited to the item that supplies what it depends on.
+
+        Parameters:
+            items (list): CESR streams as bytes
+
+        Returns:
+            tuple: (results, revoked) where results has for each item either the list of Creder of its
+                   credentials or the Exception raised while verifying it, and revoked is list of qb64
+                   SAIDs of credentials revoked by TEL events in any item
+
+        """
+        self.reset()
+        with self.guarded():
+            if self.shared:
+                self.refresh()
+
+            known = (self.prefilter if self.prefilter is not None
+                     else filtering.Prefilter(db=self.hby.db, reger=self.reger))
+            seen = dict()  # frame bytes to creders saved from it, for the frames done with
+            fresh = dict()  # frame bytes to frame of the distinct frames left to parse in stream order
+            splits = []
+            for ims in items:
+                try:
+                    frames = framing.split(ims)
+                except Exception as ex:
+                    splits.append(ex)
+                    continue
+
+                splits.append(frames)
+                for frame in frames:
+                    if frame.raw in seen or frame.raw in fresh:
+                        continue
+                    if self.prefilter is not None and not self.prefilter.check(frame):
+                        seen[frame.raw] = []
+                    else:
+                        fresh[frame.raw] = frame
+
+            results = []
+            revoked = []
+            with self.presigned(list(fresh.values())):
+                for frames in splits:
+                    if isinstance(frames, Exception):
+                        results.append(frames)
+                        continue
+
+                    try:
+                        creders = []
+                        for frame in frames:
+                            if frame.raw not in seen:
+                                with self.timer("parse"):
+                                    parsing.Parser().parse(ims=frame.raw,
+                                                           kvy=self.kvy,
+                                                           tvy=self.tvy,
+                                                           vry=self.vry)
+                                saved, revs = self.collect()
+                                revoked.extend(revs)
+                                if saved or known.known(frame):
+                                    seen[frame.raw] = saved
+                                creders.extend(saved)
+                            else:
+                                creders.extend(seen[frame.raw])
+
+                        results.append(creders)
+
+                    except Exception as ex:
+                        self.reset()
+                        results.append(ex)
+
+        return results, revoked
+
+    def presigned(self, frames):
+        """ Returns context manager that batch verifies the signatures of frames when batching is enabled
+
+        Parameters:
+            frames (list): Frame of each message about to be parsed in this thread in stream order
+
+        """
+        if self.batcher is None:
+            return nullcontext()
+
+        return self.batcher.verified(frames)
+
+    def guarded(self):
+        """ Returns context manager holding .guard in its block """
+        return self.guard
+
+    def timer(self, stage):
+        """ Returns context manager recording the time spent in its block for stage when metering """
+        return self.meter.timer(stage) if self.meter is not None else nullcontext()
+
+    def depth(self):
+        """ Returns number of cues waiting in this context's processors """
+        return len(self.kvy.cues) + len(self.tvy.cues) + len(self.vry.cues)
+
+    def collect(self):
+        """ Drain cues into results, returns (creders, revoked) as described in .verify """
+        creders = []
+        while self.vry.cues:
+            msg = self.vry.cues.popleft()
+            if logger.isEnabledFor(logging.DEBUG) and ogling.sampler.sample():
+                logger.debug("Verifier cue %s", msg)
+            if "kin" in msg:
+                if msg["kin"] == "saved":
+                    if "creder" in msg:
+                        creders.append(msg["creder"])
+
+        revoked = []
+        while self.tvy.cues:
+            cue = self.tvy.cues.popleft()
+            if cue.get("kin") == "revoked":
+                revoked.append(cue["serder"].pre)
+
+        self.reset()
+        return creders, revoked
+
+    def reset(self):
+        """ Clear all cues so the context can be reused for the next request """
+        self.kvy.cues.clear()
+        self.tvy.cues.clear()
+        self.vry.cues.clear()
+
+    def refresh(self):
+        """ Drop in memory key and registry state so it is reloaded from the databases
+
+        When other processes write to the same databases the Kevers and Tevers held in memory may be
+        stale.  Both caches read through to the databases on a miss, so clearing them makes the next
+        lookup see the state accepted by any process.  Both are shared by every context, so this is
+        only called holding .guard, which every other context holds while parsing.
+
+        """
+        dict.clear(self.hby.db.kevers)
+        dict.clear(self.reger.tevers)
+
+
+class ContextPool:
+    """ Pool of reusable verification contexts served by a thread pool executor
+
+    Contexts are created once up front and handed out to one request at a time, so several
+    presentations can be verified at once without any of them seeing the cues of another.
+
+    Attributes:
+        pending (int): verifications submitted and not yet finished, running or waiting for a context
+
+    """
+
+    def __init__(self, hby, reger, size=4, local=False, shared=False, prefilter=True, chainSize=4096, signers=0,
+                 meter=None):
+        """ Create pool of verification contexts
+
+        Parameters:
+            hby (Habery): Database environment for exposed KERI AIDs
+            reger (Reger): Database environment for credential registries
+            size (int): number of contexts and of executor threads
+            local (bool): True means only process TEL events for local registries
+            shared (bool): True means other processes write to the same databases
+            prefilter (bool): True means drop already accepted KEL and TEL events before parsing
+            chainSize (int): maximum number of cached credential validation results, 0 disables the cache
+            signers (int): number of threads verifying the signatures of a stream in a batch, 0 disables it
+            meter (Meter): registry to record the latency of each processing stage in, a new one if None
+
+        """
+        self.hby = hby
+        self.reger = reger
+        self.size = size
+        self.prefilter = filtering.Prefilter(db=hby.db, reger=reger) if prefilter else None
+        self.chains = caching.ChainCache(maxsize=chainSize) if chainSize > 0 else None
+        self.batcher = batching.BatchVerifier(db=hby.db, workers=signers) if signers > 0 else None
+        self.meter = meter if meter is not None else metering.Meter()
+        guard = threading.Lock()  # the contexts parse against the same Kevers, Tevers and escrows
+        self.members = [VerificationContext(hby=hby, reger=reger, local=local, shared=shared,
+                                            prefilter=self.prefilter, chains=self.chains, batcher=self.batcher,
+                                            meter=self.meter, guard=guard)
+                        for _ in range(size)]
+        self.contexts = queue.Queue()
+        for ctx in self.members:
+            self.contexts.put(ctx)
+
+        self.executor = futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix="verifier")
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.full = False  # True once a verification failed for lack of space in a database map
+        self.doers = []  # background doers maintaining the state the contexts verify against, run by the caller
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """ Context manager that checks a verification context out of the pool and returns it after
+
+        Parameters:
+            timeout (float): seconds to wait for a free context, None waits forever
+
+        """
+        ctx = self.checkout(timeout=timeout)
+        try:
+            yield ctx
+        finally:
+            self.checkin(ctx)
+
+    def checkout(self, timeout=None):
+        """ Returns a verification context taken out of the pool, it must be given back with .checkin
+
+        Parameters:
+            timeout (float): seconds to wait for a free context, None waits forever
+
+        """
+        return self.contexts.get(timeout=timeout)
+
+    def checkin(self, ctx):
+        """ Return verification context ctx taken out with .checkout to the pool """
+        ctx.reset()
+        self.contexts.put(ctx)
+
+    def submit(self, fn, *args, **kwa):
+        """ Schedule fn(ctx, *args, **kwa) on the executor with a context checked out of the pool
+
+        Returns:
+            Future: resolves to the return value of fn
+
+        """
+        def run():
+            with self.acquire() as ctx:
+                try:
+                    return fn(ctx, *args, **kwa)
+                except lmdb.MapFullError:
+                    self.full = True
+                    raise
+
+        with self.lock:
+            self.pending += 1
+
+        fu = self.executor.submit(contextvars.copy_context().run, run)  # keeps the request correlation ID
+        fu.add_done_callback(self.done)
+        return fu
+
+    def done(self, fu):
+        """ Count verification future fu submitted with .submit as finished """
+        with self.lock:
+            self.pending -= 1
+
+    def verify(self, ims):
+        """ Verify CESR stream ims in a pooled context and block until finished
+
+        Returns:
+            tuple: (creders, revoked) as returned by VerificationContext.verify
+
+        """
+        return self.submit(VerificationContext.verify, ims).result()
+
+    def ingest(self, chunks, limit=ingesting.MaxBuffered):
+        """ Verify CESR stream incrementally from chunks in a pooled context and block until finished
+
+        Returns:
+            tuple: (creders, revoked) as returned by VerificationContext.verify
+
+        """
+        return self.submit(VerificationContext.ingest, chunks, limit=limit).result()
+
+    def batch(self, items):
+        """ Verify many CESR streams together in a pooled context and block until finished
+
+        Returns:
+            tuple: (results, revoked) as returned by VerificationContext.batch
+
+        """
+        return self.submit(VerificationContext.batch, items).result()
+
+    def depth(self):
+        """ Returns number of cues waiting in the processors of all contexts """
+        return sum(ctx.depth() for ctx in self.members)
+
+    def close(self):
+        """ Shut down the executor waiting for scheduled verifications to finish """
+        self.executor.shutdown(wait=True)
+        if self.batcher is not None:
+            self.batcher.close()
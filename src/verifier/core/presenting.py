@@ -0,0 +1,120 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.presenting module
+
+Credential presentation records and their entity tags
+"""
+from keri import kering
+from keri.core import coring, serdering
+from keri.db import dbing
+
+from verifier.core import basing, chaining
+
+
+class Presenter:
+    """ Records credential presentations and recognizes a presentation already accepted
+
+    Each accepted presentation records when it happened in vdb.iss and the digest of the request body
+    in vdb.digs.  A credential presented again with the same body while its TEL is unchanged would verify
+    exactly as before, so it is accepted from those records without parsing the body.  The entity tag of
+    a presentation combines the body digest and the digests of the latest TEL events of the credential and
+    of every credential it chains to, so it changes as soon as any credential of the chain is revoked.
+
+    The issuer, registry, schema, time of the last presentation and time of revocation of each presented
+    credential are kept together in one vdb.pres record, so the status of a presentation is answered by a
+    single read.  Records are marked revoked as revocations are processed.
+
+    """
+
+    def __init__(self, vdb, reger):
+        """ Create presentation recorder
+
+        Parameters:
+            vdb (VerifierBaser): verifier database holding the presentations
+            reger (Reger): credential registry database holding the TEL state of the credentials
+
+        """
+        self.vdb = vdb
+        self.reger = reger
+
+    def state(self, said):
+        """ Returns (dig, ilk) of the latest TEL event of credential said, (None, None) if it has none """
+        dig = None
+        for _, dig in self.reger.getTelItemPreIter(pre=said.encode("utf-8")):
+            pass
+
+        if dig is None:
+            return None, None
+
+        raw = self.reger.getTvt(dbing.dgKey(said, bytes(dig)))
+        ilk = serdering.SerderKERI(raw=bytes(raw)).ilk if raw is not None else None
+        return bytes(dig), ilk
+
+    def tag(self, said, dig=None):
+        """ Returns quoted entity tag of the presentation of credential said with body digest dig
+
+        Parameters:
+            said (str): qb64 SAID of the credential
+            dig (str): qb64 digest of the presented body, the digest recorded for said when None
+
+        Returns:
+            str: entity tag, None if said was never presented with body dig, has no TEL state or it or a
+                 credential it chains to is revoked
+
+        """
+        diger = self.vdb.digs.get(keys=(said,))
+        if diger is None or (dig is not None and diger.qb64 != dig):
+            return None
+
+        chain = chaining.state(self.reger, said)
+        if chain[0][1] is None or any(ilk in (kering.Ilks.rev, kering.Ilks.brv) for _, _, ilk in chain):
+            return None
+
+        tel = b"".join(dig if dig is not None else b"" for _, dig, _ in chain)
+        return f'"{coring.Diger(ser=diger.qb64b + tel).qb64}"'
+
+    def record(self, said, dig=None, creder=None):
+        """ Record that credential said was presented now
+
+        Parameters:
+            said (str): qb64 SAID of the credential
+            dig (str): qb64 digest of the presented body when known
+            creder (SerderACDC): the verified credential, None when accepted again from the records
+
+        """
+        dater = coring.Dater()
+        self.vdb.iss.pin(keys=(said,), val=dater)
+        if dig is not None:
+            self.vdb.digs.pin(keys=(said,), val=coring.Diger(qb64=dig))
+
+        if creder is not None:
+            _, ilk = self.state(said)
+            rec = basing.PresentationRecord(issuer=creder.issuer, registry=creder.regi, schema=creder.schema,
+                                            date=dater.dts,
+                                            revoked=dater.dts if ilk in (kering.Ilks.rev, kering.Ilks.brv) else None)
+        else:
+            rec = self.vdb.pres.get(keys=(said,))
+            if rec is None:
+                return
+            rec.date = dater.dts
+
+        self.vdb.pres.pin(keys=(said,), val=rec)
+
+    def revoke(self, saids):
+        """ Mark the presentations of the credentials with SAIDs saids revoked
+
+        Presentations marked revoked are escrowed in vdb.rev for the Revoker to remove their remaining records.
+
+        """
+        for said in saids:
+            rec = self.vdb.pres.get(keys=(said,))
+            if rec is not None and rec.revoked is None:
+                dater = coring.Dater()
+                rec.revoked = dater.dts
+                self.vdb.pres.pin(keys=(said,), val=rec)
+                self.vdb.rev.put(keys=(said,), val=dater)
+
+    def lookup(self, said):
+        """ Returns PresentationRecord of credential said, None if it was never presented """
+        return self.vdb.pres.get(keys=(said,))
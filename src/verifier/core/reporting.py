@@ -0,0 +1,487 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.reporting module
+
+Storage of uploaded reports in fixed size chunks with their status indexed by submitter and status, and
+verification of the signatures in their META-INF/reports.json manifests
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import posixpath
+import zipfile
+from concurrent import futures
+from contextlib import contextmanager
+from dataclasses import asdict
+
+import blake3
+import lmdb
+from hio.base import doing
+from keri import help
+from keri.core import coring
+
+from verifier.core import basing
+
+logger = help.ogler.getLogger()
+
+Manifest = "META-INF/reports.json"  # manifest listing the signatures of the files of a report package
+ChunkSize = 64 * 1024  # bytes of report data stored per vdb.imgs entry
+MaxReportSize = 512 * 1024 * 1024  # largest report accepted in bytes
+
+# incremental hash of each digest code a report may be uploaded with, the same digests coring.Diger computes
+Hashers = {
+    coring.MtrDex.Blake3_256: lambda: blake3.blake3(),
+    coring.MtrDex.Blake2b_256: lambda: hashlib.blake2b(digest_size=32),
+    coring.MtrDex.Blake2s_256: lambda: hashlib.blake2s(digest_size=32),
+    coring.MtrDex.SHA3_256: lambda: hashlib.sha3_256(),
+    coring.MtrDex.SHA2_256: lambda: hashlib.sha256(),
+}
+
+
+class ReportStatus:
+    """ Status of an uploaded report, also the keys of its vdb.stts index """
+
+    accepted = "accepted"
+    verifying = "verifying"
+    verified = "verified"
+    failed = "failed"
+
+
+class ReportSizeError(ValueError):
+    """ Raised when an uploaded report is larger than the configured maximum """
+
+
+def key(dig, idx):
+    """ Returns vdb.imgs key of chunk idx of report dig, hex ordinals keep the chunks of a report in order """
+    return f"{dig}.{idx:08x}".encode("utf-8")
+
+
+class Filer:
+    """ Stores uploaded reports and their ReportStats in the verifier database
+
+    Report data is stored in vdb.imgs in chunks of .chunkSize bytes keyed by the qb64 digest of the
+    report and the chunk index.  The ReportStats of each report is in vdb.stats, and the digests of the
+    reports are indexed by submitter AID in vdb.rpts and by status in vdb.stts.
+
+    """
+
+    def __init__(self, vdb, chunkSize=ChunkSize, maxSize=MaxReportSize):
+        """ Create report storage
+
+        Parameters:
+            vdb (VerifierBaser): verifier database to store reports in
+            chunkSize (int): bytes of report data stored per vdb.imgs entry
+            maxSize (int): largest report accepted in bytes
+
+        """
+        self.vdb = vdb
+        self.chunkSize = chunkSize
+        self.maxSize = maxSize
+
+    def get(self, dig):
+        """ Returns ReportStats of report dig, None if there is no such report """
+        return self.vdb.stats.get(keys=(dig,))
+
+    def reports(self, aid):
+        """ Returns list of (dig, ReportStats) of every report uploaded by submitter aid """
+        reports = []
+        for diger in self.vdb.rpts.get(keys=(aid,)):
+            stats = self.get(diger.qb64)
+            if stats is not None:
+                reports.append((diger.qb64, stats))
+
+        return reports
+
+    def data(self, dig):
+        """ Generator yielding the chunks of the data of report dig in order """
+        for _, chunk in self.vdb.getTopItemIter(db=self.vdb.imgs, key=f"{dig}.".encode("utf-8")):
+            yield bytes(chunk)
+
+    def upload(self, aid, dig, filename=None, contentType=None):
+        """ Returns Upload storing the data of report dig from submitter aid as it arrives
+
+        Raises:
+            ValueError: if dig is not a qb64 digest of a supported code
+
+        """
+        try:
+            diger = coring.Diger(qb64=dig)
+        except Exception as ex:
+            raise ValueError(f"invalid report digest {dig}: {ex}") from ex
+
+        if diger.code not in Hashers:
+            raise ValueError(f"unsupported report digest code {diger.code}")
+
+        return Upload(self, aid, diger, filename=filename, contentType=contentType)
+
+    def update(self, dig, status, message=""):
+        """ Move report dig to status with message, updating its vdb.stts index
+
+        Returns:
+            ReportStats: updated statistics, None if there is no such report
+
+        """
+        stats = self.get(dig)
+        if stats is None:
+            return None
+
+        diger = coring.Diger(qb64=dig)
+        if stats.status != status:
+            self.vdb.stts.rem(keys=(stats.status,), val=diger)
+            self.vdb.stts.add(keys=(status,), val=diger)
+
+        stats.status = status
+        stats.message = message
+        self.vdb.stats.pin(keys=(dig,), val=stats)
+        return stats
+
+    @staticmethod
+    def json(dig, stats):
+        """ Returns dict of ReportStats stats of report dig for a JSON response """
+        return dict(dig=dig, **asdict(stats))
+
+
+class Upload:
+    """ Stores the data of one report in fixed size chunks as it arrives while digesting it
+
+    Bytes written are collected into one buffer of .filer.chunkSize bytes that is stored as the next
+    vdb.imgs chunk whenever it fills, so the upload holds no more than one chunk of the report.  On
+    .finish the digest of everything written is compared with the digest the report was uploaded as, and
+    only a report whose data matches is recorded as accepted.
+
+    """
+
+    def __init__(self, filer, aid, diger, filename=None, contentType=None):
+        """ Start upload of a report, see Filer.upload """
+        self.filer = filer
+        self.aid = aid
+        self.diger = diger
+        self.filename = filename
+        self.contentType = contentType
+        self.hasher = Hashers[diger.code]()
+        self.buf = bytearray()
+        self.idx = 0
+        self.size = 0
+
+    def write(self, data):
+        """ Store bytes data of the report
+
+        Raises:
+            ReportSizeError: if the report grows larger than the maximum report size
+
+        """
+        self.size += len(data)
+        if self.size > self.filer.maxSize:
+            raise ReportSizeError(f"report larger than {self.filer.maxSize} bytes")
+
+        self.hasher.update(data)
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.filer.chunkSize - len(self.buf))
+            self.buf += view[:take]
+            view = view[take:]
+            if len(self.buf) == self.filer.chunkSize:
+                self.flush()
+
+    def flush(self):
+        """ Store the buffered bytes as the next chunk """
+        if self.buf:
+            self.filer.vdb.setVal(db=self.filer.vdb.imgs, key=key(self.diger.qb64, self.idx), val=bytes(self.buf))
+            self.idx += 1
+            self.buf.clear()
+
+    def finish(self):
+        """ Store the last chunk and record the report as accepted if its data matches its digest
+
+        Returns:
+            ReportStats: statistics of the report
+
+        Raises:
+            ValueError: if the data does not match the digest, in which case its chunks are removed
+
+        """
+        self.flush()
+        dig = self.diger.qb64
+        if self.hasher.digest() != self.diger.raw:
+            self.abort()
+            raise ValueError(f"report data does not match digest {dig}")
+
+        vdb = self.filer.vdb
+        stats = basing.ReportStats(submitter=self.aid, filename=self.filename, status=ReportStatus.accepted,
+                                   contentType=self.contentType, size=self.size, date=help.nowIso8601())
+        vdb.stats.pin(keys=(dig,), val=stats)
+        vdb.rpts.add(keys=(self.aid,), val=self.diger)
+        vdb.stts.add(keys=(ReportStatus.accepted,), val=self.diger)
+        return stats
+
+    def abort(self):
+        """ Remove the chunks stored so far """
+        self.buf.clear()
+        self.filer.vdb.delTopVal(db=self.filer.vdb.imgs, key=f"{self.diger.qb64}.".encode("utf-8"))
+
+
+class ReportFile(io.RawIOBase):
+    """ Read only, seekable file over the chunks of a stored report, for reading its zip entries in place """
+
+    def __init__(self, chunk, size):
+        """ Create file over report chunks
+
+        Parameters:
+            chunk (Callable): returns the bytes of chunk idx, all but the last of the same size
+            size (int): size of the report in bytes
+
+        """
+        super(ReportFile, self).__init__()
+        self.chunk = chunk
+        self.size = size
+        self.chunkSize = max(len(chunk(0) or b""), 1)
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.size}[whence]
+        self.pos = max(base + offset, 0)
+        return self.pos
+
+    def readinto(self, b):
+        if self.pos >= self.size:
+            return 0
+
+        idx, off = divmod(self.pos, self.chunkSize)
+        data = self.chunk(idx)
+        n = min(len(b), len(data) - off)
+        b[:n] = data[off:off + n]
+        self.pos += n
+        return n
+
+
+@contextmanager
+def archive(env, dig, size):
+    """ Context manager yielding ZipFile reading report dig of size bytes from its vdb.imgs chunks in env
+
+    Everything is read in one read transaction of LMDB environment env that ends with the context.
+
+    """
+    db = env.open_db(key=b'imgs.', create=False)
+    with env.begin(db=db) as txn:
+        raw = ReportFile(lambda idx: txn.get(key(dig, idx)), size)
+        with zipfile.ZipFile(io.BufferedReader(raw, buffer_size=raw.chunkSize)) as z:
+            yield z
+
+
+def digest(env, dig, size, name, verfers, sigs):
+    """ Returns (digest, indices) of zip entry name of report dig and the indices of its valid sigs
+
+    Parameters:
+        env (lmdb.Environment): environment of the verifier database holding the report chunks
+        dig (str): qb64 digest of the report
+        size (int): size of the report in bytes
+        name (str): name of the zip entry to digest
+        verfers (list): qb64 of the current signing keys of the signer
+        sigs (list): qb64 indexed signatures of the entry
+
+    """
+    with archive(env, dig, size) as z:
+        data = z.read(name)
+
+    indices = []
+    for sig in sigs:
+        siger = coring.Siger(qb64=sig)
+        if siger.index < len(verfers) and coring.Verfer(qb64=verfers[siger.index]).verify(siger.raw, data):
+            indices.append(siger.index)
+
+    return coring.Diger(ser=data).qb64, indices
+
+
+_envs = dict()  # verifier database environments opened read only in a worker process, keyed by path
+
+
+def check(path, dig, size, name, verfers, sigs):
+    """ Worker process version of digest opening the verifier database at path once per process """
+    env = _envs.get(path)
+    if env is None:
+        env = _envs[path] = lmdb.open(path, readonly=True, max_dbs=basing.VerifierBaser.MaxNamedDBs)
+
+    return digest(env, dig, size, name, verfers, sigs)
+
+
+class ReportVerifier(doing.Doer):
+    """ Verifies the signatures of uploaded report packages one report at a time
+
+    A report package is a zip with a META-INF/reports.json manifest whose documentInfo.signatures lists,
+    for each file in the reports directory next to META-INF, the AID of the signer and its indexed
+    signatures on the file.  An accepted report moves to verifying while its files are read from their
+    zip entries in place, digested and their signatures verified in a pool of worker processes, and then
+    to verified if every file has signatures satisfying the current signing threshold of its signer, or
+    to failed otherwise.  The result of each file is kept in ReportStats.files.
+
+    Runs never wait for the workers, so the event loop keeps serving requests while reports are verified.
+
+    """
+
+    def __init__(self, hby, filer, workers=None, tock=1.0, **kwa):
+        """ Create report verifier
+
+        Parameters:
+            hby (Habery): database environment with the key state of the signers
+            filer (Filer): storage of uploaded reports
+            workers (int): number of worker processes, None for one per core and 0 to verify in this process
+            tock (float): seconds between runs
+
+        """
+        self.hby = hby
+        self.filer = filer
+        self.workers = workers
+        self.executor = None
+        self.pending = None  # (dig, files, results) of the report being verified
+        self.verified = 0
+        self.failed = 0
+        super(ReportVerifier, self).__init__(tock=tock, **kwa)
+
+    def exit(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def recur(self, tyme):
+        if self.pending is None:
+            self.start()
+        elif all(result.done() for _, _, result in self.pending[2]):
+            self.finish()
+
+        return False
+
+    def next(self):
+        """ Returns qb64 digest of the next report to verify, None if there is none """
+        vdb = self.filer.vdb
+        for status in (ReportStatus.verifying, ReportStatus.accepted):  # reports interrupted by a restart first
+            for diger in vdb.stts.get(keys=(status,)):
+                return diger.qb64
+
+        return None
+
+    def entries(self, dig, stats):
+        """ Returns (files, signatures) of the package of report dig
+
+        files is the list of the zip entry names in the reports directory and signatures maps each signed
+        entry name to (aid, sigs) from the manifest.
+
+        Raises:
+            ValueError: if the report is not a zip or has no manifest
+
+        """
+        try:
+            with archive(self.filer.vdb.env, dig, stats.size) as z:
+                names = z.namelist()
+                manifests = [name for name in names if name == Manifest or name.endswith("/" + Manifest)]
+                if not manifests:
+                    raise ValueError(f"no {Manifest} in report")
+
+                manifest = manifests[0]
+                doc = json.loads(z.read(manifest))
+        except zipfile.BadZipFile as ex:
+            raise ValueError(f"report is not a zip file: {ex}") from ex
+
+        meta = posixpath.dirname(manifest)
+        reports = posixpath.join(posixpath.dirname(meta), "reports") + "/" if posixpath.dirname(meta) else "reports/"
+        files = [name for name in names if name.startswith(reports) and not name.endswith("/")]
+
+        signatures = dict()
+        for entry in doc.get("documentInfo", dict()).get("signatures", []):
+            name = posixpath.normpath(posixpath.join(meta, entry["file"]))
+            signatures[name] = (entry["aid"], entry["sigs"])
+
+        return files, signatures
+
+    def start(self):
+        """ Start verifying the next report, if any """
+        dig = self.next()
+        if dig is None:
+            return
+
+        stats = self.filer.update(dig, ReportStatus.verifying)
+        try:
+            files, signatures = self.entries(dig, stats)
+            if not files:
+                raise ValueError("no files in the reports directory of the report")
+        except (ValueError, KeyError, TypeError) as ex:
+            self.filer.update(dig, ReportStatus.failed, str(ex))
+            self.failed += 1
+            logger.info("Report %s failed verification: %s", dig, ex)
+            return
+
+        results = []
+        for name in files:
+            aid, sigs = signatures.get(name, (None, []))
+            kever = self.hby.kevers.get(aid) if aid is not None else None
+            results.append((name, aid, self.submit(dig, stats.size, name, kever, sigs)))
+
+        self.pending = (dig, files, results)
+
+    def submit(self, dig, size, name, kever, sigs):
+        """ Returns Future resolving to (digest, indices) of entry name, see digest """
+        verfers = [verfer.qb64 for verfer in kever.verfers] if kever is not None else []
+        if self.workers == 0:
+            future = futures.Future()
+            try:
+                future.set_result(digest(self.filer.vdb.env, dig, size, name, verfers, sigs))
+            except Exception as ex:
+                future.set_exception(ex)
+            return future
+
+        if self.executor is None:
+            self.executor = futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                        mp_context=multiprocessing.get_context("spawn"))
+        return self.executor.submit(check, self.filer.vdb.path, dig, size, name, verfers, sigs)
+
+    def finish(self):
+        """ Record the results of the report being verified and move it to verified or failed """
+        dig, files, results = self.pending
+        self.pending = None
+
+        records = []
+        for name, aid, result in results:
+            record = dict(file=name, aid=aid, digest=None, verified=False, msg="")
+            try:
+                record["digest"], indices = result.result()
+            except Exception as ex:
+                record["msg"] = f"file could not be verified: {ex}"
+                records.append(record)
+                continue
+
+            kever = self.hby.kevers.get(aid) if aid is not None else None
+            if aid is None:
+                record["msg"] = "file is not signed"
+            elif kever is None:
+                record["msg"] = f"signer {aid} is unknown"
+            elif not kever.tholder.satisfy(indices):
+                record["msg"] = f"signatures of {aid} do not satisfy its signing threshold"
+            else:
+                record["verified"] = True
+            records.append(record)
+
+        failed = [record for record in records if not record["verified"]]
+        status = ReportStatus.failed if failed else ReportStatus.verified
+        msg = f"{len(failed)} of {len(records)} files failed verification" if failed else \
+            f"all {len(records)} files verified"
+
+        if failed:
+            self.failed += 1
+        else:
+            self.verified += 1
+
+        stats = self.filer.update(dig, status, msg)
+        if stats is not None:
+            stats.files = records
+            self.filer.vdb.stats.pin(keys=(dig,), val=stats)
+        logger.info("Report %s %s: %s", dig, status, msg)
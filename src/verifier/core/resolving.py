@@ -0,0 +1,118 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.resolving module
+
+Progress of the schema OOBIs resolved in the background at startup
+"""
+import time
+from urllib import parse
+
+from hio.base import doing
+from keri import help
+from keri.app import oobiing
+from keri.db import basing
+from keri.end import ending
+
+logger = help.ogler.getLogger()
+
+
+def said(url):
+    """ Returns the qb64 SAID of the schema data OOBI url, None if url is not a data OOBI """
+    match = ending.DOOBI_RE.match(parse.urlparse(url).path)
+    return match.group("said") if match is not None else None
+
+
+class Readiness:
+    """ Reports whether every schema OOBI known to the database has been resolved
+
+    Schema OOBIs from the durls of the config file are queued in hby.db.oobis when the keystore is
+    created and resolved concurrently by the Oobiery doers while the service already accepts requests.
+    Progress is read from the OOBI tables: queued in .oobis, being requested in .coobi, waiting to be
+    retried in .eoobi and resolved or failed in .roobi.  The service is ready once every schema is in
+    hby.db.schema.  Schemas are never removed, so once ready the answer is remembered.
+
+    """
+
+    def __init__(self, hby):
+        """ Create readiness reporter
+
+        Parameters:
+            hby (Habery): database environment the schema OOBIs are resolved into
+
+        """
+        self.hby = hby
+        self.done = False
+
+    def oobis(self):
+        """ Returns list of dict with the url, schema SAID, state and presence of each schema OOBI """
+        db = self.hby.db
+        states = dict()
+        for table, state in ((db.roobi, None), (db.eoobi, "retrying"), (db.coobi, "resolving"),
+                             (db.oobis, "queued")):
+            for (url,), obr in table.getItemIter():
+                if said(url) is not None:
+                    states[url] = state if state is not None else obr.state
+
+        oobis = []
+        for url, state in sorted(states.items()):
+            sad = said(url)
+            oobis.append(dict(url=url, said=sad, state=state, schema=db.schema.get(keys=(sad,)) is not None))
+
+        return oobis
+
+    def status(self):
+        """ Returns (ready, oobis) where ready is True once every schema OOBI has been resolved """
+        oobis = self.oobis()
+        if not self.done:
+            self.done = all(oobi["schema"] for oobi in oobis)
+
+        return self.done, oobis
+
+
+class Retrier(doing.Doer):
+    """ Queues failed schema OOBIs again so a transient failure does not leave the service unready
+
+    Oobiery marks an OOBI that answered with an error status as failed and never requests it again.
+    Failed schema OOBIs whose schema is still missing are moved back to hby.db.oobis after .delay
+    seconds, doubled on every further failure of the same OOBI up to .MaxDelay.
+
+    """
+
+    MaxDelay = 300.0  # maximum seconds between attempts to resolve the same OOBI
+
+    def __init__(self, hby, delay=5.0, tock=1.0, **kwa):
+        """ Create failed schema OOBI retrier
+
+        Parameters:
+            hby (Habery): database environment the schema OOBIs are resolved into
+            delay (float): seconds to wait before the first retry of a failed OOBI
+            tock (float): seconds between scans for failed OOBIs
+
+        """
+        self.hby = hby
+        self.delay = delay
+        self.pending = dict()  # url to (time at which to retry, current delay)
+        self.retries = 0
+        super(Retrier, self).__init__(tock=tock, **kwa)
+
+    def recur(self, tyme):
+        db = self.hby.db
+        now = time.monotonic()
+        for (url,), obr in db.roobi.getItemIter():
+            sad = said(url)
+            if sad is None or obr.state != oobiing.Result.failed or db.schema.get(keys=(sad,)) is not None:
+                continue
+
+            when, delay = self.pending.get(url, (None, self.delay / 2))
+            if when is None:
+                delay = min(delay * 2, self.MaxDelay)
+                self.pending[url] = (now + delay, delay)
+            elif now >= when:
+                logger.info("Retrying schema OOBI %s", url)
+                db.roobi.rem(keys=(url,))
+                db.oobis.pin(keys=(url,), val=basing.OobiRecord(date=help.nowIso8601()))
+                self.pending[url] = (None, delay)
+                self.retries += 1
+
+        return False
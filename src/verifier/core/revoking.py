@@ -0,0 +1,92 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.revoking module
+
+Background processing of credential revocations into the presentation records
+"""
+import datetime
+
+from hio.base import doing
+from keri import help
+
+from verifier.core import presenting
+
+logger = help.ogler.getLogger()
+
+
+class Revoker(doing.Doer):
+    """ Moves the presentations of revoked credentials into their revoked state a bounded batch per run
+
+    Revocations are driven by the "revoked" cues of the Teverys of the verification contexts: the TEL
+    events of a verification request and those resolved from the escrows mark the presentations of the
+    credentials they revoke revoked and escrow their SAIDs in vdb.rev, in every process sharing the
+    databases.  Every run drains at most .batch entries of vdb.rev, so only the presentations of revoked
+    credentials are touched: the vdb.iss, vdb.digs and vdb.accts entries of the credential are removed and
+    cached responses including it are dropped.  A run with nothing escrowed reads a single key.
+
+    The value escrowed in vdb.rev is the time the revocation was first seen, so the lag reported is how long
+    the oldest revocation drained by the last run waited to be processed.
+
+    """
+
+    Batch = 256  # maximum escrowed revocations drained per run
+
+    def __init__(self, vdb, reger, cache=None, batch=Batch, tock=1.0, **kwa):
+        """ Create revocation processor
+
+        Parameters:
+            vdb (VerifierBaser): verifier database holding the presentations and revocation escrow
+            reger (Reger): credential registry database holding the TEL state of the credentials
+            cache (ResultCache): optional cache of verification responses to drop revoked credentials from
+            batch (int): maximum escrowed revocations drained per run
+            tock (float): seconds between runs
+
+        """
+        self.vdb = vdb
+        self.reger = reger
+        self.cache = cache
+        self.batch = batch
+        self.presenter = presenting.Presenter(vdb=vdb, reger=reger)
+        self.revoked = 0
+        self.lag = 0.0
+        super(Revoker, self).__init__(tock=tock, **kwa)
+
+    def recur(self, tyme):
+        self.drain()
+        return False
+
+    def depth(self):
+        """ Returns number of revocations escrowed in vdb.rev waiting to be processed """
+        return self.vdb.cnt(self.vdb.rev.sdb)
+
+    def drain(self):
+        """ Process up to .batch escrowed revocations
+
+        Returns:
+            int: number of revocations processed
+
+        """
+        items = []
+        for (said,), dater in self.vdb.rev.getItemIter():
+            items.append((said, dater))
+            if len(items) >= self.batch:
+                break
+
+        if not items:
+            return 0
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for said, dater in items:
+            self.presenter.revoke([said])
+            self.vdb.iss.rem(keys=(said,))
+            self.vdb.digs.rem(keys=(said,))
+            self.vdb.accts.rem(keys=(said,))
+            if self.cache is not None:
+                self.cache.invalidate(said)
+            self.vdb.rev.rem(keys=(said,))
+
+        self.lag = max((now - dater.datetime).total_seconds() for _, dater in items)
+        self.revoked += len(items)
+        logger.info("Processed %s revocations, oldest waited %.3fs", len(items), self.lag)
+        return len(items)
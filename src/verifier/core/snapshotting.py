@@ -0,0 +1,214 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.snapshotting module
+
+Compacted snapshots of the verifier's LMDB environments for warm starts of new instances, and compaction in place
+"""
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+
+import lmdb
+from keri import help
+from keri.app import keeping
+from keri.db import basing
+from keri.vdr import viring
+
+from verifier.core import basing as vbasing
+
+logger = help.ogler.getLogger()
+
+Manifest = "manifest.json"
+Data = "data.mdb"
+Lock = "lock.mdb"
+
+# environments of a verifier keyed by their directory in a snapshot, dependents first so that, copied in
+# this order from a live instance, every environment holds at least the state the ones before rely on
+Envs = (("vdb", vbasing.VerifierBaser),
+        ("reg", viring.Reger),
+        ("db", basing.Baser),
+        ("ks", keeping.Keeper))
+
+
+def paths(name, base="", headDirPath=None, make=False):
+    """ Returns dict of snapshot directory to the path of each environment of verifier name
+
+    Paths are laid out the way verifier server start opens the environments, the keystore and key event
+    databases under base and the registry and verifier databases without it, each in its default location
+    or the fallback in the home directory the way keripy resolves them.
+
+    Parameters:
+        name (str): name of the verifier keystore and databases
+        base (str): optional prefix of the keystore and key event database locations
+        headDirPath (str): optional override of the root directory of the databases
+        make (bool): True means create the directories that do not exist yet empty, False means leave out
+                     the environments without a directory
+
+    """
+    dirs = dict()
+    for key, klas in Envs:
+        sub = base if key in ("db", "ks") else ""
+        if make:
+            lmdber = klas(name=name, base=sub, headDirPath=headDirPath, reopen=False)
+            path, _ = lmdber.remake(name=name, base=sub, temp=False, headDirPath=headDirPath)
+            dirs[key] = path
+            continue
+
+        for head, tail in ((headDirPath if headDirPath is not None else klas.HeadDirPath, klas.TailDirPath),
+                           (klas.AltHeadDirPath, klas.AltTailDirPath)):
+            path = os.path.abspath(os.path.expanduser(os.path.join(head, tail, sub, name)))
+            if os.path.isdir(path):
+                dirs[key] = path
+                break
+
+    return dirs
+
+
+@contextlib.contextmanager
+def exclusive(path):
+    """ Context manager holding the LMDB lock file of the environment at path so no other process opens it
+
+    LMDB holds a shared lock on its lock file in every process with the environment open and waits for an
+    exclusive one to be released before opening it, so holding the exclusive lock keeps verifiers that start
+    meanwhile waiting until the block exits.
+
+    Raises:
+        ValueError: if another process has the environment open
+
+    """
+    fd = os.open(os.path.join(path, Lock), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, 0)
+        except OSError as ex:
+            raise ValueError(f"database {path} is open in another process, stop the verifier first") from ex
+        yield
+    finally:
+        os.close(fd)
+
+
+def export(dest, name, base="", headDirPath=None):
+    """ Write a compacted copy of every environment of verifier name to new directory dest
+
+    Each environment is copied by LMDB from a read transaction, so a running verifier may keep serving
+    while it is exported.  Compaction leaves out free pages, so the copy is usually much smaller.
+
+    Parameters:
+        dest (str): directory to create the snapshot in, must not exist or be empty
+        name (str): name of the verifier keystore and databases
+        base (str): optional prefix of the keystore and key event database locations
+        headDirPath (str): optional override of the root directory of the databases
+
+    Returns:
+        list: snapshot directories of the environments exported
+
+    Raises:
+        ValueError: if dest is not empty or there is nothing to export
+
+    """
+    if os.path.exists(dest) and os.listdir(dest):
+        raise ValueError(f"snapshot directory {dest} is not empty")
+
+    envs = []
+    for key, path in paths(name, base=base, headDirPath=headDirPath).items():
+        if not os.path.exists(os.path.join(path, Data)):
+            continue
+
+        os.makedirs(os.path.join(dest, key))
+        env = lmdb.open(path, readonly=True, max_dbs=0)
+        try:
+            env.copy(os.path.join(dest, key), compact=True)
+        finally:
+            env.close()
+        envs.append(key)
+
+    if not envs:
+        raise ValueError(f"no databases found for {name} to snapshot")
+
+    with open(os.path.join(dest, Manifest), "w") as f:
+        json.dump(dict(name=name, base=base, dt=help.nowIso8601(), envs=envs), f)
+
+    return envs
+
+
+def restore(src, name, base="", headDirPath=None):
+    """ Copy the environments in snapshot src into place for verifier name unless it already has databases
+
+    Must be called before any of the environments are opened.  A verifier that already has any database
+    is left untouched, so restarting an instance never rolls its state back to the snapshot.
+
+    Parameters:
+        src (str): snapshot directory written by export
+        name (str): name of the verifier keystore and databases
+        base (str): optional prefix of the keystore and key event database locations
+        headDirPath (str): optional override of the root directory of the databases
+
+    Returns:
+        bool: True if the snapshot was restored, False if existing databases were kept
+
+    Raises:
+        ValueError: if src is not a snapshot
+
+    """
+    try:
+        with open(os.path.join(src, Manifest), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as ex:
+        raise ValueError(f"{src} is not a verifier snapshot: {ex}") from ex
+
+    dirs = paths(name, base=base, headDirPath=headDirPath, make=True)
+    if any(os.path.exists(os.path.join(path, Data)) for path in dirs.values()):
+        logger.info("Databases of %s already exist, snapshot %s not restored", name, src)
+        return False
+
+    for key in manifest["envs"]:
+        shutil.copyfile(os.path.join(src, key, Data), os.path.join(dirs[key], Data))
+
+    logger.info("Restored %s from snapshot %s taken %s", ", ".join(manifest["envs"]), src, manifest["dt"])
+    return True
+
+
+def compact(name, base="", headDirPath=None):
+    """ Rewrite every environment of verifier name in place without its free pages
+
+    The data file of each environment is replaced by a compacted copy, so each is compacted only while no
+    other process has it open.  Pages freed by expired entries are returned to the file system.
+
+    Parameters:
+        name (str): name of the verifier keystore and databases
+        base (str): optional prefix of the keystore and key event database locations
+        headDirPath (str): optional override of the root directory of the databases
+
+    Returns:
+        dict: snapshot directory name of each environment compacted to its (size before, size after) in bytes
+
+    Raises:
+        ValueError: if verifier name has no databases or another process has one of them open
+
+    """
+    dirs = {key: path for key, path in paths(name, base=base, headDirPath=headDirPath).items()
+            if os.path.exists(os.path.join(path, Data))}
+    if not dirs:
+        raise ValueError(f"no databases found for {name} to compact")
+
+    sizes = dict()
+    for key, path in dirs.items():
+        data = os.path.join(path, Data)
+        with exclusive(path):
+            tmp = os.path.join(path, "compact")
+            os.makedirs(tmp, exist_ok=True)
+            env = lmdb.open(path, readonly=True, lock=False, max_dbs=0)  # closing it must not drop the lock held
+            try:
+                env.copy(tmp, compact=True)
+            finally:
+                env.close()
+
+            before = os.path.getsize(data)
+            os.replace(os.path.join(tmp, Data), data)
+            shutil.rmtree(tmp)
+        sizes[key] = (before, os.path.getsize(data))
+
+    return sizes
@@ -0,0 +1,125 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.sweeping module
+
+Retention of the verifier's temporary state, expired entries are deleted in the background
+"""
+import datetime
+
+from hio.base import doing
+from keri import help
+from keri.core import coring
+
+logger = help.ogler.getLogger()
+
+
+class Sweeper(doing.Doer):
+    """ Deletes presentations and reports older than their retention a bounded batch per run
+
+    A presentation expires .retention seconds after the credential was last presented, when its vdb.iss,
+    vdb.digs, vdb.pres, vdb.accts and vdb.rev entries are deleted together in one write transaction per run.
+    A report expires .reports seconds after it was uploaded, when its vdb.stats record, vdb.imgs chunks and
+    vdb.rpts and vdb.stts index entries are deleted.  Each run looks at no more than .batch entries of
+    either, resuming where the previous run stopped, so writes stay short and never hold up verifications.
+    A retention of 0 keeps the entries forever.
+
+    Deleted pages are reused by later writes, so the databases stop growing once expiry keeps pace with new
+    presentations.  verifier db compact returns the free pages to the file system.
+
+    """
+
+    Batch = 256  # maximum presentations and reports looked at per run
+
+    def __init__(self, vdb, retention=0.0, reports=0.0, batch=Batch, tock=10.0, **kwa):
+        """ Create retention sweeper
+
+        Parameters:
+            vdb (VerifierBaser): verifier database to delete expired entries from
+            retention (float): seconds a presentation is kept after it was last presented, 0 keeps it forever
+            reports (float): seconds a report is kept after it was uploaded, 0 keeps it forever
+            batch (int): maximum presentations and reports looked at per run
+            tock (float): seconds between runs
+
+        """
+        self.vdb = vdb
+        self.retention = retention
+        self.reports = reports
+        self.batch = batch
+        self.cursors = dict(pres=b"", rpts=b"")  # key each scan starts after, empty to start at the beginning
+        self.swept = dict(pres=0, rpts=0)
+        super(Sweeper, self).__init__(tock=tock, **kwa)
+
+    def recur(self, tyme):
+        if self.retention > 0:
+            self.sweepPresentations()
+        if self.reports > 0:
+            self.sweepReports()
+        return False
+
+    def next(self, name, db):
+        """ Returns the next batch of keys of db, advancing or wrapping the cursor of scan name """
+        keys = self.vdb.getKeysAfter(db, key=self.cursors[name], limit=self.batch)
+        self.cursors[name] = keys[-1] if len(keys) == self.batch else b""
+        return keys
+
+    @staticmethod
+    def cutoff(retention):
+        """ Returns aware datetime before which entries with the given retention have expired """
+        return datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=retention)
+
+    def sweepPresentations(self):
+        """ Delete the expired presentations among the next .batch presented credentials
+
+        Returns:
+            int: number of presentations deleted
+
+        """
+        cutoff = self.cutoff(self.retention)
+        expired = []
+        for key in self.next("pres", self.vdb.iss.sdb):
+            dater = self.vdb.iss.get(keys=key)
+            if dater is not None and dater.datetime < cutoff:
+                expired.append(key)
+
+        if not expired:
+            return 0
+
+        tables = (self.vdb.iss, self.vdb.digs, self.vdb.pres, self.vdb.accts, self.vdb.rev)
+        with self.vdb.env.begin(write=True) as txn:
+            for key in expired:
+                for table in tables:
+                    txn.delete(key, db=table.sdb)
+
+        self.swept["pres"] += len(expired)
+        logger.info("Deleted %s presentations not presented for %ss", len(expired), self.retention)
+        return len(expired)
+
+    def sweepReports(self):
+        """ Delete the expired reports among the next .batch reports
+
+        Returns:
+            int: number of reports deleted
+
+        """
+        cutoff = self.cutoff(self.reports)
+        expired = 0
+        for key in self.next("rpts", self.vdb.stats.sdb):
+            dig = key.decode("utf-8")
+            stats = self.vdb.stats.get(keys=(dig,))
+            if stats is None or stats.date is None or help.fromIso8601(stats.date) >= cutoff:
+                continue
+
+            diger = coring.Diger(qb64=dig)
+            if stats.submitter is not None:
+                self.vdb.rpts.rem(keys=(stats.submitter,), val=diger)
+            if stats.status is not None:
+                self.vdb.stts.rem(keys=(stats.status,), val=diger)
+            self.vdb.delTopVal(db=self.vdb.imgs, key=f"{dig}.".encode("utf-8"))
+            self.vdb.stats.rem(keys=(dig,))
+            expired += 1
+
+        if expired:
+            self.swept["rpts"] += expired
+            logger.info("Deleted %s reports uploaded more than %ss ago", expired, self.reports)
+        return expired
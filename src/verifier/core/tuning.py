@@ -0,0 +1,218 @@
+# -*- encoding: utf-8 -*-
+"""
+vLEI Verification Servcie
+verifier.core.tuning module
+
+LMDB environment settings applied to every database of the verifier and growth of their maps
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import lmdb
+from hio.base import doing
+from keri import help
+from keri.app import keeping
+from keri.core import eventing  # noqa: F401 keri.db.basing fails to import unless keri.core.eventing is imported first
+from keri.db import basing, dbing
+from keri.vdr import viring
+
+logger = help.ogler.getLogger()
+
+SyncModes = ("sync", "no-meta-sync", "async")
+
+
+@dataclass
+class Settings:
+    """ LMDB environment settings dataclass, None keeps the keripy default """
+
+    mapSize: int = None  # initial map size in bytes, never less than the size of the data file
+    readahead: bool = True  # False disables OS readahead, better for databases larger than memory
+    sync: str = "sync"  # sync, no-meta-sync to skip flushing the meta page on commit or async to never flush
+    maxReaders: int = None  # threads of all processes reading the environment at once
+
+
+MapSize = 104857600  # map size keripy opens every environment with
+MaxReaders = 126  # reader slots lmdb opens every environment with
+
+
+class Tuned(dbing.LMDBer):
+    """ Mixin that reopens an LMDBer's environment with the process wide .Settings
+
+    Keripy opens every environment with fixed settings in LMDBer.reopen.  Listed after the database class,
+    as in class Baser(basing.Baser, Tuned), this reopen runs between LMDBer.reopen and the named sub-dbs
+    being opened by the database class, so the environment is opened again with .Settings before any of
+    them exist.  With .Settings None environments are left exactly as keripy opens them.
+
+    """
+
+    Settings = None  # Settings applied to every Tuned environment opened, see configure
+
+    def reopen(self, **kwa):
+        opened = super(Tuned, self).reopen(**kwa)
+        settings = self.Settings
+        if settings is None or self.env is None:
+            return opened
+
+        self.env.close()
+        self.env = lmdb.open(self.path,
+                             max_dbs=self.MaxNamedDBs,
+                             map_size=settings.mapSize if settings.mapSize is not None else MapSize,
+                             mode=self.perm,
+                             readonly=self.readonly,
+                             readahead=settings.readahead,
+                             metasync=settings.sync == "sync",
+                             sync=settings.sync != "async",
+                             max_readers=settings.maxReaders if settings.maxReaders is not None else MaxReaders)
+        return opened
+
+
+class Baser(basing.Baser, Tuned):
+    """ Key event database opened with the verifier's LMDB settings """
+
+
+class Keeper(keeping.Keeper, Tuned):
+    """ Keystore opened with the verifier's LMDB settings """
+
+
+class Reger(viring.Reger, Tuned):
+    """ Credential registry database opened with the verifier's LMDB settings """
+
+
+def configure(settings):
+    """ Apply settings to every Tuned environment opened from now on in this process
+
+    Raises:
+        ValueError: if settings.sync is not one of SyncModes
+
+    """
+    if settings.sync not in SyncModes:
+        raise ValueError(f"invalid sync mode {settings.sync}, expected one of {', '.join(SyncModes)}")
+
+    Tuned.Settings = settings
+
+
+class Gate:
+    """ Lets threads use the databases outside verification contexts only while no map is being resized
+
+    LMDB only allows resizing a map while this process has no transaction open.  Work on other threads
+    than the one running the Grower that uses the databases outside a verification context, such as
+    storing uploaded reports on the executor of the event loop, runs through .run, which waits while a
+    map is being resized, and maps are only resized while nothing runs through it.
+
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.running = 0
+        self.shut = False
+
+    def run(self, fn, *args):
+        """ Returns fn(*args) run once no map is being resized """
+        with self.cond:
+            while self.shut:
+                self.cond.wait()
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self.cond:
+                self.running -= 1
+
+    @contextmanager
+    def closed(self):
+        """ Context manager yielding True with the gate shut if nothing runs through it, else yielding False """
+        with self.cond:
+            shut = self.running == 0
+            self.shut = shut
+        try:
+            yield shut
+        finally:
+            if shut:
+                with self.cond:
+                    self.shut = False
+                    self.cond.notify_all()
+
+
+gate = Gate()  # of this process, see Grower
+
+
+def usage(env):
+    """ Returns (used, size) of the map of LMDB environment env in bytes """
+    info = env.info()
+    used = (info["last_pgno"] + 1) * env.stat()["psize"]
+    return used, info["map_size"]
+
+
+class Grower(doing.Doer):
+    """ Doubles the map of a verifier database before it fills up
+
+    A write that needs more pages than the map holds fails with MapFullError.  Every run the usage of each
+    environment is checked and maps more than .Threshold full, or that a verification context hit
+    MapFullError in, are doubled.  LMDB only allows resizing the map while this process has no transaction
+    open, so every verification context is checked out of the pool first and .gate shut, and the resize
+    waits for the next run while any context is busy or anything runs through the gate.  The other doers,
+    the endpoints of the hio server and the async endpoints run on the same thread as this doer and open
+    no transaction across a yield or an await, so they have none open when it runs.
+
+    """
+
+    Threshold = 0.8  # fraction of the map used above which it is grown
+
+    def __init__(self, lmdbers, pool, gate=gate, tock=1.0, **kwa):
+        """ Create map grower
+
+        Parameters:
+            lmdbers (list): LMDBer instances whose maps are grown
+            pool (ContextPool): pool of verification contexts whose transactions must finish first
+            gate (Gate): database work outside the contexts that must finish first
+            tock (float): seconds between checks
+
+        """
+        self.lmdbers = lmdbers
+        self.pool = pool
+        self.gate = gate
+        self.grown = 0
+        super(Grower, self).__init__(tock=tock, **kwa)
+
+    def recur(self, tyme):
+        full = []
+        for lmdber in self.lmdbers:
+            used, size = usage(lmdber.env)
+            if self.pool.full or used > self.Threshold * size:
+                full.append(lmdber)
+
+        if full:
+            self.grow(full)
+        return False
+
+    def grow(self, lmdbers):
+        """ Double the maps of lmdbers once no verification context is busy
+
+        Returns:
+            bool: True if the maps were grown, False if a verification context was busy
+
+        """
+        ctxs = []
+        try:
+            while len(ctxs) < self.pool.size:
+                ctxs.append(self.pool.contexts.get_nowait())
+        except queue.Empty:
+            return False
+        else:
+            with self.gate.closed() as shut:
+                if not shut:
+                    return False
+
+                for lmdber in lmdbers:
+                    used, size = usage(lmdber.env)
+                    lmdber.env.set_mapsize(size * 2)
+                    logger.info("Grew map of %s from %s to %s bytes, %s bytes used", lmdber.path, size, size * 2,
+                                used)
+                    self.grown += 1
+            self.pool.full = False
+            return True
+        finally:
+            for ctx in ctxs:
+                self.pool.contexts.put(ctx)
@@ -1,11 +1,22 @@
 import json
+import sys
 
 import falcon
-from keri.core import coring, parsing
-from keri.vdr import verifying, eventing
+from keri import help
 
+from verifier.core import admitting, caching, chaining, encoding, escrowing, ingesting, metering, ogling, pooling, presenting, reporting, \
+    resolving, revoking, sweeping, tuning
 
-def setup(app, hby, vdb, reger, local=False):
+logger = help.ogler.getLogger()
+
+
+def setup(app, hby, vdb, reger, local=False, cacheSize=1024, cacheBytes=64 * 1024 * 1024, contexts=4,
+          streamThreshold=ingesting.StreamThreshold, chunkSize=ingesting.ChunkSize, maxBuffered=ingesting.MaxBuffered,
+          shared=False, prefilter=True, chainSize=4096, signers=0, encoder="auto",
+          fragments=caching.FragmentCache.MaxSize, revocations=revoking.Revoker.Batch, retention=0.0,
+          reportRetention=0.0, grow=False, reportSize=reporting.MaxReportSize, reportWorkers=None,
+          verifyReports=True, maxQueued=admitting.MaxQueued, maxBytes=admitting.MaxBytes,
+          maxBody=admitting.MaxBody, escrowBudget=escrowing.Budget, processEscrows=True, backlog=None, ends=None):
     """ Set up verifying endpoints to process vLEI credential verifications
 
     Parameters:
@@ -13,36 +24,193 @@ def setup(app, hby, vdb, reger, local=False):
         hby (Habery): Database environment for exposed KERI AIDs
         vdb (VerifierBaser): Database environment for the verifier
         reger (Reger): Database environment for credential registries
+        cacheSize (int): maximum number of cached verification responses, 0 disables the cache
+        cacheBytes (int): maximum accumulated size in bytes of cached verification responses
+        contexts (int): number of verification contexts that may process requests concurrently
+        streamThreshold (int): Content-Length above which request bodies are parsed in chunks, as they arrive
+                               only with the ASGI endpoints
+        chunkSize (int): bytes read from streamed request bodies per chunk
+        maxBuffered (int): maximum bytes of a streamed request body buffered ahead of the parser
+        shared (bool): True means other processes write to the same databases
+        prefilter (bool): True means drop already accepted KEL and TEL events before parsing
+        chainSize (int): maximum number of cached credential validation results, 0 disables the cache
+        signers (int): number of threads verifying the signatures of a request in a batch, 0 disables it
+        encoder (str): JSON backend of responses, json, orjson or auto for orjson when installed
+        fragments (int): maximum number of cached serialized credentials, 0 disables the cache
+        revocations (int): maximum escrowed revocations processed per run of the Revoker
+        retention (float): seconds a presentation is kept after it was last presented, 0 keeps it forever
+        reportRetention (float): seconds an uploaded report is kept, 0 keeps it forever
+        grow (bool): True means grow the maps of the databases before they fill up
+        reportSize (int): largest report accepted for upload in bytes
+        reportWorkers (int): worker processes verifying report signatures, None for one per core and 0 for none
+        verifyReports (bool): True means verify the signatures of uploaded reports in this process
+        maxQueued (int): verification requests waiting for a free context before more are shed with 503, -1 for
+                         no limit
+        maxBytes (int): request body bytes of the verification requests processed at once, 0 for no limit
+        maxBody (int): largest Content-Length of a verification request, 0 for no limit
+        escrowBudget (float): seconds of KEL, TEL and credential escrow processing per second, 0 disables it
+        processEscrows (bool): True means process the escrows in this process
+        backlog (Callable): returns the requests waiting in the hio server, see admitting.Server.backlog, None
+                            when the server verifies requests concurrently
+        ends (module): module providing the endpoint classes, verifier.core.asyncing for falcon.asgi apps
+
+    Returns:
+        ContextPool: pool of verification contexts serving the endpoints, with the background doers in its doers
 
     """
 
-    tvy = eventing.Tevery(reger=reger, db=hby.db, local=local)
-    vry = verifying.Verifier(hby=hby, reger=reger)
+    pool = pooling.ContextPool(hby=hby, reger=reger, size=contexts, local=local, shared=shared,
+                               prefilter=prefilter, chainSize=chainSize, signers=signers)
+    cache = caching.ResultCache(maxsize=cacheSize, maxbytes=cacheBytes,
+                                stamp=lambda saids: chaining.stamp(reger, saids)) if cacheSize > 0 else None
+    reader = ingesting.BodyReader(threshold=streamThreshold, chunkSize=chunkSize, limit=maxBuffered)
+    encoder = encoding.Encoder(name=encoder, fragments=fragments)
+    pool.doers.append(revoking.Revoker(vdb=vdb, reger=reger, cache=cache, batch=revocations))
+    if retention > 0 or reportRetention > 0:
+        pool.doers.append(sweeping.Sweeper(vdb=vdb, retention=retention, reports=reportRetention))
+    if processEscrows and escrowBudget > 0:
+        pool.doers.append(escrowing.Escrower(hby=hby, reger=reger, pool=pool, vdb=vdb, cache=cache,
+                                             budget=escrowBudget))
+    if grow:
+        pool.doers.append(tuning.Grower(lmdbers=[hby.db, hby.ks, reger, vdb], pool=pool))
 
-    loadEnds(app, hby, vdb, tvy, vry)
+    app.add_middleware(ogling.RequestIdMiddleware())
+    app.add_middleware(metering.MeterMiddleware(pool.meter))
+    if backlog is None:
+        limit, load = contexts + maxQueued, lambda: pool.pending
+    else:  # the hio server answers one request at a time while the others wait in it
+        limit, load = 1 + maxQueued, lambda: max(pool.pending, backlog())
+    admitter = admitting.Admitter(limit=limit if maxQueued >= 0 else 0, maxBytes=maxBytes, maxBody=maxBody,
+                                  unknown=maxBuffered, load=load)
+    app.add_middleware(admitting.AdmissionMiddleware(admitter))
+    meter = pool.meter
+    meter.gauge("verifier_admitted_requests", "Verification requests admitted and not yet answered",
+                lambda: admitter.active)
+    meter.gauge("verifier_pending_verifications", "Verifications running or waiting for a verification context",
+                lambda: pool.pending)
+    meter.gauge("verifier_admitted_bytes", "Request body bytes of the verification requests admitted",
+                lambda: admitter.bytes)
+    meter.counter("verifier_shed_requests_total", "Verification requests shed with 503 because the limits were reached",
+                  lambda: admitter.rejected)
+    meter.counter("verifier_oversized_requests_total",
+                  "Verification requests refused with 413 for their Content-Length", lambda: admitter.oversized)
+    filer = reporting.Filer(vdb=vdb, maxSize=reportSize)
+    if verifyReports:
+        pool.doers.append(reporting.ReportVerifier(hby=hby, filer=filer, workers=reportWorkers))
+    loadEnds(app, hby, vdb, pool, cache=cache, reader=reader, encoder=encoder, filer=filer, maxBody=maxBody,
+             ends=ends)
+    return pool
 
 
-def loadEnds(app, hby, vdb, tvy, vry):
+def loadEnds(app, hby, vdb, pool, cache=None, reader=None, encoder=None, filer=None, maxBody=admitting.MaxBody,
+             ends=None):
     """ Load and map endpoints to process vLEI credential verifications
 
     Parameters:
         app (App): Falcon app to register endpoints against
         hby (Habery): Database environment for exposed KERI AIDs
         vdb (VerifierBaser): Verifier database environment
-        tvy (Tevery): transaction event log event processor
-        vry (Verifier): credential verification processor
+        pool (ContextPool): pool of verification contexts with private cue sinks
+        cache (ResultCache): optional cache of verification responses keyed by request body digest
+        reader (BodyReader): reads request bodies whole or in chunks streamed into the parser
+        encoder (Encoder): encodes verification responses from cached serialized credentials
+        filer (Filer): storage of uploaded reports
+        maxBody (int): largest request body of a batch verification, 0 for no limit
+        ends (module): module providing the endpoint classes, this module when None
 
     """
+    reader = reader if reader is not None else ingesting.BodyReader()
+    encoder = encoder if encoder is not None else encoding.Encoder()
+    filer = filer if filer is not None else reporting.Filer(vdb=vdb)
+    ends = ends if ends is not None else sys.modules[__name__]
 
-    healthEnd = HealthEndpoint()
+    healthEnd = ends.HealthEndpoint()
     app.add_route("/health", healthEnd)
-    credEnd = PresentationResourceEndpoint(hby, vdb, tvy, vry)
+    readyEnd = ends.ReadyEndpoint(resolving.Readiness(hby))
+    app.add_route("/ready", readyEnd)
+    credEnd = ends.PresentationResourceEndpoint(hby, vdb, pool, cache=cache, reader=reader)
     app.add_route("/v1/cesr-verifier/presentations/{said}", credEnd)
-    verifierEnd = VerifierResourceEndpoint(hby, vdb, tvy, vry)
+    verifierEnd = ends.VerifierResourceEndpoint(hby, vdb, pool, cache=cache, reader=reader, encoder=encoder)
     app.add_route("/v1/cesr-verifier/verifier", verifierEnd)
+    batchEnd = ends.BatchResourceEndpoint(hby, vdb, pool, cache=cache, encoder=encoder, maxBody=maxBody)
+    app.add_route("/v1/cesr-verifier/verifier/batch", batchEnd)
+    reportEnd = ends.ReportResourceEndpoint(filer)
+    app.add_route("/v1/cesr-verifier/reports/{aid}/{dig}", reportEnd)
+    reportsEnd = ends.ReportsResourceEndpoint(filer)
+    app.add_route("/v1/cesr-verifier/reports/{aid}", reportsEnd)
+    if cache is not None:
+        cacheEnd = ends.CacheResourceEndpoint(cache)
+        app.add_route("/v1/cesr-verifier/verifier/cache", cacheEnd)
+    if pool.prefilter is not None:
+        statsEnd = ends.PrefilterResourceEndpoint(pool.prefilter)
+        app.add_route("/v1/cesr-verifier/verifier/stats", statsEnd)
+    metricsEnd = ends.MetricsEndpoint(pool.meter)
+    app.add_route("/metrics", metricsEnd)
+
+    meter = pool.meter
+    meter.gauge("verifier_cue_depth", "Cues waiting in the processors of all verification contexts", pool.depth)
+    meter.gauge("verifier_contexts_free", "Verification contexts not processing a request", pool.contexts.qsize)
+    if cache is not None:
+        meter.gauge("verifier_result_cache_entries", "Cached verification responses", cache.__len__)
+    if pool.prefilter is not None:
+        meter.counter("verifier_prefilter_skipped_total", "Already accepted events skipped before parsing",
+                      lambda: pool.prefilter.skipped)
+    if pool.batcher is not None:
+        meter.counter("verifier_batch_signatures_total", "Signatures verified in batches",
+                      lambda: pool.batcher.signatures)
+    if encoder.fragments is not None:
+        meter.gauge("verifier_fragment_cache_entries", "Cached serialized credentials", encoder.fragments.__len__)
+    for doer in pool.doers:
+        if isinstance(doer, revoking.Revoker):
+            meter.gauge("verifier_revocations_pending", "Revocations escrowed waiting to be processed", doer.depth)
+            meter.gauge("verifier_revocation_lag_seconds", "Seconds the oldest revocation last processed waited",
+                        lambda revoker=doer: revoker.lag)
+        if isinstance(doer, sweeping.Sweeper):
+            meter.counter("verifier_expired_presentations_total", "Presentations deleted after their retention",
+                          lambda sweeper=doer: sweeper.swept["pres"])
+            meter.counter("verifier_expired_reports_total", "Reports deleted after their retention",
+                          lambda sweeper=doer: sweeper.swept["rpts"])
+        if isinstance(doer, reporting.ReportVerifier):
+            meter.counter("verifier_reports_verified_total", "Uploaded reports whose signatures verified",
+                          lambda verifier=doer: verifier.verified)
+            meter.counter("verifier_reports_failed_total", "Uploaded reports that failed signature verification",
+                          lambda verifier=doer: verifier.failed)
+        if isinstance(doer, escrowing.Escrower):
+            meter.gauge("verifier_escrow_entries", "Entries in each escrow when it was last processed",
+                        lambda escrower=doer: escrower.sizes, label="escrow")
+            meter.gauge("verifier_escrow_age_seconds", "Seconds the oldest entry of each escrow has waited",
+                        lambda escrower=doer: escrower.ages, label="escrow")
+            meter.counter("verifier_escrow_resolved_total", "Entries of each escrow resolved in the background",
+                          lambda escrower=doer: escrower.resolved, label="escrow")
+            meter.counter("verifier_escrow_timed_out_total", "Entries of each escrow dropped after its timeout",
+                          lambda escrower=doer: escrower.timedout, label="escrow")
+            meter.counter("verifier_escrow_revocations_total", "Revocations resolved from the escrows",
+                          lambda escrower=doer: escrower.revoked)
+        if isinstance(doer, tuning.Grower):
+            meter.counter("verifier_db_maps_grown_total", "Database maps grown before filling up",
+                          lambda grower=doer: grower.grown)
     return []
 
 
+def invalidate(cache, revoked, presenter=None):
+    """ Remove cached responses that include any of the revoked credentials and mark their presentations revoked
+
+    Parameters:
+        cache (ResultCache): optional cache of verification responses
+        revoked (list): qb64 SAIDs of credentials revoked by processed TEL events
+        presenter (Presenter): optional presentation records to mark revoked
+
+    """
+    if presenter is not None and revoked:
+        presenter.revoke(revoked)
+
+    if cache is None:
+        return
+
+    for said in revoked:
+        cache.invalidate(said)
+
+
 class VerifierResourceEndpoint:
     """ CESR verifier resource endpoint class
 
@@ -50,20 +218,25 @@ class VerifierResourceEndpoint:
 
     """
 
-    def __init__(self, hby, vdb, tvy, vry):
+    def __init__(self, hby, vdb, pool, cache=None, reader=None, encoder=None):
         """ Create CESR verifier resource endpoint instance
 
         Parameters:
             hby (Habery): Database environment for exposed KERI AIDs
             vdb (VerifierBaser): Verifier database environment
-            tvy (Tevery): transaction event log event processor
-            vry (Verifier): credential verification event processor
+            pool (ContextPool): pool of verification contexts with private cue sinks
+            cache (ResultCache): optional cache of verification responses keyed by request body digest
+            reader (BodyReader): reads request bodies whole or in chunks streamed into the parser
+            encoder (Encoder): encodes responses from cached serialized credentials
 
         """
         self.hby = hby
         self.vdb = vdb
-        self.tvy = tvy
-        self.vry = vry
+        self.pool = pool
+        self.cache = cache
+        self.reader = reader if reader is not None else ingesting.BodyReader()
+        self.encoder = encoder if encoder is not None else encoding.Encoder()
+        self.presenter = presenting.Presenter(vdb=vdb, reger=pool.reger)
 
     def on_post(self, req, rep):
         """  CESR verifier resource POST Method
@@ -110,63 +283,322 @@ class VerifierResourceEndpoint:
                     "utf-8")
                 return
 
-            ims = req.bounded_stream.read()
-
-            self.vry.cues.clear()
-
-            parsing.Parser().parse(ims=ims,
-                                kvy=self.hby.kvy,
-                                tvy=self.tvy,
-                                vry=self.vry)
-
-            credres = []
-            while self.vry.cues:
-                msg = self.vry.cues.popleft()
-                print(f"msg: {msg}")
-                if "kin" in msg:
-                    if msg["kin"] == "saved":
-                        if "creder" in msg:
-                            credres.append(msg["creder"].sad)
-
-            # if len(credres) == 0:
-            #     rep.status = falcon.HTTP_BAD_REQUEST
-            #     rep.data = json.dumps(dict(msg=f"no credential found in the cesr data")).encode("utf-8")
-            #     return
-                    
-            rep.status = falcon.HTTP_200
-            rep.data = json.dumps(
-                dict(
-                    creds=credres  # return the found credentials
-                )
-            ).encode("utf-8")
-            
+            dig = None
+            if self.reader.streamed(req):  # large bodies are parsed in chunks and bypass the cache
+                creders, revoked = self.pool.ingest(self.reader.chunks(req), limit=self.reader.limit)
+            else:
+                with self.pool.meter.timer("read"):
+                    ims = self.reader.read(req)
+
+                if self.cache is not None:
+                    dig = self.cache.digest(ims)
+                    data = self.cache.get(dig)
+                    if data is not None:
+                        rep.status = falcon.HTTP_200
+                        rep.data = data
+                        return
+
+                creders, revoked = self.pool.verify(ims)
+
+            self.respond(rep, creders, revoked, dig=dig)
+
+        except ingesting.BufferLimitError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"CESR verification failed: {ex}")).encode("utf-8")
+
         except Exception as ex:
             rep.status = falcon.HTTP_BAD_REQUEST
             rep.data = json.dumps(dict(msg=f"CESR verification failed: {ex}")).encode("utf-8")
 
 
+    def respond(self, rep, creders, revoked, dig=None):
+        """ Set the verification response for the credentials found in the request body
+
+        Parameters:
+            rep (Response): falcon response
+            creders (list): Creder of each credential saved from the request body
+            revoked (list): qb64 SAIDs of credentials revoked by TEL events in the request body
+            dig (str): qb64 digest of the request body to cache the response under, None to not cache it
+
+        """
+        invalidate(self.cache, revoked, self.presenter)
+
+        # if len(creders) == 0:
+        #     rep.status = falcon.HTTP_BAD_REQUEST
+        #     rep.data = json.dumps(dict(msg=f"no credential found in the cesr data")).encode("utf-8")
+        #     return
+
+        rep.status = falcon.HTTP_200
+        with self.pool.meter.timer("serialize"):
+            rep.data = self.encoder.creds(creders)  # return the found credentials
+
+        # only cache responses that found credentials, an empty result may change once escrows resolve
+        if dig is not None and creders:
+            self.cache.add(dig, rep.data, [creder.said for creder in creders])
+
+
+class BatchResourceEndpoint:
+    """ CESR batch verifier resource endpoint class
+
+    This class allows for a POST of many independent CESR streams to be verified together in one request.
+
+    """
+
+    MaxItems = 1000  # maximum number of CESR streams in one batch
+
+    def __init__(self, hby, vdb, pool, cache=None, encoder=None, maxBody=admitting.MaxBody):
+        """ Create CESR batch verifier resource endpoint instance
+
+        Parameters:
+            hby (Habery): Database environment for exposed KERI AIDs
+            vdb (VerifierBaser): Verifier database environment
+            pool (ContextPool): pool of verification contexts with private cue sinks
+            cache (ResultCache): optional cache of verification responses, invalidated on revocation
+            encoder (Encoder): encodes responses from cached serialized credentials
+            maxBody (int): largest request body read, 0 for no limit
+
+        """
+        self.hby = hby
+        self.vdb = vdb
+        self.pool = pool
+        self.cache = cache
+        self.encoder = encoder if encoder is not None else encoding.Encoder()
+        self.maxBody = maxBody
+        self.presenter = presenting.Presenter(vdb=vdb, reger=pool.reger)
+
+    def items(self, req):
+        """ Returns list of (id, CESR stream or Exception) from NDJSON or multipart request body
+
+        Each NDJSON line is either a JSON string holding the CESR stream or an object with the stream in
+        its "cesr" field and an optional "id".  Each multipart part holds one CESR stream and its name is
+        used as id.  Items without an id are identified by their index in the batch.
+
+        Raises:
+            BodySizeError: if the body is larger than .maxBody, before more than .maxBody + 1 bytes are read
+
+        """
+        items = []
+        if req.content_type.startswith("multipart/"):
+            size = 0
+            for idx, part in enumerate(req.get_media()):
+                data = part.get_data()
+                size = self.bound(size + len(data))
+                items.append((part.name if part.name else idx, data))
+            return items
+
+        data = req.bounded_stream.read(self.maxBody + 1) if self.maxBody > 0 else req.bounded_stream.read()
+        self.bound(len(data))
+        return BatchResourceEndpoint.lines(data)
+
+    def bound(self, size):
+        """ Returns size of the body read so far, raises BodySizeError if it is larger than .maxBody """
+        if 0 < self.maxBody < size:
+            raise admitting.BodySizeError(f"batch body larger than the maximum of {self.maxBody} bytes")
+
+        return size
+
+    @staticmethod
+    def lines(data):
+        """ Returns list of (id, CESR stream or Exception) from NDJSON body data as described in .items """
+        items = []
+        lines = (line for line in data.splitlines() if line.strip())
+        for idx, line in enumerate(lines):
+            try:
+                item = json.loads(line)
+                if isinstance(item, str):
+                    items.append((idx, item.encode("utf-8")))
+                else:
+                    items.append((item.get("id", idx), item["cesr"].encode("utf-8")))
+            except (ValueError, KeyError, AttributeError, TypeError) as ex:
+                items.append((idx, ValueError(f"invalid batch item: {ex}")))
+
+        return items
+
+    def on_post(self, req, rep):
+        """  CESR batch verifier resource POST Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+
+        ---
+         summary: Verify many CESR streams in one request, return the found credentials of each
+         description: Verify many independent CESR streams together so that KEL and TEL events shared by
+                      several streams are processed once, return per stream results and errors
+         tags:
+            - verifier
+         requestBody:
+             required: true
+             content:
+                application/x-ndjson:
+                  schema:
+                    type: string
+                    description: one JSON object {"id", "cesr"} or JSON string of CESR per line
+                multipart/form-data:
+                  schema:
+                    type: object
+                    description: one CESR stream per part, the part name is used as id
+         responses:
+           200:
+              description: Per stream verifier results
+              content:
+                application/json:
+                  schema:
+                    type: object
+                    properties:
+                      results:
+                        type: array
+                        items:
+                          type: object
+                          properties:
+                            id:
+                              type: string
+                            creds:
+                              type: array
+                              description: saved credentials from the CESR stream
+                            msg:
+                              type: string
+                              description: error verifying the CESR stream
+
+        """
+        rep.content_type = "application/json"
+
+        if not self.accepts(req, rep):
+            return
+
+        try:
+            with self.pool.meter.timer("read"):
+                items = self.items(req)
+        except admitting.BodySizeError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"CESR batch verification failed: {ex}")).encode("utf-8")
+            return
+        except Exception as ex:
+            rep.status = falcon.HTTP_BAD_REQUEST
+            rep.data = json.dumps(dict(msg=f"CESR batch verification failed: {ex}")).encode("utf-8")
+            return
+
+        if not self.admits(items, rep):
+            return
+
+        verified, revoked = self.pool.batch([ims for _, ims in items if not isinstance(ims, Exception)])
+        self.respond(rep, items, verified, revoked)
+
+    @staticmethod
+    def accepts(req, rep):
+        """ Returns True if the request content type is NDJSON or multipart, else sets a 400 response """
+        if req.content_type is None or not (req.content_type.startswith("application/x-ndjson")
+                                            or req.content_type.startswith("multipart/form-data")):
+            rep.status = falcon.HTTP_BAD_REQUEST
+            rep.data = json.dumps(dict(msg=f"Invalid request content-type={req.content_type}")).encode("utf-8")
+            return False
+
+        return True
+
+    def admits(self, items, rep):
+        """ Returns True if the batch is within .MaxItems, else sets a 413 response """
+        if len(items) > self.MaxItems:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"batch of {len(items)} exceeds {self.MaxItems} items")).encode("utf-8")
+            return False
+
+        return True
+
+    def respond(self, rep, items, verified, revoked):
+        """ Set the batch response from the per stream results
+
+        Parameters:
+            rep (Response): falcon response
+            items (list): (id, CESR stream or Exception) of each item in the batch
+            verified (list): results of the items that are not Exceptions as returned by ContextPool.batch
+            revoked (list): qb64 SAIDs of credentials revoked by TEL events in any item
+
+        """
+        invalidate(self.cache, revoked, self.presenter)
+
+        verified = iter(verified)
+        results = []
+        for ident, ims in items:
+            res = ims if isinstance(ims, Exception) else next(verified)
+            if isinstance(res, Exception):
+                results.append((ident, f"CESR verification failed: {res}"))
+            else:
+                results.append((ident, res))
+
+        rep.status = falcon.HTTP_200
+        with self.pool.meter.timer("serialize"):
+            rep.data = self.encoder.results(results)
+
+
 class PresentationResourceEndpoint:
     """ Credential presentation resource endpoint class
 
     This class allows for a PUT to a credential SAID specific endpoint to trigger credential presentation
-    verification.
+    verification, and for a GET of the status of the presentation.
 
     """
 
-    def __init__(self, hby, vdb, tvy, vry):
+    def __init__(self, hby, vdb, pool, cache=None, reader=None):
         """ Create credential presentation resource endpoint instance
 
         Parameters:
             hby (Habery): Database environment for exposed KERI AIDs
             vdb (VerifierBaser): Verifier database environment
-            tvy (Tevery): transaction event log event processor
-            vry (Verifier): credential verification event processor
+            pool (ContextPool): pool of verification contexts with private cue sinks
+            cache (ResultCache): optional cache of verification responses, invalidated on revocation
+            reader (BodyReader): reads request bodies whole or in chunks streamed into the parser
 
         """
         self.hby = hby
         self.vdb = vdb
-        self.tvy = tvy
-        self.vry = vry
+        self.pool = pool
+        self.cache = cache
+        self.reader = reader if reader is not None else ingesting.BodyReader()
+        self.presenter = presenting.Presenter(vdb=vdb, reger=pool.reger)
+
+    def on_get(self, req, rep, said):
+        """  Credential Presentation Resource GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+            said: qb64 SAID of presented credential
+
+        ---
+         summary: Return the status of the presentation of a credential
+         description: Return when the credential was last presented, its issuer, registry and schema, and
+                      whether and when it was revoked, from a single read of the verifier database
+         tags:
+            - Credentials
+         parameters:
+           - in: path
+             name: said
+             schema:
+                type: string
+             description: qb64 SAID of presented credential
+         responses:
+           200:
+              description: Presentation status
+           404:
+              description: Credential was never presented
+
+        """
+        rep.content_type = "application/json"
+
+        rec = self.presenter.lookup(said)
+        if rec is None:
+            rep.status = falcon.HTTP_NOT_FOUND
+            rep.data = json.dumps(dict(msg=f"credential {said} has not been presented")).encode("utf-8")
+            return
+
+        rep.status = falcon.HTTP_OK
+        rep.data = json.dumps(dict(said=said,
+                                   issuer=rec.issuer,
+                                   registry=rec.registry,
+                                   schema=rec.schema,
+                                   presented=rec.date,
+                                   revoked=rec.revoked is not None,
+                                   revokedAt=rec.revoked)).encode("utf-8")
 
     def on_put(self, req, rep, said):
         """  Credential Presentation Resource PUT Method
@@ -196,46 +628,125 @@ class PresentationResourceEndpoint:
                     format: text
          responses:
            202:
-              description: Credential Presentation accepted
+              description: Credential Presentation accepted, with the ETag of the presentation
+
+        A credential presented again with the same body while its chain TELs are unchanged is accepted without
+        parsing the body, and without even reading it when If-None-Match holds the ETag of the presentation.
 
         """
         rep.content_type = "application/json"
 
+        if not self.accepts(req, rep):
+            return
+
+        if self.unchanged(req, rep, said):
+            return
+
+        dig = None
+        try:
+            if self.reader.streamed(req):
+                creders, revoked = self.pool.ingest(self.reader.chunks(req), limit=self.reader.limit)
+            else:
+                with self.pool.meter.timer("read"):
+                    ims = self.reader.read(req)
+
+                dig = caching.ResultCache.digest(ims) if ims else None
+                if dig is not None and self.known(rep, said, dig):
+                    return
+
+                creders, revoked = self.pool.verify(ims)
+
+        except ingesting.BufferLimitError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"credential {said} presentation failed: {ex}")).encode("utf-8")
+            return
+
+        self.present(rep, said, creders, revoked, dig=dig)
+
+    @staticmethod
+    def accepts(req, rep):
+        """ Returns True if the request content type is CESR, else sets a 400 response """
         if req.content_type not in ("application/json+cesr",):
             rep.status = falcon.HTTP_BAD_REQUEST
             rep.data = json.dumps(dict(msg=f"invalid content type={req.content_type} for VC presentation")).encode(
                 "utf-8")
-            return
+            return False
 
-        ims = req.bounded_stream.read()
+        return True
 
-        self.vry.cues.clear()
+    def unchanged(self, req, rep, said):
+        """ Returns True if If-None-Match of req holds the current ETag of said and the presentation is accepted
 
-        parsing.Parser().parse(ims=ims,
-                               kvy=self.hby.kvy,
-                               tvy=self.tvy,
-                               vry=self.vry)
+        Parameters:
+            req (Request): falcon request
+            rep (Response): falcon response
+            said (str): qb64 SAID of credential being presented
 
-        found = False
-        while self.vry.cues:
-            msg = self.vry.cues.popleft()
-            if "creder" in msg:
-                creder = msg["creder"]
-                if creder.said == said:
-                    found = True
-                    break
+        """
+        match = req.get_header("If-None-Match")
+        if match is None:
+            return False
+
+        tag = self.presenter.tag(said)
+        if tag is None or (match.strip() != "*" and tag not in [t.strip() for t in match.split(",")]):
+            return False
+
+        self.accept(rep, said, tag)
+        return True
+
+    def known(self, rep, said, dig):
+        """ Returns True if said was already accepted with body digest dig and chain TELs unchanged, accepting it again
+
+        Parameters:
+            rep (Response): falcon response
+            said (str): qb64 SAID of credential being presented
+            dig (str): qb64 digest of the request body
+
+        """
+        tag = self.presenter.tag(said, dig=dig)
+        if tag is None:
+            return False
+
+        self.accept(rep, said, tag)
+        return True
+
+    def accept(self, rep, said, tag):
+        """ Accept the presentation of said again without parsing and set the 202 response with ETag tag """
+        with self.pool.meter.timer("write"):
+            self.presenter.record(said)
+
+        rep.status = falcon.HTTP_ACCEPTED
+        rep.set_header("ETag", tag)
+        rep.data = json.dumps(dict(msg=f"{said} is a valid credential ")).encode("utf-8")
+
+    def present(self, rep, said, creders, revoked, dig=None):
+        """ Record the presentation of credential said if it is among the verified credentials
 
-        if not found:
+        Parameters:
+            rep (Response): falcon response
+            said (str): qb64 SAID of credential being presented
+            creders (list): Creder of each credential saved from the request body
+            revoked (list): qb64 SAIDs of credentials revoked by TEL events in the request body
+            dig (str): qb64 digest of the request body, None if it was streamed
+
+        """
+        invalidate(self.cache, revoked, self.presenter)
+
+        found = next((creder for creder in creders if creder.said == said), None)
+
+        if found is None:
             rep.status = falcon.HTTP_BAD_REQUEST
             rep.data = json.dumps(dict(msg=f"credential {said} from body of request did not verify")).encode("utf-8")
             return
 
-        print(f"Credential {said} presented.")
+        logger.info("Credential %s presented", said)
 
-        saider = coring.Saider(qb64=said)
-        now = coring.Dater()
+        with self.pool.meter.timer("write"):
+            self.presenter.record(said, dig=dig, creder=found)
 
-        self.vdb.iss.pin(keys=(saider.qb64,), val=now)
+        tag = self.presenter.tag(said) if dig is not None else None
+        if tag is not None:
+            rep.set_header("ETag", tag)
 
         rep.status = falcon.HTTP_ACCEPTED
         rep.data = json.dumps(
@@ -244,6 +755,352 @@ class PresentationResourceEndpoint:
         return
 
 
+class ReportResourceEndpoint:
+    """ Report resource endpoint class
+
+    This class allows for a POST of a report, stored in fixed size chunks while it is digested, and a GET
+    of the status of an uploaded report.  The ASGI endpoints store the report as it arrives, the hio server
+    buffers the whole body first, refusing a Content-Length above the maximum report size beforehand.
+
+    """
+
+    def __init__(self, filer):
+        """ Create report resource endpoint instance
+
+        Parameters:
+            filer (Filer): storage of uploaded reports
+
+        """
+        self.filer = filer
+
+    def on_get(self, req, rep, aid, dig):
+        """  Report Resource GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+            aid: qb64 AID of the submitter of the report
+            dig: qb64 digest of the report
+
+        ---
+         summary: Return the status of an uploaded report
+         tags:
+            - Reports
+         responses:
+           200:
+              description: Report status, size, content type and submitter
+           404:
+              description: No such report from this submitter
+
+        """
+        rep.content_type = "application/json"
+
+        stats = self.filer.get(dig)
+        if stats is None or stats.submitter != aid:
+            rep.status = falcon.HTTP_NOT_FOUND
+            rep.data = json.dumps(dict(msg=f"report {dig} from {aid} not found")).encode("utf-8")
+            return
+
+        rep.status = falcon.HTTP_OK
+        rep.data = json.dumps(self.filer.json(dig, stats)).encode("utf-8")
+
+    def on_post(self, req, rep, aid, dig):
+        """  Report Resource POST Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+            aid: qb64 AID of the submitter of the report
+            dig: qb64 digest of the report
+
+        ---
+         summary: Upload a report
+         description: Upload a report either as the request body or as the file part of a multipart form.
+                      The report is stored in chunks and accepted if its data matches dig
+         tags:
+            - Reports
+         responses:
+           202:
+              description: Report accepted
+           200:
+              description: Report already uploaded
+           400:
+              description: Report data does not match dig or no file in the form
+           413:
+              description: Report too large
+
+        """
+        rep.content_type = "application/json"
+        if self.known(rep, dig) or self.oversized(req, rep, dig):
+            return
+
+        try:
+            if req.content_type is not None and req.content_type.startswith("multipart/"):
+                for part in req.get_media():
+                    if part.filename is not None:
+                        stats = self.store(aid, dig, part.stream, part.filename, part.content_type)
+                        break
+                else:
+                    raise ValueError("no file part in multipart form")
+            else:
+                stream = req.stream if req.content_length is None else req.bounded_stream
+                stats = self.store(aid, dig, stream, req.get_param("filename"), req.content_type)
+
+        except reporting.ReportSizeError as ex:
+            rep.status = falcon.HTTP_413
+            rep.data = json.dumps(dict(msg=f"report {dig} upload failed: {ex}")).encode("utf-8")
+            return
+
+        except (ValueError, falcon.MediaMalformedError) as ex:
+            rep.status = falcon.HTTP_BAD_REQUEST
+            rep.data = json.dumps(dict(msg=f"report {dig} upload failed: {ex}")).encode("utf-8")
+            return
+
+        self.accepted(rep, dig, stats)
+
+    def known(self, rep, dig):
+        """ Answer with the status of report dig if it was already uploaded, returns True if it was """
+        stats = self.filer.get(dig)
+        if stats is None:
+            return False
+
+        rep.status = falcon.HTTP_OK
+        rep.data = json.dumps(self.filer.json(dig, stats)).encode("utf-8")
+        return True
+
+    def oversized(self, req, rep, dig):
+        """ Answer with 413 if the Content-Length of the upload of report dig is above the maximum report size,
+        returns True if it is, before any of the body is read
+        """
+        if req.content_length is None or req.content_length <= self.filer.maxSize:
+            return False
+
+        rep.status = falcon.HTTP_413
+        rep.data = json.dumps(dict(msg=f"report {dig} upload failed: report larger than {self.filer.maxSize} "
+                                       f"bytes")).encode("utf-8")
+        return True
+
+    def store(self, aid, dig, stream, filename, contentType):
+        """ Store the report read from file like stream one chunk at a time
+
+        Returns:
+            ReportStats: statistics of the accepted report
+
+        """
+        upload = self.filer.upload(aid, dig, filename=filename, contentType=contentType)
+        try:
+            while True:
+                chunk = stream.read(self.filer.chunkSize)
+                if not chunk:
+                    break
+                upload.write(chunk)
+        except Exception:
+            upload.abort()
+            raise
+
+        return upload.finish()
+
+    def accepted(self, rep, dig, stats):
+        """ Answer with the status of newly accepted report dig """
+        rep.status = falcon.HTTP_ACCEPTED
+        rep.data = json.dumps(self.filer.json(dig, stats)).encode("utf-8")
+
+
+class ReportsResourceEndpoint:
+    """ Reports collection resource endpoint class
+
+    This class allows for a GET of the status of every report uploaded by a submitter.
+
+    """
+
+    def __init__(self, filer):
+        """ Create reports collection resource endpoint instance
+
+        Parameters:
+            filer (Filer): storage of uploaded reports
+
+        """
+        self.filer = filer
+
+    def on_get(self, req, rep, aid):
+        """  Reports Collection GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+            aid: qb64 AID of the submitter of the reports
+
+        ---
+         summary: Return the status of every report uploaded by a submitter
+         tags:
+            - Reports
+         responses:
+           200:
+              description: List of report statuses
+
+        """
+        rep.content_type = "application/json"
+        rep.status = falcon.HTTP_OK
+        rep.data = json.dumps([self.filer.json(dig, stats) for dig, stats in self.filer.reports(aid)]).encode("utf-8")
+
+
+class CacheResourceEndpoint:
+    """ Verification result cache resource endpoint class
+
+    This class allows for a GET of the hit, miss and eviction counters of the verification result cache.
+
+    """
+
+    def __init__(self, cache):
+        """ Create verification result cache resource endpoint instance
+
+        Parameters:
+            cache (ResultCache): cache of verification responses keyed by request body digest
+
+        """
+        self.cache = cache
+
+    def on_get(self, req, rep):
+        """  Verification result cache GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+
+        ---
+         summary: Return the counters of the verification result cache
+         description: Return the number of entries, bytes, hits, misses and evictions of the result cache
+         tags:
+            - verifier
+         responses:
+           200:
+              description: Cache counters
+
+        """
+        rep.content_type = "application/json"
+        rep.status = falcon.HTTP_OK
+        rep.data = json.dumps(self.cache.stats()).encode("utf-8")
+
+
+class PrefilterResourceEndpoint:
+    """ Prefilter counters resource endpoint class
+
+    This class allows for a GET of how many KEL and TEL events were skipped as already accepted.
+
+    """
+
+    def __init__(self, prefilter):
+        """ Create prefilter counters resource endpoint instance
+
+        Parameters:
+            prefilter (Prefilter): filter dropping already accepted events before parsing
+
+        """
+        self.prefilter = prefilter
+
+    def on_get(self, req, rep):
+        """  Prefilter counters GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+
+        ---
+         summary: Return the counters of the already accepted event prefilter
+         description: Return the number of frames and bytes checked and skipped as already accepted
+         tags:
+            - verifier
+         responses:
+           200:
+              description: Prefilter counters
+
+        """
+        rep.content_type = "application/json"
+        rep.status = falcon.HTTP_OK
+        rep.data = json.dumps(self.prefilter.stats()).encode("utf-8")
+
+
+class MetricsEndpoint:
+    """ Metrics resource endpoint class
+
+    This class allows for a GET of the verifier's metrics in the Prometheus text exposition format.
+
+    """
+
+    def __init__(self, meter):
+        """ Create metrics resource endpoint instance
+
+        Parameters:
+            meter (Meter): registry of the verifier's metrics
+
+        """
+        self.meter = meter
+
+    def on_get(self, req, rep):
+        """  Metrics GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+
+        ---
+         summary: Return the verifier's metrics for Prometheus
+         description: Return per stage latency histograms, request and byte counters per endpoint and the
+                      current cue depth in the Prometheus text exposition format
+         tags:
+            - verifier
+         responses:
+           200:
+              description: Metrics
+
+        """
+        rep.content_type = "text/plain; version=0.0.4; charset=utf-8"
+        rep.status = falcon.HTTP_OK
+        rep.data = self.meter.render().encode("utf-8")
+
+
+class ReadyEndpoint:
+    """ Readiness resource endpoint class
+
+    This class allows for a GET of whether the schemas needed to verify credentials have been resolved.
+
+    """
+
+    def __init__(self, readiness):
+        """ Create readiness resource endpoint instance
+
+        Parameters:
+            readiness (Readiness): reports the progress of the schema OOBIs
+
+        """
+        self.readiness = readiness
+
+    def on_get(self, req, rep):
+        """  Readiness GET Method
+
+        Parameters:
+            req: falcon.Request HTTP request
+            rep: falcon.Response HTTP response
+
+        ---
+         summary: Return whether the service is ready to verify credentials
+         description: Return the state of each schema OOBI and whether its schema has been stored, with
+                      status 200 once every schema is in place and 503 until then
+         tags:
+            - verifier
+         responses:
+           200:
+              description: Ready
+           503:
+              description: Schema OOBIs still resolving
+
+        """
+        ready, oobis = self.readiness.status()
+        rep.content_type = "application/json"
+        rep.status = falcon.HTTP_OK if ready else falcon.HTTP_SERVICE_UNAVAILABLE
+        rep.data = json.dumps(dict(ready=ready, oobis=oobis)).encode("utf-8")
+
+
 class HealthEndpoint:
     def __init__(self):
         pass
@@ -0,0 +1,57 @@
+import os
+import signal
+import time
+
+from verifier.app import forking
+
+
+def test_reuse_port_server():
+    one = forking.ReusePortServer(ha=("127.0.0.1", 0))
+    assert one.reopen()
+    port = one.ha[1]
+
+    two = forking.ReusePortServer(ha=("127.0.0.1", port))
+    assert two.reopen()
+    assert two.ha == one.ha
+
+    two.close()
+    one.close()
+
+
+def test_supervisor():
+    def run():
+        time.sleep(60)
+
+    handler = signal.getsignal(signal.SIGTERM)
+    supervisor = forking.Supervisor(workers=2, run=run, backoff=0.0, grace=5.0)
+    try:
+        supervisor.enter()
+        assert len(supervisor.pids) == 2
+        assert sorted(supervisor.pids.values()) == [0, 1]
+
+        pid = next(pid for pid, idx in supervisor.pids.items() if idx == 1)
+        os.kill(pid, signal.SIGKILL)
+
+        deadline = time.monotonic() + 5.0
+        while supervisor.restarts == 0 and time.monotonic() < deadline:
+            assert supervisor.recur(tyme=0.0) is False
+            time.sleep(0.01)
+
+        assert supervisor.restarts == 1
+        assert pid not in supervisor.pids
+        assert sorted(supervisor.pids.values()) == [0, 1]
+
+        supervisor.terminate(signal.SIGTERM, None)
+        assert supervisor.recur(tyme=0.0) is True
+
+        pids = list(supervisor.pids)
+        supervisor.exit()
+        assert supervisor.pids == {}
+        for pid in pids:
+            try:
+                os.kill(pid, 0)
+                assert False, f"worker {pid} still running"
+            except ProcessLookupError:
+                pass
+    finally:
+        signal.signal(signal.SIGTERM, handler)
@@ -0,0 +1,54 @@
+import asyncio
+
+from hio.base import doing
+
+from verifier.app import serving
+
+
+class CountDoer(doing.Doer):
+    def __init__(self, count, **kwa):
+        self.count = count
+        self.recurs = 0
+        self.exited = False
+        super(CountDoer, self).__init__(**kwa)
+
+    def recur(self, tyme):
+        self.recurs += 1
+        return self.recurs >= self.count
+
+    def exit(self):
+        self.exited = True
+
+
+def test_drive():
+    doer = CountDoer(count=3)
+    doist = doing.Doist(tock=0.0, real=False, doers=[doer])
+    asyncio.run(serving.drive(doist))
+    assert doer.recurs == 3
+    assert doer.exited
+
+    # other tasks keep running between recurs and cancelling exits the doers
+    async def main():
+        doer = CountDoer(count=1000000)
+        doist = doing.Doist(tock=0.001, real=False, doers=[doer])
+        ticker = asyncio.create_task(serving.drive(doist))
+        await asyncio.sleep(0.05)
+        ticker.cancel()
+        try:
+            await ticker
+        except asyncio.CancelledError:
+            pass
+        return doer
+
+    doer = asyncio.run(main())
+    assert 0 < doer.recurs < 1000000
+    assert doer.exited
+
+
+def test_listen():
+    one = serving.listen(0)
+    port = one.getsockname()[1]
+    two = serving.listen(port)
+    assert two.getsockname() == one.getsockname()
+    two.close()
+    one.close()
@@ -0,0 +1,22 @@
+import inspect
+
+from keri.core import eventing  # keri.db.basing expects the event processors to be loaded first
+
+from verifier.app import forking
+from verifier.app.cli.commands.server import start
+from verifier.core import verifying
+
+
+def test_setup_args(monkeypatch):
+    args = start.parser.parse_args(["--workers", "2", "--max-queued", "3"])
+    kwa = start.setupArgs(args, shared=True)
+    params = inspect.signature(verifying.setup).parameters
+    assert set(kwa) <= set(params)
+    assert set(params) - set(kwa) == {"app", "hby", "vdb", "reger", "local", "backlog", "ends"}
+    assert kwa["maxQueued"] == 3
+    assert kwa["shared"] and not kwa["grow"]
+    assert kwa["verifyReports"] and kwa["processEscrows"]
+
+    monkeypatch.setattr(forking, "worker", 1)
+    kwa = start.setupArgs(args, shared=True)
+    assert not kwa["verifyReports"] and not kwa["processEscrows"]
@@ -0,0 +1,228 @@
+from ..common import *
+
+import socket
+import threading
+import types
+import time
+
+import falcon
+import falcon.asgi
+import falcon.testing
+
+from keri.app import habbing
+
+from verifier.core import admitting, basing, pooling, verifying
+
+
+class Slow:
+    """ Verification endpoint stand in that answers another admitted request while this one is in flight """
+
+    def __init__(self, client=None):
+        self.client = client
+        self.inner = None
+
+    def on_post(self, req, rep):
+        if self.client is not None and self.inner is None:
+            self.inner = self.client.simulate_post('/v1/cesr-verifier/verifier', body=b"x" * 10)
+        rep.status = falcon.HTTP_200
+
+    def on_put(self, req, rep, said):
+        rep.status = falcon.HTTP_200
+
+
+class AsyncPut:
+
+    async def on_put(self, req, rep, said):
+        rep.status = falcon.HTTP_200
+
+
+def test_admitter():
+    admitter = admitting.Admitter(limit=2, maxBytes=100, maxBody=80, unknown=30)
+    assert admitter.oversize(81)
+    assert not admitter.oversize(80)
+    assert not admitter.oversize(None)
+    assert admitter.oversized == 1
+
+    first = admitter.admit(60)
+    assert first == 60
+    assert admitter.admit(50) is None  # over the in-flight bytes
+    second = admitter.admit(None)
+    assert second == 30
+    assert admitter.admit(1) is None  # over the concurrent requests
+    assert (admitter.active, admitter.bytes, admitter.rejected) == (2, 90, 2)
+
+    admitter.release(first)
+    admitter.release(second)
+    assert (admitter.active, admitter.bytes) == (0, 0)
+
+    # verifications in flight in the pool count even while no request is admitted
+    load = [3]
+    admitter = admitting.Admitter(limit=3, maxBytes=0, maxBody=0, load=lambda: load[0])
+    assert admitter.admit(10) is None
+    load[0] = 2
+    size = admitter.admit(10)
+    assert size == 10
+    assert admitter.inflight() == 2
+    admitter.release(size)
+
+    # a lone request is always admitted
+    admitter = admitting.Admitter(limit=1, maxBytes=10, maxBody=0)
+    size = admitter.admit(1000)
+    assert size == 1000
+    assert admitter.admit(0) is None
+    admitter.release(size)
+
+
+def test_admission_middleware():
+    admitter = admitting.Admitter(limit=1, maxBytes=0, maxBody=100)
+    app = falcon.App(middleware=[admitting.AdmissionMiddleware(admitter, retryAfter=3)])
+    client = falcon.testing.TestClient(app)
+    slow = Slow(client)
+    app.add_route('/v1/cesr-verifier/verifier', slow)
+    app.add_route('/v1/cesr-verifier/presentations/{said}', slow)
+
+    result = client.simulate_post('/v1/cesr-verifier/verifier', body=b"x" * 10)
+    assert result.status == falcon.HTTP_200
+    assert slow.inner.status == falcon.HTTP_503
+    assert slow.inner.headers["Retry-After"] == "3"
+    assert (admitter.active, admitter.rejected) == (0, 1)
+
+    result = client.simulate_put('/v1/cesr-verifier/presentations/said', body=b"x" * 101)
+    assert result.status == falcon.HTTP_413
+    assert "larger than the maximum of 100 bytes" in result.json["msg"]
+    assert admitter.active == 0
+
+    app = falcon.asgi.App(middleware=[admitting.AdmissionMiddleware(admitter)])
+    app.add_route('/v1/cesr-verifier/presentations/{said}', AsyncPut())
+    client = falcon.testing.TestClient(app)
+    result = client.simulate_put('/v1/cesr-verifier/presentations/said', body=b"x" * 101)
+    assert result.status == falcon.HTTP_413
+    result = client.simulate_put('/v1/cesr-verifier/presentations/said', body=b"x" * 10)
+    assert result.status == falcon.HTTP_200
+    assert admitter.active == 0
+
+
+def test_server_backlog():
+    server = admitting.Server(port=0, app=falcon.App())
+    assert server.backlog() == 0
+
+    def requestant(headed, ended):
+        return types.SimpleNamespace(headed=headed, ended=ended)
+
+    # one request answered now, one waiting for its answer, one receiving its body, one not yet headed
+    server.reqs.update(a=requestant(True, True), b=requestant(True, True), c=requestant(True, False),
+                       d=requestant(False, False), e=requestant(True, True))
+    server.reps.update(a=types.SimpleNamespace(ended=False), b=types.SimpleNamespace(ended=False),
+                       e=types.SimpleNamespace(ended=True))
+    assert server.backlog() == 2
+
+    # the hio server sheds once more than maxQueued other requests wait
+    admitter = admitting.Admitter(limit=2, maxBytes=0, maxBody=0, load=server.backlog)
+    assert admitter.admit(10) is None
+    del server.reqs["c"]
+    assert admitter.admit(10) == 10
+
+
+def test_admission_concurrent(seeder, monkeypatch):
+    with habbing.openHab(name="verifier8", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier,
+                                                                      Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        gate = threading.Event()
+        verify = pooling.VerificationContext.verify
+
+        def held(ctx, ims):
+            gate.wait(timeout=10)
+            return verify(ctx, ims)
+
+        monkeypatch.setattr(pooling.VerificationContext, "verify", held)
+
+        # two contexts and one queued verification admit three requests at once
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        pool = verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, contexts=2, maxQueued=1,
+                               cacheSize=0)
+        client = falcon.testing.TestClient(app)
+        results = []
+
+        def post():
+            results.append(client.simulate_post('/v1/cesr-verifier/verifier', body=bytes(acdcmsgs),
+                                                headers={'Content-Type': 'application/json+cesr'}))
+
+        threads = [threading.Thread(target=post) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+
+        deadline = time.monotonic() + 10
+        while len(results) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [result.status for result in results] == [falcon.HTTP_503] * 3
+        assert pool.pending == 3
+
+        gate.set()
+        for thread in threads:
+            thread.join()
+        assert sorted(result.status for result in results) == [falcon.HTTP_200] * 3 + [falcon.HTTP_503] * 3
+        assert pool.pending == 0
+        pool.close()
+
+
+class Report:
+    """ Report upload endpoint stand in recording the bodies it was handed """
+
+    def __init__(self):
+        self.bodies = []
+
+    def on_post(self, req, rep, aid, dig):
+        self.bodies.append(req.bounded_stream.read())
+        rep.status = falcon.HTTP_202
+
+
+def exchange(server, msg):
+    """ Returns the response of server to request msg sent on a new connection """
+    client = socket.create_connection(server.servant.ha)
+    client.setblocking(False)
+    client.sendall(msg)
+    response = b""
+    deadline = time.monotonic() + 5
+    while b"\r\n\r\n" not in response and time.monotonic() < deadline:
+        server.service()
+        try:
+            response += client.recv(4096)
+        except BlockingIOError:
+            time.sleep(0.001)
+    client.close()
+    return response
+
+
+def test_server_refuses_oversized():
+    app = falcon.App()
+    report = Report()
+    app.add_route('/v1/cesr-verifier/reports/{aid}/{dig}', report)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = admitting.Server(host="127.0.0.1", port=port, app=app,
+                              limits={("POST", "/v1/cesr-verifier/reports/{aid}/{dig}"): 100})
+    assert server.reopen()
+    assert server.limit("POST", "/v1/cesr-verifier/reports/aid/dig") == 100
+    assert server.limit("GET", "/v1/cesr-verifier/reports/aid/dig") == 0
+
+    # answered with 413 from its head, before its body is received
+    head = (b"POST /v1/cesr-verifier/reports/aid/dig HTTP/1.1\r\nHost: localhost\r\n"
+            b"Content-Type: application/zip\r\nContent-Length: %d\r\n\r\n")
+    response = exchange(server, head % 1000 + b"x" * 10)
+    assert response.startswith(b"HTTP/1.1 413")
+    assert report.bodies == []
+    assert server.oversized == 1
+    server.service()
+    assert not server.refused and not server.reqs  # closed once the 413 was sent
+
+    response = exchange(server, head % 10 + b"x" * 10)
+    assert response.startswith(b"HTTP/1.1 202")
+    assert report.bodies == [b"x" * 10]
+    server.close()
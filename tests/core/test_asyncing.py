@@ -0,0 +1,85 @@
+from ..common import *
+
+import falcon
+import falcon.asgi
+import falcon.testing
+from keri.app import habbing
+
+from verifier.core import asyncing, basing, verifying
+
+
+def test_async_endpoints(seeder):
+    with habbing.openHab(name="verifier8", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+        ims = bytes(kmsgs + tmsgs + imsgs + acdcmsgs)
+
+        app = falcon.asgi.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, ends=asyncing)
+        client = falcon.testing.TestClient(app)
+
+        result = client.simulate_get('/health')
+        assert result.status == falcon.HTTP_200
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=ims,
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_200
+        assert [cred["d"] for cred in result.json["creds"]] == [said]
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=ims,
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_200
+        result = client.simulate_get('/v1/cesr-verifier/verifier/cache')
+        assert result.json["hits"] == 1
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=ims,
+                                      headers={'Content-Type': 'application/json'})
+        assert result.status == falcon.HTTP_400
+
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                     body=ims,
+                                     headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_202
+
+        lines = "\n".join([json.dumps(dict(id="a", cesr=ims.decode("utf-8"))), "not json"])
+        result = client.simulate_post('/v1/cesr-verifier/verifier/batch',
+                                      body=lines,
+                                      headers={'Content-Type': 'application/x-ndjson'})
+        assert result.status == falcon.HTTP_200
+        assert [cred["d"] for cred in result.json["results"][0]["creds"]] == [said]
+        assert "msg" in result.json["results"][1]
+
+        result = client.simulate_get('/v1/cesr-verifier/verifier/stats')
+        assert result.status == falcon.HTTP_200
+
+        result = client.simulate_get('/metrics')
+        assert result.status == falcon.HTTP_200
+        assert 'verifier_requests_total{endpoint="/health",method="GET",status="200"} 1' in result.text
+
+        # streamed bodies are parsed chunk by chunk as they arrive
+        app = falcon.asgi.App()
+        pool = verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, streamThreshold=-1,
+                               chunkSize=16, contexts=1, ends=asyncing)
+        client = falcon.testing.TestClient(app)
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                     body=ims,
+                                     headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_202
+        assert pool.contexts.qsize() == 1
+
+        app = falcon.asgi.App()
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, streamThreshold=-1, maxBuffered=64,
+                        ends=asyncing)
+        client = falcon.testing.TestClient(app)
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=ims,
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_413
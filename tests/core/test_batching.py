@@ -0,0 +1,83 @@
+from ..common import *
+
+from keri.app import habbing
+from keri.core import coring
+from keri.vdr import viring
+
+from verifier.core import batching, framing, pooling
+
+
+def test_batch_verifier(seeder):
+    with habbing.openHab(name="issuer9", salt=b'0123456789abcdefg', temp=True) as (hby, hab), \
+            habbing.openHab(name="verifier9", salt=b'123456789abcdef01', temp=True) as (vhby, vhab):
+        seeder.seedSchema(db=hby.db)
+        seeder.seedSchema(db=vhby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(vhby)
+        ims = bytes(kmsgs + tmsgs + imsgs + acdcmsgs)
+
+        # one controller signature on each of the issuer's KEL events, none known to the verifier yet
+        batcher = batching.BatchVerifier(db=vhby.db, workers=2)
+        frames = framing.split(ims)
+        sigs = batcher.collect(frames)
+        assert len(sigs) == len(framing.split(kmsgs)) == hab.kever.sn + 1
+        assert all(key == hab.kever.verfers[0].raw for _, _, key in sigs)
+
+        memo = batcher.verify(sigs)
+        assert all(result for _, result in memo.values())
+        assert batcher.stats() == dict(signatures=len(sigs), failures=0, batches=1)
+
+        # the parser is answered from the batch results of its own thread only
+        sig, ser, key = sigs[0]
+        verfer = batching.Verfer(raw=key, code=coring.MtrDex.Ed25519)
+        with batcher.verified(frames[:1]):
+            assert verfer.verify(sig, ser)
+            batching._local.memo[(sig, key)] = (ser, False)
+            assert not verfer.verify(sig, ser)
+            assert not verfer.verify(sig, ser + b" ")
+            assert coring.Verfer(raw=key, code=coring.MtrDex.Ed25519).verify(sig, ser)  # keripy left alone
+        assert verfer.verify(sig, ser)
+        batcher.close()
+
+        # a bad signature is pinned on its own event
+        bad = bytearray(ims)
+        idx = bad.find(b'-AAB', len(frames[0].raw)) + 4 + 2  # inside the signature on the second event
+        bad[idx:idx + 1] = b'A' if bad[idx:idx + 1] != b'A' else b'B'
+        batcher = batching.BatchVerifier(db=vhby.db, workers=2)
+        memo = batcher.verify(batcher.collect(framing.split(bytes(bad))))
+        assert batcher.failures == 1
+        assert [result for _, result in memo.values()].count(False) == 1
+        batcher.close()
+
+        reger = viring.Reger(name=vhby.name, temp=True, db=vhby.db)
+        pool = pooling.ContextPool(hby=vhby, reger=reger, size=1, signers=2)
+        creders, revoked = pool.verify(ims)
+        assert [creder.said for creder in creders] == [said]
+        assert pool.batcher.signatures == len(sigs)
+        assert pool.batcher.failures == 0
+        assert hab.pre in vhby.kevers
+        assert vhby.kevers[hab.pre].sn == hab.kever.sn
+        assert all(isinstance(verfer, batching.Verfer) for verfer in vhby.kevers[hab.pre].verfers)
+
+        # key state accepted before the batcher existed verifies from the batch results as well
+        interacted = bytes(hab.interact())
+        state = vhby.kevers[hab.pre]
+        state.verfers = [coring.Verfer(qb64=verfer.qb64) for verfer in state.verfers]
+        verified = []
+        verify = batching.Verfer.verify
+        batching.Verfer.verify = lambda self, sig, ser: verified.append(self) or verify(self, sig, ser)
+        try:
+            pool.verify(interacted)
+        finally:
+            batching.Verfer.verify = verify
+        assert verified and vhby.kevers[hab.pre].sn == hab.kever.sn
+        assert pool.batcher.signatures == len(sigs) + 1
+
+        # accepted events are dropped by the prefilter so nothing is left to batch
+        creders, revoked = pool.verify(ims)
+        assert [creder.said for creder in creders] == [said]
+        assert pool.batcher.signatures == len(sigs) + 1
+        pool.close()
@@ -0,0 +1,50 @@
+from ..common import *
+
+from keri.app import oobiing
+
+from verifier.core import bundling
+
+QviUrl = f"http://schema.origincloud.net/oobi/{Schema.QVI_SCHEMA}"
+OtherUrl = "http://schema.origincloud.net/oobi/EBNaNu-M9P5cgrnfl2Fvymy4E_jvxxyjb70PRtiANlJy"
+
+
+def schemas(seeder):
+    with habbing.openHby(name="seed", temp=True) as hby:
+        seeder.seedSchema(db=hby.db)
+        return [schemer.sed for (_,), schemer in hby.db.schema.getItemIter()]
+
+
+def test_read(seeder, tmp_path):
+    docs = schemas(seeder)
+    assert len(docs) > 2
+
+    for idx, doc in enumerate(docs[:2]):
+        (tmp_path / f"{idx}.json").write_text(json.dumps(doc, indent=2))
+    (tmp_path / "rest.json").write_text(json.dumps(docs[2:]))
+    (tmp_path / "README.md").write_text("not a schema")
+
+    schemers = bundling.read(str(tmp_path))
+    assert [schemer.said for schemer in schemers] == [doc["$id"] for doc in docs]
+    assert [schemer.said for schemer in bundling.read(str(tmp_path / "rest.json"))] == [doc["$id"] for doc in docs[2:]]
+
+    tampered = dict(docs[0], title="Tampered")
+    (tmp_path / "bad.json").write_text(json.dumps(tampered))
+    with pytest.raises(ValueError, match="bad.json"):
+        bundling.read(str(tmp_path))
+
+    with pytest.raises(ValueError, match="not found"):
+        bundling.read(str(tmp_path / "missing"))
+
+
+def test_load(seeder, tmp_path):
+    (tmp_path / "bundle.json").write_text(json.dumps(schemas(seeder)))
+
+    with habbing.openHby(name="bundle", temp=True) as hby:
+        hby.db.oobis.put(keys=(QviUrl,), val=basing.OobiRecord(date=helping.nowIso8601()))
+        hby.db.oobis.put(keys=(OtherUrl,), val=basing.OobiRecord(date=helping.nowIso8601()))
+
+        assert bundling.preload(hby, str(tmp_path / "bundle.json")) > 2
+        assert hby.db.schema.get(keys=(Schema.QVI_SCHEMA,)).said == Schema.QVI_SCHEMA
+        assert hby.db.oobis.get(keys=(QviUrl,)) is None
+        assert hby.db.roobi.get(keys=(QviUrl,)).state == oobiing.Result.resolved
+        assert hby.db.oobis.get(keys=(OtherUrl,)) is not None  # not in the bundle, still resolved remotely
@@ -0,0 +1,120 @@
+import threading
+
+from verifier.core.caching import LRUCache, ResultCache
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2, maxbytes=10)
+    assert cache.get("a") is None
+    assert cache.misses == 1
+
+    assert cache.put("a", 1, size=4)
+    assert cache.put("b", 2, size=4)
+    assert cache.get("a") == 1  # a is now most recently used
+    assert cache.hits == 1
+
+    assert cache.put("c", 3, size=4)  # evicts b by count
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.evictions == 1
+
+    assert cache.put("d", 4, size=8)  # evicts by bytes
+    assert len(cache) == 1
+    assert cache.size == 8
+    assert cache.evictions == 3
+
+    assert not cache.put("e", 5, size=11)  # larger than bound on its own
+    assert "e" not in cache
+
+    assert cache.pop("d") == 4
+    assert cache.size == 0
+    assert cache.stats() == dict(entries=0, bytes=0, hits=1, misses=1, evictions=3)
+
+
+def test_result_cache():
+    cache = ResultCache(maxsize=2)
+    dig = cache.digest(b"cesr stream one")
+    assert dig == cache.digest(bytearray(b"cesr stream one"))
+    assert dig != cache.digest(b"cesr stream two")
+
+    cache.add(dig, b'{"creds": []}', saids=["Ecred1", "Ecred2"])
+    other = cache.digest(b"cesr stream two")
+    cache.add(other, b'{"creds": []}', saids=["Ecred2"])
+    assert cache.get(dig) == b'{"creds": []}'
+
+    assert cache.invalidate("Ecred1") == 1
+    assert dig not in cache
+    assert other in cache
+    assert cache.saids == {"Ecred2": {other}}
+
+    assert cache.invalidate("Ecred2") == 1
+    assert len(cache) == 0
+    assert cache.saids == {}
+    assert cache.invalidate("Ecred3") == 0
+
+    # evicted entries no longer index their credentials
+    cache.add("d1", b"1", saids=["Ecred1"])
+    cache.add("d2", b"2", saids=["Ecred1"])
+    cache.add("d3", b"3", saids=["Ecred3"])
+    assert "d1" not in cache
+    assert cache.saids == {"Ecred1": {"d2"}, "Ecred3": {"d3"}}
+
+
+def test_result_cache_stamp():
+    state = {"Ecred1": "iss", "Ecred2": "iss"}
+
+    def stamp(saids):
+        if any(state[said] == "rev" for said in saids):
+            return None
+        return tuple(state[said] for said in sorted(saids))
+
+    cache = ResultCache(maxsize=4, stamp=stamp)
+    cache.add("d1", b"1", saids=["Ecred1", "Ecred2"])
+    cache.add("d2", b"2", saids=["Ecred2"])
+    assert cache.get("d1") == b"1"
+    assert cache.hits == 1
+
+    # state changed elsewhere without invalidating this cache
+    state["Ecred1"] = "upd"
+    assert cache.get("d1") is None
+    assert cache.misses == 1
+    assert "d1" not in cache
+    assert cache.saids == {"Ecred2": {"d2"}}
+    assert cache.get("d2") == b"2"
+
+    # a fresh entry added while a stale one was being checked is kept
+    def restamp(saids):
+        cache.stamp = stamp
+        cache.add("d2", b"fresh", saids=["Ecred2"])
+        return None
+
+    state["Ecred2"] = "upd"
+    cache.stamp = restamp
+    assert cache.get("d2") == b"fresh"
+    assert cache.saids["Ecred2"] == {"d2"}
+
+    state["Ecred2"] = "rev"
+    cache.add("d3", b"3", saids=["Ecred2"])  # revoked credentials are not cached
+    assert "d3" not in cache
+    assert cache.get("d2") is None
+
+
+def test_result_cache_threads():
+    cache = ResultCache(maxsize=16)
+
+    def churn(n):
+        for i in range(500):
+            dig = f"d{(n * 500 + i) % 64}"
+            cache.add(dig, b"x", saids=[f"Ecred{i % 8}"])
+            cache.get(dig)
+            cache.invalidate(f"Ecred{(i + n) % 8}")
+
+    threads = [threading.Thread(target=churn, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) <= 16
+    assert cache.size == sum(entry[1] for entry in cache._entries.values())
+    assert all(dig in cache for digs in cache.saids.values() for dig in digs)
@@ -0,0 +1,58 @@
+from ..common import *
+
+from keri.app import habbing
+
+from verifier.core import caching, chaining, pooling
+
+
+def test_chain_verifier(seeder):
+    with habbing.openHab(name="sid", temp=True, salt=b'0123456789abcdef') as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="qvireg")
+        qvicred = get_qvi_cred(issuer=hab.pre, recipient=hab.pre, schema=Schema.QVI_SCHEMA, registry=registry)
+        hab, qcrdntler, qsaid, qkmsgs, qtmsgs, qimsgs, qvimsgs = get_cred(hby, hab, regery, registry, verifier, Schema.QVI_SCHEMA, qvicred, seqner)
+
+        qviedge = get_qvi_edge(qvicred.sad["d"], Schema.QVI_SCHEMA)
+        leicred = get_lei_cred(issuer=hab.pre, recipient=hab.pre, schema=Schema.LEI_SCHEMA, registry=registry, sedge=qviedge)
+        hab, lcrdntler, lsaid, lkmsgs, ltmsgs, limsgs, leimsgs = get_cred(hby, hab, regery, registry, verifier, Schema.LEI_SCHEMA, leicred, seqner)
+        reger = lcrdntler.rgy.reger
+
+        chains = caching.ChainCache(maxsize=16)
+        ctx = pooling.VerificationContext(hby=hby, reger=reger, chains=chains)
+        assert isinstance(ctx.vry, chaining.ChainVerifier)
+        ims = bytes(qvimsgs + leimsgs)
+
+        creders, revoked = ctx.verify(ims)
+        assert [creder.said for creder in creders] == [qsaid, lsaid]
+        assert len(chains) == 2
+        assert chains.hits == 0
+
+        assert chains.misses == 2
+
+        stamp = ctx.vry.stamp(leicred)
+        assert stamp[0] == hab.kever.serder.said
+        assert stamp[3] == (ctx.vry.latest(qsaid),)
+        assert chains.get(lsaid) == stamp
+
+        # unchanged state is answered from the cache
+        hits = chains.hits
+        creders, revoked = ctx.verify(ims)
+        assert [creder.said for creder in creders] == [qsaid, lsaid]
+        assert chains.hits == hits + 2
+
+        # revoking the QVI credential changes the state of both so both are validated again
+        revoke_cred(hab, regery, registry, dict(sad=qvicred.sad))
+        assert chains.get(lsaid) != ctx.vry.stamp(leicred)
+
+        hits, misses = chains.hits, chains.misses
+        creders, revoked = ctx.verify(ims)
+        assert [creder.said for creder in creders] == [qsaid]  # LEI chain is revoked
+        assert (chains.hits, chains.misses) == (hits, misses + 2)
+        assert chains.get(qsaid) == ctx.vry.stamp(qvicred)
+        assert chains.get(lsaid) != ctx.vry.stamp(leicred)
+
+        # without a cache every credential is validated
+        ctx = pooling.VerificationContext(hby=hby, reger=reger)
+        assert ctx.vry.chains is None
+        creders, revoked = ctx.verify(bytes(qvimsgs))
+        assert [creder.said for creder in creders] == [qsaid]
@@ -0,0 +1,64 @@
+from ..common import *
+
+from keri.vc import proving
+
+from verifier.core import caching, encoding
+
+
+def creds():
+    data = dict(d="", LEI=LEI1)
+    _, data = coring.Saider.saidify(sad=data, label=coring.Saids.d)
+    schema = "EBfdlu8R27Fbx-ehrqwImnK-8Cm79sqbAQ4MmvEAYqao"
+    issuer = "EIaGMMWJFPmtXznY1IIiKDIrg-vIyge6mBl2QV8dDjI3"
+    one = proving.credential(schema=schema, issuer=issuer, data=data)
+    two = proving.credential(schema=schema, issuer=issuer, data=data, kind=kering.Serials.cbor)
+    return one, two
+
+
+def test_backend():
+    assert encoding.backend("json") is encoding.stdlib
+    assert encoding.stdlib(dict(a=[1, "b"])) == b'{"a":[1,"b"]}'
+    with pytest.raises(ValueError):
+        encoding.backend("yaml")
+
+    if encoding.orjson is None:
+        assert encoding.backend("auto") is encoding.stdlib
+        with pytest.raises(ValueError):
+            encoding.backend("orjson")
+    else:
+        assert encoding.backend("auto") is encoding.fast
+        assert encoding.fast(dict(a=[1, "b"])) == b'{"a":[1,"b"]}'
+
+
+@pytest.mark.parametrize("name", ["json", "auto"])
+def test_encoder(name):
+    one, two = creds()
+    encoder = encoding.Encoder(name=name)
+
+    data = encoder.creds([one, two])
+    assert json.loads(data) == dict(creds=[one.sad, two.sad])
+    assert encoder.fragment(one) == bytes(one.raw)  # JSON credentials are served as received
+    assert len(encoder.fragments) == 2
+    assert encoder.fragments.misses == 2
+
+    assert encoder.creds([one, two]) == data
+    assert encoder.fragments.hits == 3
+    assert encoder.creds([]) == b'{"creds":[]}'
+
+    data = encoder.results([("one", [one]), (1, "CESR verification failed: bad"), ("two", [])])
+    assert json.loads(data) == dict(results=[dict(id="one", creds=[one.sad]),
+                                             dict(id=1, msg="CESR verification failed: bad"),
+                                             dict(id="two", creds=[])])
+
+    uncached = encoding.Encoder(name=name, fragments=0)
+    assert uncached.fragments is None
+    assert uncached.creds([one, two]) == encoder.creds([one, two])
+
+
+def test_fragment_cache():
+    cache = caching.FragmentCache(maxsize=1)
+    cache.add("Eone", b"{}")
+    assert cache.get("Eone") == b"{}"
+    cache.add("Etwo", b"[]")
+    assert cache.get("Eone") is None
+    assert cache.stats() == dict(entries=1, bytes=2, hits=1, misses=1, evictions=1)
@@ -0,0 +1,96 @@
+from ..common import *
+
+from keri.app import habbing
+
+from verifier.core import basing, caching, escrowing, framing, pooling, presenting
+
+
+def test_escrower(seeder):
+    with habbing.openHab(name="issuer", salt=b'0123456789abcdefg', temp=True) as (hby, hab), \
+            habbing.openHby(name="escrows", temp=True) as vhby:
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier,
+                                                                      Schema.DES_ALIASES_SCHEMA, creder, seqner)
+
+        seeder.seedSchema(db=vhby.db)
+        addDaliasesSchema(vhby)
+        reger = viring.Reger(name="escrows", temp=True, db=vhby.db)
+        pool = pooling.ContextPool(hby=vhby, reger=reger, size=1, prefilter=False)
+        kel = framing.split(bytes(kmsgs))
+
+        # everything but the inception event arrives before what it depends on
+        for ims in [kel[0].raw] + [frame.raw for frame in kel[2:]] + [bytes(tmsgs), bytes(imsgs), bytes(acdcmsgs)]:
+            pool.verify(ims)
+        assert vhby.kevers[hab.pre].sn == 0
+        pool.verify(kel[1].raw)
+
+        escrower = escrowing.Escrower(hby=vhby, reger=reger, pool=pool, budget=0.0)
+        guarded = []
+        process = escrower.process
+        escrower.process = lambda ctx, escrow: (guarded.append(ctx.guard.locked()), process(ctx, escrow))
+        with pool.acquire():
+            assert escrower.run() == 0  # every context busy
+        assert escrower.run() == 1  # budget spent after one escrow
+        assert escrower.cursor == 1
+        assert escrower.resolved["ooes"] == 1
+        assert vhby.kevers[hab.pre].sn == 2
+
+        escrower.budget = 60.0
+        assert escrower.run() == len(escrowing.Escrows)
+        assert escrower.cursor == 1
+        assert escrower.resolved == dict(escrower.resolved, taes=1, oots=1, mre=1)
+        assert sum(escrower.resolved.values()) == 4
+        assert sum(escrower.timedout.values()) == 0
+        assert sum(escrower.sizes.values()) == 0
+        assert escrower.ages["mre"] > 0.0
+        assert reger.saved.get(keys=said) is not None
+        assert guarded and all(guarded)  # without other processes too
+
+        pool.close()
+        reger.close()
+
+
+def test_escrower_revocation(seeder):
+    with habbing.openHab(name="issuer", salt=b'0123456789abcdefg', temp=True) as (hby, hab), \
+            habbing.openHby(name="escrowsrev", temp=True) as vhby:
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier,
+                                                                      Schema.DES_ALIASES_SCHEMA, creder, seqner)
+
+        seeder.seedSchema(db=vhby.db)
+        addDaliasesSchema(vhby)
+        reger = viring.Reger(name="escrowsrev", temp=True, db=vhby.db)
+        vdb = basing.VerifierBaser(name="escrowsrev", temp=True)
+        pool = pooling.ContextPool(hby=vhby, reger=reger, size=1, prefilter=False)
+        creders, _ = pool.verify(bytes(kmsgs) + bytes(tmsgs) + bytes(imsgs) + bytes(acdcmsgs))
+        assert [creder.said for creder in creders] == [said]
+
+        presenter = presenting.Presenter(vdb=vdb, reger=reger)
+        presenter.record(said, creder=creders[0])
+        cache = caching.ResultCache()
+        cache.add("Ebody", b"response", [said])
+
+        revoke_cred(hab, regery, registry, dict(sad=dict(d=said)))
+        ixn = framing.split(b"".join(bytes(msg) for msg in hby.db.clonePreIter(pre=hab.pre)))[-1]
+        rev = framing.split(b"".join(bytes(msg) for msg in regery.reger.clonePreIter(pre=said)))[-1]
+
+        # the revocation arrives before the event anchoring it and is escrowed
+        _, revoked = pool.verify(rev.raw)
+        assert revoked == []
+        assert escrowing.entries(reger, reger.taes) == 1
+        pool.verify(ixn.raw)
+
+        escrower = escrowing.Escrower(hby=vhby, reger=reger, pool=pool, vdb=vdb, cache=cache, budget=60.0)
+        escrower.run()
+        assert escrower.resolved["taes"] == 1
+        assert escrower.revoked == 1
+        assert presenter.lookup(said).revoked is not None
+        assert "Ebody" not in cache
+
+        pool.close()
+        vdb.close()
+        reger.close()
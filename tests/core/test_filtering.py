@@ -0,0 +1,69 @@
+from ..common import *
+
+import falcon
+import falcon.testing
+from keri.app import habbing
+
+from verifier.core import basing, filtering, framing, pooling, verifying
+
+
+def test_prefilter(seeder):
+    with habbing.openHab(name="verifier6", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+        reger = crdntler.rgy.reger
+
+        # the issuer KEL and registry TEL were accepted while issuing so only the credential is left
+        prefilter = filtering.Prefilter(db=hby.db, reger=reger)
+        ims = bytes(kmsgs + tmsgs + imsgs + acdcmsgs)
+        frames = framing.split(ims)
+        assert prefilter.filter(ims) == bytes(acdcmsgs)
+        assert prefilter.frames == len(frames)
+        assert prefilter.skipped == len(framing.split(kmsgs + tmsgs + imsgs))
+        assert prefilter.bytes == len(ims)
+        assert prefilter.skippedBytes == len(ims) - len(acdcmsgs)
+        assert prefilter.stats()["skipped"] == prefilter.skipped
+
+        # an event that differs from the accepted one at its (prefix, sn) is passed through
+        frame = frames[0]
+        assert prefilter.known(frame)
+        altered = frame.raw.replace(b'"kt":"1"', b'"kt":"2"', 1)
+        assert altered != frame.raw
+        assert not prefilter.known(framing.Frame(raw=altered, size=frame.size, proto=frame.proto))
+        assert not prefilter.known(framing.Frame(raw=b"-AAB", size=0, proto=None))
+        assert prefilter.filter(b"-AABnot a message") == b"-AABnot a message"
+
+        pool = pooling.ContextPool(hby=hby, reger=reger, size=1)
+        creders, revoked = pool.verify(ims)
+        assert [creder.said for creder in creders] == [said]
+        creders, revoked = pool.ingest([ims[i:i + 7] for i in range(0, len(ims), 7)])
+        assert [creder.said for creder in creders] == [said]
+        results, revoked = pool.batch([ims, ims])
+        assert [[creder.said for creder in res] for res in results] == [[said], [said]]
+        assert pool.prefilter.skipped == 3 * len(framing.split(kmsgs + tmsgs + imsgs))
+        pool.close()
+
+        pool = pooling.ContextPool(hby=hby, reger=reger, size=1, prefilter=False)
+        assert pool.prefilter is None
+        creders, revoked = pool.verify(ims)
+        assert [creder.said for creder in creders] == [said]
+        pool.close()
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=reger)
+        client = falcon.testing.TestClient(app)
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=ims,
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_200
+        assert [cred["d"] for cred in result.json["creds"]] == [said]
+
+        result = client.simulate_get('/v1/cesr-verifier/verifier/stats')
+        assert result.status == falcon.HTTP_200
+        assert result.json["skippedBytes"] == len(ims) - len(acdcmsgs)
@@ -0,0 +1,66 @@
+import os
+
+from verifier.core import framing
+
+DataDir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def test_split():
+    with open(os.path.join(DataDir, "credential", "credential.cesr"), "rb") as f:
+        ims = f.read()
+
+    frames = framing.split(ims)
+    assert b"".join(frame.raw for frame in frames) == ims
+    assert len(frames) == 19
+    assert all(frame.raw.startswith(b'{') for frame in frames)
+    assert [frame.proto for frame in frames].count("ACDC") == 2
+    for frame in frames:
+        assert frame.raw[frame.size:frame.size + 1] == b'-'  # attachments follow the message
+
+    assert framing.split(b"") == []
+
+    # anything that is not a text domain JSON message is left whole
+    frames = framing.split(ims[:867] + b"-AAB" + ims[867:])
+    assert frames[0].raw == ims[:867] + b"-AAB"
+    frames = framing.split(b"-AABnot a message")
+    assert frames == [framing.Frame(raw=b"-AABnot a message", size=0, proto=None)]
+
+    truncated = framing.split(ims[:400])
+    assert truncated == [framing.Frame(raw=ims[:400], size=0, proto=None)]
+
+
+def test_reap():
+    with open(os.path.join(DataDir, "credential", "credential.cesr"), "rb") as f:
+        ims = f.read()
+
+    frames = framing.split(ims)
+    first = frames[0]
+    assert framing.reap(ims) == first
+    assert framing.reap(ims, start=len(first.raw)) == frames[1]
+
+    # without the start of the next message the end of the attachments is unknown
+    assert framing.reap(ims[:len(first.raw)], final=False) is None
+    assert framing.reap(ims[:len(first.raw)]) == first
+    assert framing.reap(ims[:len(first.raw) + 1], final=False) == first
+    assert framing.reap(ims[:first.size - 1], final=False) is None
+    assert framing.reap(ims[:10], final=False) is None
+    assert framing.reap(b"-AAB", final=False) == framing.Frame(raw=b"-AAB", size=0, proto=None)
+
+
+def test_join():
+    with open(os.path.join(DataDir, "credential", "credential.cesr"), "rb") as f:
+        ims = f.read()
+
+    buf = bytearray(ims)
+    frames = framing.split(buf)
+    assert b"".join(frame.raw for frame in frames) == ims
+    assert all(type(frame.raw) is bytes for frame in frames)
+
+    kept = frames[1::2]
+    joined = framing.join(kept, buf=buf)
+    assert joined is buf
+    assert joined == b"".join(frame.raw for frame in kept)
+
+    joined = framing.join(kept, buf=ims)
+    assert isinstance(joined, bytearray)
+    assert joined == b"".join(frame.raw for frame in kept)
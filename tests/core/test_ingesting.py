@@ -0,0 +1,93 @@
+from ..common import *
+
+import falcon
+import falcon.testing
+from keri.app import habbing
+
+from verifier.core import basing, ingesting, pooling, verifying
+
+
+def test_ingester(seeder):
+    with habbing.openHab(name="verifier4", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        ctx = pooling.VerificationContext(hby=hby, reger=crdntler.rgy.reger)
+        ims = bytes(kmsgs + tmsgs + imsgs + acdcmsgs)
+
+        # chunk boundaries fall everywhere, including inside attachment groups
+        chunks = [ims[i:i + 7] for i in range(0, len(ims), 7)]
+        creders, revoked = ctx.ingest(chunks)
+        assert [creder.said for creder in creders] == [said]
+
+        ingester = ingesting.Ingester(kvy=ctx.kvy, tvy=ctx.tvy, vry=ctx.vry, limit=len(ims))
+        for i in range(0, len(ims), 1024):
+            ingester.feed(ims[i:i + 1024])
+            assert len(ingester.ims) + len(ingester.pending) <= 1024 + len(acdcmsgs)
+        assert ingester.close() == 0
+        assert ingester.size == len(ims)
+        ctx.reset()
+
+        ingester = ingesting.Ingester(kvy=ctx.kvy, tvy=ctx.tvy, vry=ctx.vry, limit=16)
+        with pytest.raises(ingesting.BufferLimitError):
+            ingester.feed(ims[:64])
+
+        # truncated stream leaves trailing bytes unparsed
+        ingester = ingesting.Ingester(kvy=ctx.kvy, tvy=ctx.tvy, vry=ctx.vry)
+        ingester.feed(bytes(acdcmsgs[:-10]))
+        assert ingester.close() > 0
+        ctx.reset()
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, streamThreshold=-1, chunkSize=16)
+        client = falcon.testing.TestClient(app)
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=ims,
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_200
+        assert [cred["d"] for cred in result.json["creds"]] == [said]
+
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                     body=ims,
+                                     headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_202
+
+        app = falcon.App()
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, streamThreshold=-1, maxBuffered=64)
+        client = falcon.testing.TestClient(app)
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                     body=ims,
+                                     headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_413
+
+
+def test_body_reader():
+    body = os.urandom(100_000)
+    reader = ingesting.BodyReader(chunkSize=4096)
+
+    req = falcon.testing.create_req(body=body)
+    ims = reader.read(req)
+    assert isinstance(ims, bytearray)
+    assert ims == body
+
+    req = falcon.testing.create_req(body=body)
+    views = []
+    chunks = []
+    for chunk in reader.chunks(req):
+        views.append(chunk.obj if isinstance(chunk, memoryview) else None)
+        chunks.append(bytes(chunk))
+    assert b"".join(chunks) == body
+    assert all(len(chunk) <= 4096 for chunk in chunks)
+    assert views[0] is not None and all(view is views[0] for view in views)  # one buffer reused for every chunk
+
+    assert reader.buffer().obj is views[0]  # and kept for the next request of this thread
+
+    req = falcon.testing.create_req(body=body, headers={"Transfer-Encoding": "chunked"})
+    req.env.pop("CONTENT_LENGTH", None)
+    assert reader.read(req) == body
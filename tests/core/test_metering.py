@@ -0,0 +1,88 @@
+from ..common import *
+
+import falcon
+import falcon.testing
+from keri.app import habbing
+
+from verifier.core import basing, framing, metering, verifying
+
+
+def test_histogram():
+    histogram = metering.Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_meter():
+    meter = metering.Meter(stages=("parse",), buckets=(0.1,))
+    with meter.timer("parse"):
+        pass
+    add = meter.timed("parse", lambda a, b: a + b)
+    assert add(1, 2) == 3
+    assert add.__name__ == "<lambda>"
+    assert meter.stages["parse"].count == 2
+
+    meter.count("/health", "GET", 200, sent=10)
+    meter.count("/health", "GET", 200, sent=10)
+    meter.count("/v1/cesr-verifier/verifier", "POST", 400, received=5, sent=3)
+    meter.gauge("verifier_cue_depth", "Cues", lambda: 7)
+    meter.gauge("verifier_escrow_entries", "Entries", lambda: dict(ooes=2, mre=0), label="escrow")
+    meter.counter("verifier_expired_reports_total", "Reports", lambda: 3)
+    meter.counter("verifier_escrow_resolved_total", "Resolved", lambda: dict(ooes=1), label="escrow")
+
+    text = meter.render()
+    assert 'verifier_stage_seconds_bucket{stage="parse",le="0.1"} 2' in text
+    assert 'verifier_stage_seconds_bucket{stage="parse",le="+Inf"} 2' in text
+    assert 'verifier_stage_seconds_count{stage="parse"} 2' in text
+    assert 'verifier_requests_total{endpoint="/health",method="GET",status="200"} 2' in text
+    assert 'verifier_requests_total{endpoint="/v1/cesr-verifier/verifier",method="POST",status="400"} 1' in text
+    assert 'verifier_request_bytes_total{endpoint="/v1/cesr-verifier/verifier"} 5' in text
+    assert 'verifier_response_bytes_total{endpoint="/health"} 20' in text
+    assert "# TYPE verifier_cue_depth gauge\nverifier_cue_depth 7\n" in text
+    assert ('# TYPE verifier_escrow_entries gauge\nverifier_escrow_entries{escrow="ooes"} 2\n'
+            'verifier_escrow_entries{escrow="mre"} 0\n') in text
+    assert "# TYPE verifier_expired_reports_total counter\nverifier_expired_reports_total 3\n" in text
+    assert ('# TYPE verifier_escrow_resolved_total counter\nverifier_escrow_resolved_total{escrow="ooes"} 1\n'
+            in text)
+
+
+def test_metrics_endpoint(seeder):
+    with habbing.openHab(name="verifier10", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        pool = verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger, prefilter=False)
+        client = falcon.testing.TestClient(app)
+
+        ims = bytes(kmsgs + tmsgs + imsgs + acdcmsgs)
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                     body=ims,
+                                     headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_202
+        client.simulate_get('/health')
+
+        result = client.simulate_get('/metrics')
+        assert result.status == falcon.HTTP_200
+        assert result.headers["Content-Type"].startswith("text/plain")
+        text = result.text
+        for stage in ("read", "parse", "kel", "tel", "acdc", "write"):
+            assert pool.meter.stages[stage].count > 0, stage
+        assert pool.meter.stages["kel"].count == len(framing.split(kmsgs))
+        assert 'verifier_stage_seconds_count{stage="acdc"} 1' in text
+        assert ('verifier_requests_total{endpoint="/v1/cesr-verifier/presentations/{said}",method="PUT",status="202"} 1'
+                in text)
+        assert 'verifier_requests_total{endpoint="/health",method="GET",status="200"} 1' in text
+        assert f'verifier_request_bytes_total{{endpoint="/v1/cesr-verifier/presentations/{{said}}"}} {len(ims)}' in text
+        assert "verifier_cue_depth 0" in text
+        assert "verifier_contexts_free 4" in text
@@ -0,0 +1,98 @@
+from ..common import *
+
+import json
+import logging
+
+import falcon
+import falcon.testing
+from hio.help import ogling as hogling
+from keri import help
+
+from verifier.core import ogling
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super(Capture, self).__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def test_context_filter():
+    filter = ogling.ContextFilter(level=logging.INFO, levels={"keri": "ERROR", "keri.core.eventing": logging.DEBUG})
+    assert filter.threshold("/site-packages/keri/core/eventing.py") == logging.DEBUG
+    assert filter.threshold("/site-packages/keri/vdr/eventing.py") == "ERROR"
+    assert filter.threshold("/src/verifier/core/pooling.py") == logging.INFO
+    assert len(filter.thresholds) == 3
+
+    record = logging.LogRecord("x", logging.INFO, "/src/verifier/core/pooling.py", 1, "msg", None, None)
+    token = ogling.rid.set("abc")
+    try:
+        assert filter.filter(record)
+        assert record.rid == "abc"
+    finally:
+        ogling.rid.reset(token)
+
+    record = logging.LogRecord("x", logging.DEBUG, "/src/verifier/core/pooling.py", 1, "msg", None, None)
+    assert not filter.filter(record)
+    assert record.rid == "-"
+
+
+def test_sampler_and_parse():
+    sampler = ogling.Sampler(rate=0.25)
+    assert [sampler.sample() for _ in range(8)] == [False, False, False, True] * 2
+    assert not any(ogling.Sampler(rate=0).sample() for _ in range(8))
+    assert all(ogling.Sampler(rate=1).sample() for _ in range(8))
+
+    assert ogling.parse("keri.core=warning, verifier.core.pooling=DEBUG,") == {"keri.core": "WARNING",
+                                                                              "verifier.core.pooling": "DEBUG"}
+    assert ogling.parse(None) == {}
+
+
+def test_configure(monkeypatch):
+    ogler = hogling.Ogler(prefix="test", level=logging.ERROR, syslogged=False, filed=False)
+    capture = Capture()
+    ogler.baseConsoleHandler = capture
+    monkeypatch.setattr(help, "ogler", ogler)
+    monkeypatch.setattr(ogling, "_handlers", None)
+    monkeypatch.setattr(ogling, "sampler", ogling.sampler)
+
+    before = ogler.getLogger("verifier.test.before")
+    ogling.configure(level="WARNING", levels={"tests.core.test_ogling": "DEBUG"}, fmt="json", sample=0.5)
+    try:
+        after = ogler.getLogger("verifier.test.after")
+        assert isinstance(before.handlers[0], ogling.DeferredQueueHandler)
+        assert after.handlers == before.handlers
+        assert ogling.sampler.every == 2
+
+        token = ogling.rid.set("req1")
+        before.debug("early %s", 1)
+        ogling.rid.reset(token)
+        after.info("late")
+    finally:
+        ogling.shutdown()
+
+    lines = [json.loads(line) for line in capture.lines]
+    assert [(line["msg"], line["rid"], line["level"]) for line in lines] == [("early 1", "req1", "DEBUG"),
+                                                                            ("late", "-", "INFO")]
+
+
+def test_request_id_middleware():
+    seen = []
+
+    class Resource:
+        def on_get(self, req, rep):
+            seen.append(ogling.rid.get())
+            rep.media = {}
+
+    app = falcon.App(middleware=[ogling.RequestIdMiddleware()])
+    app.add_route("/", Resource())
+    client = falcon.testing.TestClient(app)
+
+    result = client.simulate_get("/", headers={"X-Request-ID": "given"})
+    assert result.headers["X-Request-ID"] == "given"
+    result = client.simulate_get("/")
+    assert len(result.headers["X-Request-ID"]) == 16
+    assert seen == ["given", result.headers["X-Request-ID"]]
@@ -0,0 +1,111 @@
+from ..common import *
+
+from keri.app import habbing
+
+from verifier.core import pooling
+
+
+def test_context_pool(seeder):
+    with habbing.openHab(name="verifier3", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        pool = pooling.ContextPool(hby=hby, reger=crdntler.rgy.reger, size=2)
+        assert pool.contexts.qsize() == 2
+
+        fus = [pool.submit(pooling.VerificationContext.verify, bytes(acdcmsgs)) for _ in range(4)]
+        for fu in fus:
+            creders, revoked = fu.result()
+            assert [creder.said for creder in creders] == [said]
+            assert revoked == []
+
+        # an empty stream in its own context sees none of the other results
+        creders, revoked = pool.verify(b'')
+        assert creders == []
+
+        with pool.acquire() as ctx:
+            assert pool.contexts.qsize() == 1
+            ctx.vry.cues.append(dict(kin="saved", creder=creder))
+        assert pool.contexts.qsize() == 2
+        assert all(not ctx.vry.cues for ctx in list(pool.contexts.queue))
+
+        pool.close()
+
+
+def test_batch_escrowed(seeder):
+    with habbing.openHab(name="issuer", salt=b'0123456789abcdefg', temp=True) as (hby, hab), \
+            habbing.openHby(name="batches", temp=True) as vhby:
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier,
+                                                                      Schema.DES_ALIASES_SCHEMA, creder, seqner)
+
+        # a fresh verifier database, where the credential alone is escrowed for want of its KEL and TEL
+        seeder.seedSchema(db=vhby.db)
+        addDaliasesSchema(vhby)
+        reger = viring.Reger(name="batches", temp=True, db=vhby.db)
+        pool = pooling.ContextPool(hby=vhby, reger=reger, size=1, prefilter=False)
+        full = bytes(kmsgs) + bytes(tmsgs) + bytes(imsgs) + bytes(acdcmsgs)
+        results, revoked = pool.batch([bytes(acdcmsgs), full, bytes(acdcmsgs)])
+        assert [[creder.said for creder in res] for res in results] == [[], [said], [said]]
+        assert reger.saved.get(keys=said) is not None
+
+        pool.close()
+        reger.close()
+
+
+def test_shared_refresh(seeder):
+    with habbing.openHab(name="verifier9", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier,
+                                                                      Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        pool = pooling.ContextPool(hby=hby, reger=crdntler.rgy.reger, size=3, shared=True)
+        guard = pool.members[0].guard
+        assert guard is not None and all(ctx.guard is guard for ctx in pool.members)
+
+        # without other processes the contexts still never parse against the shared state at once
+        local = pooling.ContextPool(hby=hby, reger=crdntler.rgy.reger, size=2, prefilter=False)
+        assert local.members[0].guard is local.members[1].guard is not guard
+        parsed = []
+        for ctx in local.members:
+            def process(*args, ctx=ctx, process=ctx.kvy.processEvent, **kwa):
+                parsed.append(ctx.guard.locked())
+                return process(*args, **kwa)
+            ctx.kvy.processEvent = process
+
+        fus = [local.submit(pooling.VerificationContext.verify, bytes(kmsgs)) for _ in range(4)]
+        for fu in fus:
+            fu.result()
+        assert parsed and all(parsed)
+        local.close()
+
+        # the shared key and registry state is only ever cleared while no other context parses
+        refreshes = []
+        for ctx in pool.members:
+            def refresh(ctx=ctx, clear=ctx.refresh):
+                refreshes.append(guard.locked())
+                clear()
+            ctx.refresh = refresh
+
+        ims = bytes(kmsgs + tmsgs + imsgs + acdcmsgs)
+        fus = [pool.submit(pooling.VerificationContext.verify, ims) for _ in range(6)]
+        fus += [pool.submit(pooling.VerificationContext.ingest, [ims[:100], ims[100:]]) for _ in range(3)]
+        fus += [pool.submit(pooling.VerificationContext.batch, [ims, ims]) for _ in range(3)]
+        for fu in fus[:9]:
+            creders, revoked = fu.result()
+            assert [creder.said for creder in creders] == [said]
+        for fu in fus[9:]:
+            results, revoked = fu.result()
+            assert [[creder.said for creder in res] for res in results] == [[said], [said]]
+        assert refreshes == [True] * 12
+
+        pool.close()
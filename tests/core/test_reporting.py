@@ -0,0 +1,186 @@
+from ..common import *
+
+import io
+import zipfile
+
+import falcon
+import falcon.asgi
+import falcon.testing
+
+from verifier.core import asyncing, basing as vbasing, reporting, verifying
+
+Aid = "EPVL8rHsmUrmwbKP0HxKwVrCRSCvfIAHDbzsdYau6Usq"
+
+
+def report(size=100_000):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("reports/report.xbrl", os.urandom(size))
+    return buf.getvalue()
+
+
+def test_filer():
+    vdb = vbasing.VerifierBaser(name="filer", temp=True)
+    filer = reporting.Filer(vdb=vdb, chunkSize=1000, maxSize=10_000)
+    data = os.urandom(4321)
+    dig = coring.Diger(ser=data).qb64
+
+    upload = filer.upload(Aid, dig, filename="report.zip", contentType="application/zip")
+    for i in range(0, len(data), 777):
+        upload.write(data[i:i + 777])
+        assert len(upload.buf) < filer.chunkSize
+    stats = upload.finish()
+
+    assert (stats.submitter, stats.status, stats.size) == (Aid, reporting.ReportStatus.accepted, len(data))
+    assert vdb.cnt(vdb.imgs) == 5
+    assert b"".join(filer.data(dig)) == data
+    assert filer.reports(Aid)[0][0] == dig
+    assert [diger.qb64 for diger in vdb.stts.get(keys=(reporting.ReportStatus.accepted,))] == [dig]
+
+    assert filer.update(dig, reporting.ReportStatus.verified, "all signatures verified").status == "verified"
+    assert vdb.stts.get(keys=(reporting.ReportStatus.accepted,)) == []
+    assert [diger.qb64 for diger in vdb.stts.get(keys=(reporting.ReportStatus.verified,))] == [dig]
+
+    other = coring.Diger(ser=b"other").qb64
+    upload = filer.upload(Aid, other)
+    upload.write(data)
+    with pytest.raises(ValueError, match="does not match"):
+        upload.finish()
+    assert filer.get(other) is None
+    assert vdb.cnt(vdb.imgs) == 5
+
+    upload = filer.upload(Aid, other)
+    with pytest.raises(reporting.ReportSizeError):
+        upload.write(bytes(10_001))
+
+    with pytest.raises(ValueError, match="invalid report digest"):
+        filer.upload(Aid, "notadigest")
+    vdb.close()
+
+
+def check_endpoints(app, vdb):
+    client = falcon.testing.TestClient(app)
+    data = report()
+    dig = coring.Diger(ser=data).qb64
+
+    result = client.simulate_get(f'/v1/cesr-verifier/reports/{Aid}/{dig}')
+    assert result.status == falcon.HTTP_404
+
+    result = client.simulate_post(f'/v1/cesr-verifier/reports/{Aid}/{coring.Diger(ser=b"x").qb64}', body=data,
+                                  headers={'Content-Type': 'application/zip'})
+    assert result.status == falcon.HTTP_400
+
+    result = client.simulate_post(f'/v1/cesr-verifier/reports/{Aid}/{dig}', body=data,
+                                  params=dict(filename="report.zip"), headers={'Content-Type': 'application/zip'})
+    assert result.status == falcon.HTTP_202
+    assert result.json["size"] == len(data)
+    assert result.json["filename"] == "report.zip"
+    assert result.json["status"] == "accepted"
+    assert vdb.cnt(vdb.imgs) == -(-len(data) // reporting.ChunkSize)
+
+    result = client.simulate_post(f'/v1/cesr-verifier/reports/{Aid}/{dig}', body=data,
+                                  headers={'Content-Type': 'application/zip'})
+    assert result.status == falcon.HTTP_200
+
+    form = report(size=1000)
+    fdig = coring.Diger(ser=form).qb64
+    boundary = "b0undary"
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="upload"; filename="form.zip"\r\n'
+            f'Content-Type: application/zip\r\n\r\n').encode("utf-8") + form + f'\r\n--{boundary}--\r\n'.encode("utf-8")
+    result = client.simulate_post(f'/v1/cesr-verifier/reports/{Aid}/{fdig}', body=body,
+                                  headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+    assert result.status == falcon.HTTP_202
+    assert result.json["filename"] == "form.zip"
+
+    result = client.simulate_get(f'/v1/cesr-verifier/reports/{Aid}')
+    assert sorted(report["dig"] for report in result.json) == sorted([dig, fdig])
+    result = client.simulate_get(f'/v1/cesr-verifier/reports/{Aid}/{fdig}')
+    assert result.json["contentType"] == "application/zip"
+
+    # refused on its Content-Length before any of the body is stored
+    chunks = vdb.cnt(vdb.imgs)
+    big = report(size=300_000)
+    result = client.simulate_post(f'/v1/cesr-verifier/reports/{Aid}/{coring.Diger(ser=big).qb64}', body=big,
+                                  headers={'Content-Type': 'application/zip'})
+    assert result.status == falcon.HTTP_413
+    assert vdb.cnt(vdb.imgs) == chunks
+
+
+def test_report_endpoints(seeder):
+    with habbing.openHby(name="reports", temp=True) as hby:
+        vdb = vbasing.VerifierBaser(name="reports", temp=True)
+        reger = viring.Reger(name="reports", temp=True, db=hby.db)
+        app = falcon.App()
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=reger, reportSize=200_000)
+        check_endpoints(app, vdb)
+        vdb.close()
+
+        vdb = vbasing.VerifierBaser(name="areports", temp=True)
+        app = falcon.asgi.App()
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=reger, reportSize=200_000, ends=asyncing)
+        check_endpoints(app, vdb)
+        vdb.close()
+        reger.close()
+
+
+def package(hab, files, signed=None, manifest=True):
+    buf = io.BytesIO()
+    signed = signed if signed is not None else list(files)
+    with zipfile.ZipFile(buf, "w") as z:
+        signatures = []
+        for name, data in files.items():
+            z.writestr(f"report/reports/{name}", data)
+            if name in signed:
+                sigs = [siger.qb64 for siger in hab.sign(ser=data, indexed=True)]
+                signatures.append(dict(file=f"../reports/{name}", aid=hab.pre, sigs=sigs))
+        if manifest:
+            z.writestr("report/META-INF/reports.json", json.dumps(dict(documentInfo=dict(signatures=signatures))))
+    return buf.getvalue()
+
+
+def verify(verifier, data):
+    dig = coring.Diger(ser=data).qb64
+    upload = verifier.filer.upload(Aid, dig)
+    upload.write(data)
+    upload.finish()
+
+    while verifier.filer.get(dig).status in (reporting.ReportStatus.accepted, reporting.ReportStatus.verifying):
+        verifier.recur(tyme=0.0)
+    return verifier.filer.get(dig)
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_report_verifier(workers):
+    with habbing.openHby(name=f"signer{workers}", temp=True) as hby:
+        hab = hby.makeHab(name="signer")
+        vdb = vbasing.VerifierBaser(name=f"verify{workers}", temp=True)
+        filer = reporting.Filer(vdb=vdb, chunkSize=1000)
+        verifier = reporting.ReportVerifier(hby=hby, filer=filer, workers=workers)
+        files = {"a.xbrl": os.urandom(3000), "b.xbrl": b"<xbrl/>"}
+
+        stats = verify(verifier, package(hab, files))
+        assert stats.status == reporting.ReportStatus.verified
+        assert stats.message == "all 2 files verified"
+        assert [(f["file"], f["aid"], f["verified"]) for f in stats.files] == \
+               [("report/reports/a.xbrl", hab.pre, True), ("report/reports/b.xbrl", hab.pre, True)]
+        assert stats.files[0]["digest"] == coring.Diger(ser=files["a.xbrl"]).qb64
+
+        stats = verify(verifier, package(hab, files, signed=["a.xbrl"]))
+        assert stats.status == reporting.ReportStatus.failed
+        assert stats.message == "1 of 2 files failed verification"
+        assert stats.files[1]["msg"] == "file is not signed"
+
+        stats = verify(verifier, package(hab, files, signed=[]))
+        assert stats.status == reporting.ReportStatus.failed
+
+        stats = verify(verifier, package(hab, files, manifest=False))
+        assert stats.status == reporting.ReportStatus.failed
+        assert stats.message == "no META-INF/reports.json in report"
+
+        stats = verify(verifier, b"not a zip")
+        assert stats.status == reporting.ReportStatus.failed
+        assert (verifier.verified, verifier.failed) == (1, 4)
+        assert vdb.stts.get(keys=(reporting.ReportStatus.verifying,)) == []
+
+        verifier.exit()
+        vdb.close()
@@ -0,0 +1,67 @@
+from ..common import *
+
+import falcon
+import falcon.testing
+from keri.app import oobiing
+
+from verifier.core import basing as vbasing, resolving, verifying
+
+QviUrl = f"http://schema.origincloud.net/oobi/{Schema.QVI_SCHEMA}"
+LeiUrl = f"http://schema.origincloud.net/oobi/{Schema.LEI_SCHEMA}"
+
+
+def test_said():
+    assert resolving.said(QviUrl) == Schema.QVI_SCHEMA
+    assert resolving.said("http://127.0.0.1:5642/oobi/EIaGMMWJFPmtXznY1IIiKDIrg-vIyge6mBl2QV8dDjI3/witness") is None
+
+
+def test_readiness(seeder):
+    with habbing.openHby(name="ready", temp=True) as hby:
+        readiness = resolving.Readiness(hby)
+        assert readiness.status() == (True, [])  # nothing to resolve
+        readiness.done = False
+
+        hby.db.oobis.put(keys=(QviUrl,), val=basing.OobiRecord(date=helping.nowIso8601()))
+        hby.db.coobi.put(keys=(LeiUrl,), val=basing.OobiRecord(date=helping.nowIso8601()))
+        hby.db.oobis.put(keys=("http://127.0.0.1:5642/oobi",), val=basing.OobiRecord(date=helping.nowIso8601()))
+        ready, oobis = readiness.status()
+        assert not ready
+        assert [(oobi["said"], oobi["state"], oobi["schema"]) for oobi in oobis] == [
+            (Schema.QVI_SCHEMA, "queued", False), (Schema.LEI_SCHEMA, "resolving", False)]
+
+        seeder.seedSchema(db=hby.db)
+        hby.db.oobis.rem(keys=(QviUrl,))
+        hby.db.coobi.rem(keys=(LeiUrl,))
+        for url in (QviUrl, LeiUrl):
+            hby.db.roobi.put(keys=(url,), val=basing.OobiRecord(state=oobiing.Result.resolved))
+
+        vdb = vbasing.VerifierBaser(name="ready", temp=True)
+        reger = viring.Reger(name="ready", temp=True)
+        app = falcon.App()
+        verifying.setup(app, hby=hby, vdb=vdb, reger=reger, contexts=1)
+        client = falcon.testing.TestClient(app)
+
+        result = client.simulate_get("/ready")
+        assert result.status_code == 200
+        assert result.json["ready"]
+        assert [oobi["state"] for oobi in result.json["oobis"]] == ["resolved", "resolved"]
+
+
+def test_retrier(seeder):
+    with habbing.openHby(name="retry", temp=True) as hby:
+        hby.db.roobi.put(keys=(QviUrl,), val=basing.OobiRecord(state=oobiing.Result.failed))
+        hby.db.roobi.put(keys=(LeiUrl,), val=basing.OobiRecord(state=oobiing.Result.resolved))
+
+        retrier = resolving.Retrier(hby=hby, delay=0.0)
+        retrier.recur(0.0)  # schedules the retry
+        assert QviUrl in retrier.pending and LeiUrl not in retrier.pending
+        retrier.recur(0.0)
+        assert retrier.retries == 1
+        assert hby.db.roobi.get(keys=(QviUrl,)) is None
+        assert hby.db.oobis.get(keys=(QviUrl,)) is not None
+
+        seeder.seedSchema(db=hby.db)  # resolved meanwhile by some other means, never retried
+        hby.db.roobi.put(keys=(QviUrl,), val=basing.OobiRecord(state=oobiing.Result.failed))
+        retrier.recur(0.0)
+        retrier.recur(0.0)
+        assert retrier.retries == 1
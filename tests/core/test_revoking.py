@@ -0,0 +1,48 @@
+from ..common import *
+
+from keri.app import habbing
+
+from verifier.core import basing as vbasing, caching, presenting, revoking, verifying
+
+
+def test_revoker(seeder):
+    with habbing.openHab(name="rvk", temp=True, salt=b'0123456789abcdef') as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="qvireg")
+        qvicred = get_qvi_cred(issuer=hab.pre, recipient=hab.pre, schema=Schema.QVI_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, qvimsgs = get_cred(hby, hab, regery, registry, verifier, Schema.QVI_SCHEMA, qvicred, seqner)
+        reger = crdntler.rgy.reger
+
+        vdb = vbasing.VerifierBaser(name="rvk", temp=True)
+        presenter = presenting.Presenter(vdb=vdb, reger=reger)
+        presenter.record(said, dig=coring.Diger(ser=bytes(qvimsgs)).qb64, creder=qvicred)
+        others = [coring.Diger(ser=f"{i}".encode("utf-8")).qb64 for i in range(3)]
+        for other in others:  # presentations of credentials never revoked are left alone
+            vdb.iss.pin(keys=(other,), val=coring.Dater())
+
+        cache = caching.ResultCache(maxsize=8)
+        cache.add(b"body", b"response", [said])
+        revoker = revoking.Revoker(vdb=vdb, reger=reger, cache=cache, batch=2)
+        assert revoker.drain() == 0
+
+        # nothing is escrowed until the revoked cue of the TEL event is processed
+        revoke_cred(hab, regery, registry, dict(sad=qvicred.sad))
+        assert revoker.depth() == 0
+        verifying.invalidate(cache, [said], presenter)
+        assert revoker.depth() == 1
+        assert presenter.lookup(said).revoked is not None
+        assert vdb.iss.get(keys=(said,)) is not None
+
+        assert revoker.drain() == 1
+        assert revoker.depth() == 0
+        assert presenter.lookup(said).revoked is not None
+        assert vdb.iss.get(keys=(said,)) is None
+        assert vdb.digs.get(keys=(said,)) is None
+        assert cache.get(b"body") is None
+        assert revoker.revoked == 1 and revoker.lag >= 0.0
+        assert all(vdb.iss.get(keys=(other,)) is not None for other in others)
+
+        # revocations are processed once
+        verifying.invalidate(cache, [said], presenter)
+        assert revoker.depth() == 0 and revoker.drain() == 0
+        vdb.close()
@@ -0,0 +1,73 @@
+from ..common import *
+
+import subprocess
+import sys
+
+from verifier.core import basing as vbasing, snapshotting
+
+
+def test_snapshot(seeder, tmp_path):
+    warm = str(tmp_path / "warm")
+    with habbing.openHby(name="snap", base="b", temp=False, headDirPath=warm) as hby:
+        seeder.seedSchema(db=hby.db)
+        reger = viring.Reger(name="snap", headDirPath=warm, db=hby.db)
+        vdb = vbasing.VerifierBaser(name="snap", headDirPath=warm)
+        vdb.iss.pin(keys=(Schema.QVI_SCHEMA,), val=coring.Dater())
+        reger.close()
+        vdb.close()
+
+    dest = str(tmp_path / "snapshot")  # exported by another process than the running verifier
+    assert snapshotting.export(dest, name="snap", base="b", headDirPath=warm) == ["vdb", "reg", "db", "ks"]
+
+    with pytest.raises(ValueError, match="not empty"):
+        snapshotting.export(dest, name="snap", base="b", headDirPath=warm)
+    with pytest.raises(ValueError, match="no databases"):
+        snapshotting.export(str(tmp_path / "none"), name="other", headDirPath=warm)
+    with pytest.raises(ValueError, match="not a verifier snapshot"):
+        snapshotting.restore(str(tmp_path), name="snap", headDirPath=warm)
+
+    cold = str(tmp_path / "cold")
+    assert snapshotting.restore(dest, name="snap", base="b", headDirPath=cold)
+    assert not snapshotting.restore(dest, name="snap", base="b", headDirPath=cold)  # never over existing state
+
+    with habbing.openHby(name="snap", base="b", temp=False, headDirPath=cold) as hby:
+        assert hby.db.schema.get(keys=(Schema.QVI_SCHEMA,)) is not None
+        vdb = vbasing.VerifierBaser(name="snap", headDirPath=cold)
+        assert vdb.iss.get(keys=(Schema.QVI_SCHEMA,)) is not None
+        vdb.close()
+
+
+def test_compact(tmp_path):
+    head = str(tmp_path)
+    vdb = vbasing.VerifierBaser(name="cmp", headDirPath=head)
+    for i in range(2000):
+        vdb.iss.pin(keys=(f"{i:06}",), val=coring.Dater())
+    for i in range(2000):
+        vdb.iss.rem(keys=(f"{i:06}",))
+    vdb.iss.pin(keys=(Schema.QVI_SCHEMA,), val=coring.Dater())
+    vdb.close()
+
+    sizes = snapshotting.compact(name="cmp", headDirPath=head)
+    assert list(sizes) == ["vdb"]
+    before, after = sizes["vdb"]
+    assert after < before
+
+    vdb = vbasing.VerifierBaser(name="cmp", headDirPath=head)
+    assert vdb.iss.get(keys=(Schema.QVI_SCHEMA,)) is not None
+    vdb.close()
+
+    with pytest.raises(ValueError, match="no databases"):  # a wrong name is never created
+        snapshotting.compact(name="other", headDirPath=head)
+    assert snapshotting.paths("other", headDirPath=head) == {}
+
+    path = snapshotting.paths("cmp", headDirPath=head)["vdb"]
+    holder = subprocess.Popen([sys.executable, "-c", "import lmdb, sys; env = lmdb.open(sys.argv[1], max_dbs=16); "
+                               "print(flush=True); sys.stdin.read()", path],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        holder.stdout.readline()  # environment open in the other process
+        with pytest.raises(ValueError, match="open in another process"):
+            snapshotting.compact(name="cmp", headDirPath=head)
+    finally:
+        holder.communicate()
+    assert snapshotting.compact(name="cmp", headDirPath=head)["vdb"][1] == after
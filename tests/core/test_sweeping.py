@@ -0,0 +1,41 @@
+from ..common import *
+
+from verifier.core import basing as vbasing, sweeping
+
+Old = "2020-01-01T00:00:00.000000+00:00"
+
+
+def test_sweeper():
+    vdb = vbasing.VerifierBaser(name="sweep", temp=True)
+    old, new = [coring.Diger(ser=f"{i}".encode("utf-8")).qb64 for i in range(2)]
+    for said, dts in ((old, Old), (new, helping.nowIso8601())):
+        vdb.iss.pin(keys=(said,), val=coring.Dater(dts=dts))
+        vdb.digs.pin(keys=(said,), val=coring.Diger(ser=b"body"))
+        vdb.pres.pin(keys=(said,), val=vbasing.PresentationRecord(issuer="issuer", date=dts))
+
+    for dig, dts in ((old, Old), (new, helping.nowIso8601())):
+        vdb.stats.pin(keys=(dig,), val=vbasing.ReportStats(submitter="aid", status="accepted", date=dts))
+        vdb.rpts.add(keys=("aid",), val=coring.Diger(qb64=dig))
+        vdb.stts.add(keys=("accepted",), val=coring.Diger(qb64=dig))
+        for idx in range(3):
+            vdb.setVal(db=vdb.imgs, key=f"{dig}.{idx}".encode("utf-8"), val=b"chunk")
+
+    sweeper = sweeping.Sweeper(vdb=vdb, batch=1)
+    sweeper.recur(0.0)  # nothing is swept without a retention
+    assert vdb.cnt(vdb.iss.sdb) == 2 and vdb.cnt(vdb.stats.sdb) == 2
+
+    sweeper = sweeping.Sweeper(vdb=vdb, retention=3600.0, reports=3600.0, batch=1)
+    for _ in range(3):
+        sweeper.recur(0.0)
+
+    assert sweeper.swept == dict(pres=1, rpts=1)
+    for table in (vdb.iss, vdb.digs, vdb.pres):
+        assert table.get(keys=(old,)) is None
+        assert table.get(keys=(new,)) is not None
+
+    assert vdb.stats.get(keys=(old,)) is None
+    assert vdb.stats.get(keys=(new,)) is not None
+    assert [diger.qb64 for diger in vdb.rpts.get(keys=("aid",))] == [new]
+    assert [diger.qb64 for diger in vdb.stts.get(keys=("accepted",))] == [new]
+    assert vdb.cnt(vdb.imgs) == 3
+    vdb.close()
@@ -0,0 +1,68 @@
+from ..common import *
+
+import lmdb
+from keri.app import habbing
+
+from verifier.core import basing as vbasing, pooling, tuning
+
+
+def test_tuned():
+    with pytest.raises(ValueError, match="invalid sync mode"):
+        tuning.configure(tuning.Settings(sync="never"))
+
+    vdb = vbasing.VerifierBaser(name="untuned", temp=True)
+    assert vdb.env.info()["map_size"] == tuning.MapSize
+    vdb.close()
+
+    tuning.configure(tuning.Settings(mapSize=2 * tuning.MapSize, readahead=False, sync="async", maxReaders=512))
+    try:
+        vdb = vbasing.VerifierBaser(name="tuned", temp=True)
+        assert vdb.env.info()["map_size"] == 2 * tuning.MapSize
+        assert vdb.env.info()["max_readers"] == 512
+        assert vdb.env.flags()["sync"] is False
+        assert vdb.env.flags()["readahead"] is False
+        vdb.iss.pin(keys=(Schema.QVI_SCHEMA,), val=coring.Dater())  # sub-dbs opened on the tuned environment
+        vdb.close()
+
+        reger = tuning.Reger(name="tuned", temp=True)
+        assert reger.env.info()["map_size"] == 2 * tuning.MapSize
+        reger.close()
+    finally:
+        tuning.Tuned.Settings = None
+
+
+def test_grower():
+    tuning.configure(tuning.Settings(mapSize=1024 * 1024))
+    try:
+        with habbing.openHby(name="grow", temp=True) as hby:
+            vdb = vbasing.VerifierBaser(name="grow", temp=True)
+            pool = pooling.ContextPool(hby=hby, reger=tuning.Reger(name="grow", temp=True, db=hby.db), size=2)
+            grower = tuning.Grower(lmdbers=[vdb], pool=pool)
+
+            grower.recur(0.0)
+            assert grower.grown == 0
+
+            with pytest.raises(lmdb.MapFullError):
+                for i in range(100000):
+                    vdb.iss.pin(keys=(f"{i:08}",), val=coring.Dater())
+
+            used, size = tuning.usage(vdb.env)
+            with pool.acquire():  # never resized while a verification may have a transaction open
+                grower.recur(0.0)
+                assert grower.grown == 0
+
+            # nor while other database work runs through the gate
+            gate = tuning.Gate()
+            grower.gate = gate
+            assert gate.run(lambda: grower.recur(0.0)) is False
+            assert grower.grown == 0
+
+            grower.recur(0.0)
+            assert grower.grown == 1
+            assert tuning.usage(vdb.env)[1] == 2 * size
+            vdb.iss.pin(keys=(f"{i:08}",), val=coring.Dater())
+
+            pool.close()
+            vdb.close()
+    finally:
+        tuning.Tuned.Settings = None
@@ -7,7 +7,7 @@ from keri.app import habbing
 
 import pytest
 
-from verifier.core import verifying, basing
+from verifier.core import admitting, verifying, basing, presenting
 
 
 def test_setup_verifying(seeder):
@@ -27,7 +27,7 @@ def test_setup_verifying(seeder):
         
         issAndCred = bytearray()
         issAndCred.extend(acdcmsgs)
-        acdc = issAndCred.decode("utf-8")
+        acdc = bytes(issAndCred)
         
         app = falcon.App()
         vdb = basing.VerifierBaser(name=hby.name, temp=True)
@@ -76,7 +76,7 @@ def test_ecr(seeder):
 
         issAndCred = bytearray()
         issAndCred.extend(ecmsgs)
-        acdc = issAndCred.decode("utf-8")
+        acdc = bytes(issAndCred)
 
         # Create a test client
         client = falcon.testing.TestClient(app)
@@ -119,7 +119,7 @@ def test_ecr_missing(seeder):
         verifying.setup(app=app, hby=hby, vdb=vdb, reger=eacrdntler.rgy.reger)
 
         issAndCred = bytearray()
-        acdc = issAndCred.decode("utf-8")
+        acdc = bytes(issAndCred)
 
         # Create a test client
         client = falcon.testing.TestClient(app)
@@ -130,10 +130,217 @@ def test_ecr_missing(seeder):
         assert result.status == falcon.HTTP_400
 
         issAndCred.extend(eamsgs)
-        acdc = issAndCred.decode("utf-8")
+        acdc = bytes(issAndCred)
         result = client.simulate_put(f'/v1/cesr-verifier/presentations/{easaid}',
                                         body=acdc,
                                         headers={'Content-Type': 'application/json'})
         assert result.status == falcon.HTTP_400
         
-        
\ No newline at end of file
+        
+
+def test_verifier_result_cache(seeder):
+    with habbing.openHab(name="verifier2", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger)
+        client = falcon.testing.TestClient(app)
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier',
+                                      body=bytes(acdcmsgs),
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_200
+        assert [cred["d"] for cred in result.json["creds"]] == [said]
+
+        again = client.simulate_post('/v1/cesr-verifier/verifier',
+                                     body=bytes(acdcmsgs),
+                                     headers={'Content-Type': 'application/json+cesr'})
+        assert again.status == falcon.HTTP_200
+        assert again.content == result.content
+
+        stats = client.simulate_get('/v1/cesr-verifier/verifier/cache').json
+        assert stats["entries"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+
+def test_verifier_batch(seeder):
+    with habbing.openHab(name="verifier5", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        pool = verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger)
+        client = falcon.testing.TestClient(app)
+
+        cesr = bytes(kmsgs + tmsgs + imsgs + acdcmsgs).decode("utf-8")
+        lines = [
+            json.dumps(dict(id="first", cesr=cesr)),
+            json.dumps(cesr),
+            "not json",
+            json.dumps(dict(id="kel", cesr=bytes(kmsgs).decode("utf-8"))),
+        ]
+        result = client.simulate_post('/v1/cesr-verifier/verifier/batch',
+                                      body="\n".join(lines),
+                                      headers={'Content-Type': 'application/x-ndjson'})
+        assert result.status == falcon.HTTP_200
+        results = result.json["results"]
+        assert [res["id"] for res in results] == ["first", 1, 2, "kel"]
+        assert [cred["d"] for cred in results[0]["creds"]] == [said]
+        assert [cred["d"] for cred in results[1]["creds"]] == [said]
+        assert "msg" in results[2]
+        assert results[3]["creds"] == []
+
+        boundary = "batchboundary"
+        body = (f"--{boundary}\r\n"
+                f"Content-Disposition: form-data; name=\"one\"\r\n"
+                f"Content-Type: application/json+cesr\r\n\r\n"
+                f"{cesr}\r\n"
+                f"--{boundary}--\r\n")
+        result = client.simulate_post('/v1/cesr-verifier/verifier/batch',
+                                      body=body,
+                                      headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        assert result.status == falcon.HTTP_200
+        assert result.json["results"][0]["id"] == "one"
+        assert [cred["d"] for cred in result.json["results"][0]["creds"]] == [said]
+
+        result = client.simulate_post('/v1/cesr-verifier/verifier/batch',
+                                      body=cesr,
+                                      headers={'Content-Type': 'application/json+cesr'})
+        assert result.status == falcon.HTTP_400
+
+        # refused once more than the maximum is read, even without a Content-Length to admit it on
+        end = verifying.BatchResourceEndpoint(hby, vdb, pool, maxBody=100)
+        req = falcon.Request(falcon.testing.create_environ(method="POST", body="\n".join(lines),
+                                                           headers={'Content-Type': 'application/x-ndjson'}))
+        with pytest.raises(admitting.BodySizeError):
+            end.items(req)
+
+
+def test_presentation_etag(seeder):
+    with habbing.openHab(name="verifier4", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        pool = verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger)
+        client = falcon.testing.TestClient(app)
+        headers = {'Content-Type': 'application/json+cesr'}
+
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}', body=bytes(acdcmsgs), headers=headers)
+        assert result.status == falcon.HTTP_202
+        etag = result.headers["ETag"]
+        assert vdb.digs.get(keys=(said,)) is not None
+        first = vdb.iss.get(keys=(said,))
+
+        def verify(ims):
+            raise AssertionError("presentation parsed again")
+
+        pool.verify = verify
+        again = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}', body=bytes(acdcmsgs), headers=headers)
+        assert again.status == falcon.HTTP_202
+        assert again.headers["ETag"] == etag
+        assert vdb.iss.get(keys=(said,)).datetime >= first.datetime
+
+        matched = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                      headers=dict(headers, **{"If-None-Match": f'"other", {etag}'}))
+        assert matched.status == falcon.HTTP_202
+        assert matched.headers["ETag"] == etag
+
+        del pool.verify
+        revoke_cred(hab, regery, registry, dict(sad=dict(d=said)))
+        stale = client.simulate_put(f'/v1/cesr-verifier/presentations/{said}',
+                                    headers=dict(headers, **{"If-None-Match": etag}))
+        assert stale.status == falcon.HTTP_400  # revoked, so the empty body is verified and fails
+
+
+def test_presentation_etag_chain(seeder):
+    with habbing.openHab(name="verifier7", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="qvireg")
+        qvicred = get_qvi_cred(issuer=hab.pre, recipient=hab.pre, schema=Schema.QVI_SCHEMA, registry=registry)
+        hab, qcrdntler, qsaid, qkmsgs, qtmsgs, qimsgs, qvimsgs = get_cred(hby, hab, regery, registry, verifier, Schema.QVI_SCHEMA, qvicred, seqner)
+
+        qviedge = get_qvi_edge(qvicred.sad["d"], Schema.QVI_SCHEMA)
+        leicred = get_lei_cred(issuer=hab.pre, recipient=hab.pre, schema=Schema.LEI_SCHEMA, registry=registry, sedge=qviedge)
+        hab, lcrdntler, lsaid, lkmsgs, ltmsgs, limsgs, leimsgs = get_cred(hby, hab, regery, registry, verifier, Schema.LEI_SCHEMA, leicred, seqner)
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        pool = verifying.setup(app=app, hby=hby, vdb=vdb, reger=lcrdntler.rgy.reger)
+        client = falcon.testing.TestClient(app)
+        headers = {'Content-Type': 'application/json+cesr'}
+
+        result = client.simulate_put(f'/v1/cesr-verifier/presentations/{lsaid}', body=bytes(leimsgs), headers=headers)
+        assert result.status == falcon.HTTP_202
+        etag = result.headers["ETag"]
+
+        # revoking the QVI credential the LE credential chains to changes the ETag of the LE presentation
+        revoke_cred(hab, regery, registry, dict(sad=dict(d=qsaid)))
+        assert presenting.Presenter(vdb=vdb, reger=lcrdntler.rgy.reger).tag(lsaid) is None
+
+        parsed = []
+        verify = pool.verify
+
+        def parse(ims):
+            parsed.append(ims)
+            return verify(ims)
+
+        pool.verify = parse
+        stale = client.simulate_put(f'/v1/cesr-verifier/presentations/{lsaid}',
+                                    headers=dict(headers, **{"If-None-Match": etag}))
+        assert stale.status == falcon.HTTP_400
+        assert len(parsed) == 1
+
+        again = client.simulate_put(f'/v1/cesr-verifier/presentations/{lsaid}', body=bytes(leimsgs), headers=headers)
+        assert len(parsed) == 2
+        assert again.status != falcon.HTTP_202
+
+
+def test_presentation_status(seeder):
+    with habbing.openHab(name="verifier5", salt=b'0123456789abcdefg', temp=True) as (hby, hab):
+        seeder.seedSchema(db=hby.db)
+
+        regery, registry, verifier, seqner = reg_and_verf(hby, hab, registryName="daliases")
+        creder = get_da_cred(issuer=hab.pre, schema=Schema.DES_ALIASES_SCHEMA, registry=registry)
+        hab, crdntler, said, kmsgs, tmsgs, imsgs, acdcmsgs = get_cred(hby, hab, regery, registry, verifier, Schema.DES_ALIASES_SCHEMA, creder, seqner)
+        addDaliasesSchema(hby)
+
+        app = falcon.App()
+        vdb = basing.VerifierBaser(name=hby.name, temp=True)
+        verifying.setup(app=app, hby=hby, vdb=vdb, reger=crdntler.rgy.reger)
+        client = falcon.testing.TestClient(app)
+
+        result = client.simulate_get(f'/v1/cesr-verifier/presentations/{said}')
+        assert result.status == falcon.HTTP_404
+
+        client.simulate_put(f'/v1/cesr-verifier/presentations/{said}', body=bytes(acdcmsgs),
+                            headers={'Content-Type': 'application/json+cesr'})
+        result = client.simulate_get(f'/v1/cesr-verifier/presentations/{said}')
+        assert result.status == falcon.HTTP_200
+        assert result.json["issuer"] == hab.pre
+        assert result.json["registry"] == registry.regk
+        assert result.json["schema"] == Schema.DES_ALIASES_SCHEMA
+        assert result.json["presented"] == vdb.iss.get(keys=(said,)).dts
+        assert not result.json["revoked"]
+
+        verifying.invalidate(None, [said], presenting.Presenter(vdb=vdb, reger=crdntler.rgy.reger))
+        result = client.simulate_get(f'/v1/cesr-verifier/presentations/{said}')
+        assert result.json["revoked"]
+        assert result.json["revokedAt"] is not None